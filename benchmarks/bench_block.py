@@ -0,0 +1,104 @@
+"""Bytes and parse time per block of calc_block_tx_count: full getBlock vs light (transactionDetails: accounts).
+
+Run: python benchmarks/bench_block.py [node slot]
+Without arguments it uses a synthetic mainnet-like block: 1300 vote and 700 non-vote transactions.
+With a node and a slot it downloads the block both ways.
+"""
+import json
+import random
+import sys
+import time
+
+import httpx
+from mb_std import Result
+
+from mb_solana.block import VOTE_PROGRAM_ID, get_block_params, parse_block_tx_count
+
+VOTE_TXS = 1300
+NON_VOTE_TXS = 700
+
+
+def _key() -> str:
+    return "".join(random.choices("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz", k=44))  # nosec
+
+
+def _full_tx(vote: bool) -> dict:
+    keys = [_key(), _key(), VOTE_PROGRAM_ID] if vote else [_key() for _ in range(random.randint(6, 20))]  # nosec
+    instructions = [{"programIdIndex": len(keys) - 1, "accounts": [1, 0], "data": _key() * 3, "stackHeight": None}]
+    if not vote:
+        instructions *= random.randint(2, 5)  # nosec
+    meta = {
+        "err": None,
+        "status": {"Ok": None},
+        "fee": 5000,
+        "preBalances": [random.randint(0, 10**12) for _ in keys],  # nosec
+        "postBalances": [random.randint(0, 10**12) for _ in keys],  # nosec
+        "innerInstructions": [] if vote else [{"index": 0, "instructions": instructions * 2}],
+        "logMessages": [f"Program {k} invoke [1]" for k in keys] * (1 if vote else 3),
+        "preTokenBalances": [],
+        "postTokenBalances": [],
+        "rewards": [],
+        "loadedAddresses": {"writable": [], "readonly": []},
+        "computeUnitsConsumed": 2100,
+    }
+    message = {
+        "header": {"numRequiredSignatures": 1, "numReadonlySignedAccounts": 0, "numReadonlyUnsignedAccounts": 1},
+        "accountKeys": keys,
+        "recentBlockhash": _key(),
+        "instructions": instructions,
+    }
+    return {"meta": meta, "transaction": {"message": message, "signatures": [_key() + _key()]}, "version": "legacy"}
+
+
+def _light_tx(full_tx: dict) -> dict:
+    keys = full_tx["transaction"]["message"]["accountKeys"]
+    account_keys = [{"pubkey": k, "signer": i == 0, "source": "transaction", "writable": i < 2} for i, k in enumerate(keys)]
+    drop = {"innerInstructions", "logMessages", "loadedAddresses", "computeUnitsConsumed", "rewards"}
+    meta = {k: v for k, v in full_tx["meta"].items() if k not in drop}
+    transaction = {"accountKeys": account_keys, "signatures": full_tx["transaction"]["signatures"]}
+    return {"meta": meta, "transaction": transaction, "version": full_tx["version"]}
+
+
+def synthetic_blocks() -> tuple[bytes, bytes]:
+    txs = [_full_tx(True) for _ in range(VOTE_TXS)] + [_full_tx(False) for _ in range(NON_VOTE_TXS)]
+    random.shuffle(txs)
+    block = {"blockTime": 1700000000, "blockHeight": 1, "blockhash": _key(), "parentSlot": 0, "previousBlockhash": _key()}
+    rewards = [{"pubkey": _key(), "lamports": 5000, "postBalance": 10**12, "rewardType": "Fee", "commission": None}]
+    full = {**block, "transactions": txs, "rewards": rewards}
+    light = {**block, "transactions": [_light_tx(tx) for tx in txs]}
+    return _rpc_response(full), _rpc_response(light)
+
+
+def _rpc_response(result: dict) -> bytes:
+    return json.dumps({"jsonrpc": "2.0", "result": result, "id": 1}).encode()
+
+
+def _download_blocks(node: str, slot: int) -> tuple[bytes, bytes]:
+    bodies = []
+    for light in (False, True):
+        data = {"jsonrpc": "2.0", "method": "getBlock", "params": get_block_params(slot, light), "id": 1}
+        bodies.append(httpx.post(node, json=data, timeout=60).content)
+    return bodies[0], bodies[1]
+
+
+def _bench(name: str, body: bytes, rounds: int):
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        res = parse_block_tx_count(1, Result(ok=json.loads(body)["result"]))
+        assert res.is_ok(), res.error
+    elapsed_ms = (time.perf_counter() - started_at) / rounds * 1000
+    counts = f"{res.ok.vote_tx_ok + res.ok.vote_tx_error} vote, {res.ok.non_vote_tx_ok + res.ok.non_vote_tx_error} non-vote"
+    sys.stdout.write(f"{name:<6} {len(body) / 1024:>10.1f} KiB {elapsed_ms:>8.2f} ms/block  ({counts})\n")
+
+
+def main():
+    if len(sys.argv) > 2:
+        full, light = _download_blocks(sys.argv[1], int(sys.argv[2]))
+    else:
+        full, light = synthetic_blocks()
+    _bench("full", full, 20)
+    _bench("light", light, 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Decode time of large RPC responses with each installed json decoder.
+
+Run: python benchmarks/bench_json.py [fixtures_dir]
+Record fixtures from a node first: python benchmarks/bench_json.py record NODE fixtures_dir
+Without a fixtures dir it uses synthetic mainnet-size responses: a 2000 transaction block, 1900 vote accounts,
+a leader schedule of 432,000 slots and 5000 cluster nodes.
+"""
+import json
+import os
+import random
+import sys
+import time
+from typing import Any
+
+import httpx
+from bench_block import synthetic_blocks
+
+from mb_solana.json_decoder import available_decoders, get_decoder
+
+METHODS = ["getBlock", "getVoteAccounts", "getLeaderSchedule", "getClusterNodes"]
+ROUNDS = 10
+
+
+def _key() -> str:
+    return "".join(random.choices("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz", k=44))  # nosec
+
+
+def _vote_account() -> dict:
+    epoch_credits = [[e, 100_000_000 + e * 400_000, 100_000_000 + (e - 1) * 400_000] for e in range(540, 545)]
+    return {
+        "votePubkey": _key(),
+        "nodePubkey": _key(),
+        "activatedStake": random.randint(0, 10**16),  # nosec
+        "epochVoteAccount": True,
+        "commission": random.choice([0, 5, 10, 100]),  # nosec
+        "lastVote": 250_000_000,
+        "epochCredits": epoch_credits,
+        "rootSlot": 249_999_969,
+    }
+
+
+def _cluster_node() -> dict:
+    ip = ".".join(str(random.randint(1, 254)) for _ in range(4))  # nosec
+    return {
+        "pubkey": _key(),
+        "gossip": f"{ip}:8001",
+        "tpu": f"{ip}:8004",
+        "tpuQuic": f"{ip}:8010",
+        "rpc": None,
+        "pubsub": None,
+        "version": "1.17.20",
+        "featureSet": 3580551090,
+        "shredVersion": 50093,
+    }
+
+
+def _leader_schedule() -> dict:
+    leaders = [_key() for _ in range(1500)]
+    schedule: dict[str, list[int]] = {}
+    for slot in range(0, 432_000, 4):  # a leader gets 4 consecutive slots
+        schedule.setdefault(random.choice(leaders), []).extend(range(slot, slot + 4))  # nosec
+    return schedule
+
+
+def _rpc_response(result: Any) -> bytes:
+    return json.dumps({"jsonrpc": "2.0", "result": result, "id": 1}).encode()
+
+
+def synthetic_fixtures() -> dict[str, bytes]:
+    current = [_vote_account() for _ in range(1900)]
+    return {
+        "getBlock": synthetic_blocks()[0],
+        "getVoteAccounts": _rpc_response({"current": current, "delinquent": current[:100]}),
+        "getLeaderSchedule": _rpc_response(_leader_schedule()),
+        "getClusterNodes": _rpc_response([_cluster_node() for _ in range(5000)]),
+    }
+
+
+def record(node: str, path: str):
+    os.makedirs(path, exist_ok=True)
+    slot = httpx.post(node, json={"jsonrpc": "2.0", "method": "getSlot", "params": [], "id": 1}, timeout=10).json()["result"]
+    params = {
+        "getBlock": [slot - 100, {"encoding": "json", "maxSupportedTransactionVersion": 0}],
+        "getVoteAccounts": [],
+        "getLeaderSchedule": [],
+        "getClusterNodes": [],
+    }
+    for method in METHODS:
+        data = {"jsonrpc": "2.0", "method": method, "params": params[method], "id": 1}
+        with open(os.path.join(path, f"{method}.json"), "wb") as f:
+            f.write(httpx.post(node, json=data, timeout=120).content)
+
+
+def load_fixtures(path: str) -> dict[str, bytes]:
+    fixtures = {}
+    for method in METHODS:
+        with open(os.path.join(path, f"{method}.json"), "rb") as f:
+            fixtures[method] = f.read()
+    return fixtures
+
+
+def main():
+    if len(sys.argv) > 3 and sys.argv[1] == "record":
+        record(sys.argv[2], sys.argv[3])
+        return
+    fixtures = load_fixtures(sys.argv[1]) if len(sys.argv) > 1 else synthetic_fixtures()
+    decoders = available_decoders()
+    sys.stdout.write(f"{'method':<20} {'size':>10}" + "".join(f" {name:>10}" for name in decoders) + "\n")
+    for method, body in fixtures.items():
+        line = f"{method:<20} {len(body) / 1024 / 1024:>7.1f} MiB"
+        for name in decoders:
+            decode = get_decoder(name)
+            started_at = time.perf_counter()
+            for _ in range(ROUNDS):
+                decode(body)
+            line += f" {(time.perf_counter() - started_at) / ROUNDS * 1000:>7.1f} ms"
+        sys.stdout.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Construction time and memory of the pydantic models vs the compact ones (compact=True).
+
+Run: python benchmarks/bench_models.py
+Synthetic responses: 3000 vote accounts with 64 epochs of credits, 5000 cluster nodes, block production of 3000 leaders.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from mb_std import Result
+
+from mb_solana import solana_rpc
+
+
+def _vote_accounts() -> dict:
+    accounts = [
+        {
+            "votePubkey": f"vote{i}",
+            "nodePubkey": f"node{i}",
+            "activatedStake": 10**15 + i,
+            "epochVoteAccount": True,
+            "commission": 10,
+            "lastVote": 250_000_000,
+            "epochCredits": [[e, 100_000_000 + e * 400_000, 100_000_000 + (e - 1) * 400_000] for e in range(480, 544)],
+            "rootSlot": 249_999_969,
+        }
+        for i in range(3000)
+    ]
+    return {"current": accounts[:2900], "delinquent": accounts[2900:]}
+
+
+def _cluster_nodes() -> list[dict]:
+    return [{"pubkey": f"node{i}", "version": "1.17.20", "gossip": "1.2.3.4:8001", "rpc": None} for i in range(5000)]
+
+
+def _block_production() -> dict:
+    by_identity = {f"node{i}": [400, 396] for i in range(3000)}
+    return {"context": {"slot": 1}, "value": {"byIdentity": by_identity, "range": {"firstSlot": 0, "lastSlot": 1}}}
+
+
+def _measure(parse: Callable[[], Result]) -> tuple[float, float]:
+    """Returns (ms, MiB) of one parse, memory is of the result that stays alive. tracemalloc slows it, so it's a separate run."""
+    gc.collect()
+    started_at = time.perf_counter()
+    res = parse()
+    elapsed = time.perf_counter() - started_at
+    assert res.is_ok(), res.error
+    del res
+    gc.collect()
+    tracemalloc.start()
+    res = parse()
+    size = tracemalloc.get_traced_memory()[0]  # res is alive here, its models are counted
+    tracemalloc.stop()
+    assert res.is_ok(), res.error
+    return elapsed * 1000, size / 1024 / 1024
+
+
+def main():
+    cases = [
+        ("getVoteAccounts", _vote_accounts(), solana_rpc.parse_vote_accounts),
+        ("getClusterNodes", _cluster_nodes(), solana_rpc.parse_cluster_nodes),
+        ("getBlockProduction", _block_production(), solana_rpc.parse_block_production),
+    ]
+    sys.stdout.write(f"{'method':<20} {'pydantic':>22} {'compact':>22}\n")
+    for name, response, parse in cases:
+        line = f"{name:<20}"
+        for compact in (False, True):
+            ms, mib = _measure(lambda: parse(Result(ok=response), compact))  # noqa: B023
+            line += f" {ms:>9.1f} ms {mib:>6.2f} MiB"
+        sys.stdout.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
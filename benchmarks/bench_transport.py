@@ -0,0 +1,33 @@
+"""Requests/second of solana_rpc.get_slot with a per-call connection vs a pooled HttpTransport.
+
+Run: python benchmarks/bench_transport.py [calls]
+The stand-in server is plain HTTP on localhost, so the gain against a real TLS node is bigger than shown here.
+"""
+import sys
+import time
+
+from stand_in_server import StandInServer
+
+from mb_solana import solana_rpc
+from mb_solana.transport import HttpTransport
+
+
+def _bench(name: str, calls: int, fn):
+    started_at = time.perf_counter()
+    for _ in range(calls):
+        res = fn()
+        assert res.is_ok(), res.error
+    elapsed = time.perf_counter() - started_at
+    sys.stdout.write(f"{name:<24} {calls / elapsed:>10.1f} req/s\n")
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with StandInServer() as server:
+        _bench("per-call (mb_std.hr)", calls, lambda: solana_rpc.get_slot(server.url))
+        with HttpTransport() as transport:
+            _bench("pooled HttpTransport", calls, lambda: solana_rpc.get_slot(server.url, transport=transport))
+
+
+if __name__ == "__main__":
+    main()
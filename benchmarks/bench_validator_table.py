@@ -0,0 +1,67 @@
+"""Network-wide validator metrics with Python loops over VoteAccount vs ValidatorTable.
+
+Run: python benchmarks/bench_validator_table.py
+Synthetic getVoteAccounts and getBlockProduction responses of 3000 validators with 64 epochs of credits.
+"""
+import sys
+import time
+
+import numpy as np
+from bench_models import _block_production, _vote_accounts
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.validator_table import ValidatorTable
+
+
+def _python_metrics(accounts: list[solana_rpc.VoteAccount], block_production: solana_rpc.BlockProduction) -> dict:
+    total_stake = sum(a.stake for a in accounts)
+    active = sorted(a.stake for a in accounts if not a.delinquent)
+    skipped = {leader.address: leader.skipped / (leader.produced + leader.skipped) for leader in block_production.leaders}
+    weighted_skip = sum(skipped.get(a.validator, 0) * a.stake for a in accounts) / total_stake
+    last_credits = [a.credits[-1].credits - a.credits[-1].previous_credits for a in accounts]
+    return {
+        "delinquent_share": sum(a.stake for a in accounts if a.delinquent) / total_stake,
+        "median_stake": active[len(active) // 2],
+        "weighted_commission": sum(a.commission * a.stake for a in accounts) / total_stake,
+        "weighted_skip": weighted_skip,
+        "mean_credits": sum(last_credits) / len(last_credits),
+    }
+
+
+def _table_metrics(table: ValidatorTable) -> dict:
+    return {
+        "delinquent_share": table.delinquent_stake_share(),
+        "median_stake": table.stake_percentiles([50])[0],
+        "weighted_commission": table.stake_weighted_mean(table.commission.astype(float)),
+        "weighted_skip": table.stake_weighted_mean(table.skipped_rate),
+        "mean_credits": float(np.mean(table.epoch_credits())),
+    }
+
+
+def _bench(name: str, fn, rounds=20):
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    sys.stdout.write(f"{name:<32} {(time.perf_counter() - started_at) / rounds * 1000:>8.2f} ms\n")
+
+
+def main():
+    accounts = solana_rpc.parse_vote_accounts(Result(ok=_vote_accounts())).ok
+    compact_accounts = solana_rpc.parse_vote_accounts(Result(ok=_vote_accounts()), compact=True).ok
+    block_production = solana_rpc.parse_block_production(Result(ok=_block_production())).ok
+    compact_block_production = solana_rpc.parse_block_production(Result(ok=_block_production()), compact=True).ok
+
+    def build_table() -> ValidatorTable:
+        table = ValidatorTable(compact_accounts)
+        table.join_block_production(compact_block_production)
+        return table
+
+    table = build_table()
+    _bench("python loops: metrics", lambda: _python_metrics(accounts, block_production))
+    _bench("ValidatorTable: build and join", build_table)
+    _bench("ValidatorTable: metrics", lambda: _table_metrics(table))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Local stand-in for a Solana JSON RPC node, used by the benchmarks.
+
+It answers every request with a fixed result per method (see RESULTS) and supports keep-alive and JSON RPC batches.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+RESULTS: dict[str, Any] = {
+    "getSlot": 123456789,
+    "getBalance": {"context": {"slot": 123456789}, "value": 1_000_000_000},
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):  # noqa: N802
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        request = json.loads(body)
+        if isinstance(request, list):
+            response: Any = [self._response(r) for r in request]
+        else:
+            response = self._response(request)
+        data = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @staticmethod
+    def _response(request: dict) -> dict:
+        return {"jsonrpc": "2.0", "result": RESULTS.get(request["method"]), "id": request["id"]}
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer:
+    def __init__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
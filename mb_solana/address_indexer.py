@@ -0,0 +1,230 @@
+"""Transfers of a set of addresses, indexed incrementally into a sqlite file.
+
+For each address the newest indexed signature is kept as a cursor. A run pages getSignaturesForAddress back to the cursor
+only, fetches the transactions which aren't indexed yet and stores their system transfers, the ones made by other programs
+(inner instructions) included. So its cost depends on the new activity, not on the length of the history.
+"""
+import sqlite3
+from dataclasses import dataclass
+
+from mb_std import Result
+
+from mb_solana import helpers, solana_rpc
+from mb_solana.helpers import TransferInfo
+from mb_solana.node_pool import NodePool
+from mb_solana.solana_rpc import SignatureInfo
+from mb_solana.transport import HttpTransport
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursors (address TEXT PRIMARY KEY, signature TEXT NOT NULL, slot INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS transactions (
+    signature TEXT PRIMARY KEY,
+    slot INTEGER NOT NULL,
+    block_time INTEGER,
+    failed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transfers (
+    signature TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    lamports INTEGER NOT NULL,
+    PRIMARY KEY (signature, idx)
+);
+CREATE INDEX IF NOT EXISTS transfers_source ON transfers (source);
+CREATE INDEX IF NOT EXISTS transfers_destination ON transfers (destination);
+"""
+
+
+class IndexedTransfer(TransferInfo):
+    signature: str
+    slot: int
+    block_time: int | None
+
+
+@dataclass
+class IndexerStats:
+    new_signatures: int = 0
+    fetched: int = 0  # transactions fetched, failed transactions and the ones indexed for another address aren't fetched
+    not_found: int = 0  # fetched transactions which the node doesn't have, they're indexed without transfers
+    transfers: int = 0
+    errors: int = 0
+
+
+class AddressIndexer:
+    """The first run of an address pages its whole history, set max_history to limit it to the newest signatures.
+
+    New signatures are processed from the oldest one and the cursor moves after each batch, so an interrupted run or a failed
+    transaction fetch resumes from there on the next run.
+    """
+
+    def __init__(
+        self,
+        node: str | NodePool,
+        db_path: str,
+        *,
+        batch_size=100,
+        window=4,
+        page_size=1000,
+        max_history: int | None = None,
+        timeout=60,
+        transport: HttpTransport | None = None,
+    ):
+        self.node = node
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.window = window
+        self.page_size = page_size
+        self.max_history = max_history
+        self.timeout = timeout
+        self.transport = transport
+        self._db = sqlite3.connect(db_path)
+        self._db.executescript(SCHEMA)
+
+    def run(self, addresses: list[str]) -> IndexerStats:
+        stats = IndexerStats()
+        for address in addresses:
+            res = self.index_address(address, stats)
+            if res.is_error():
+                stats.errors += 1
+        return stats
+
+    def index_address(self, address: str, stats: IndexerStats | None = None) -> Result[int]:
+        """Indexes the new transactions of the address, returns the number of new signatures"""
+        stats = stats or IndexerStats()
+        res = self._new_signatures(address)
+        if res.is_error():
+            return res
+        signatures: list[SignatureInfo] = res.ok[::-1]  # from the oldest one
+        stats.new_signatures += len(signatures)
+        positions = {s.signature: n for n, s in enumerate(signatures)}
+        indexed = self._indexed([s.signature for s in signatures])
+        to_fetch = [s.signature for s in signatures if s.err is None and s.signature not in indexed]
+
+        transfers: dict[str, list[TransferInfo]] = {}
+        saved = 0  # signatures[:saved] are saved and the cursor is at the last of them
+        fetched = 0
+        results = helpers.find_transfers_many(
+            self.node,
+            to_fetch,
+            batch_size=self.batch_size,
+            window=self.window,
+            timeout=self.timeout,
+            transport=self.transport,
+            inner=True,
+        )
+        try:
+            for signature, transfers_res in results:
+                if transfers_res.error == "exception" and transfers_res.data.get("error") == "not_found":
+                    # a null getTransaction result: retrying it would stop the cursor at this signature for good
+                    stats.not_found += 1
+                elif transfers_res.is_error():
+                    # everything before the failed transaction is saved, the next run starts with it
+                    failed_at = positions[signature]
+                    stats.transfers += self._save(address, signatures[saved:failed_at], transfers, indexed)
+                    return Result(error=f"transaction_error: {signature}: {transfers_res.error}", data={"signature": signature})
+                fetched += 1
+                stats.fetched += 1
+                transfers[signature] = transfers_res.ok or []
+                if fetched % self.batch_size == 0:
+                    end = positions[signature] + 1
+                    stats.transfers += self._save(address, signatures[saved:end], transfers, indexed)
+                    saved = end
+        finally:
+            results.close()
+        stats.transfers += self._save(address, signatures[saved:], transfers, indexed)
+        return Result(ok=len(signatures))
+
+    def transfers(self, address: str, *, incoming=True, outgoing=True, since_slot=0) -> list[IndexedTransfer]:
+        """Indexed transfers to and/or from the address, in slot order"""
+        sides = [side for side, enabled in (("destination", incoming), ("source", outgoing)) if enabled]
+        if not sides:
+            return []
+        where = " OR ".join(f"tr.{side} = ?" for side in sides)
+        rows = self._db.execute(
+            "SELECT tr.source, tr.destination, tr.lamports, tr.signature, tx.slot, tx.block_time "
+            "FROM transfers tr JOIN transactions tx ON tx.signature = tr.signature "
+            f"WHERE ({where}) AND tx.slot >= ? ORDER BY tx.slot, tr.signature, tr.idx",
+            [address] * len(sides) + [since_slot],
+        )
+        return [
+            IndexedTransfer(source=r[0], destination=r[1], lamports=r[2], signature=r[3], slot=r[4], block_time=r[5])
+            for r in rows
+        ]
+
+    def cursor(self, address: str) -> str | None:
+        """The newest indexed signature of the address"""
+        row = self._db.execute("SELECT signature FROM cursors WHERE address = ?", (address,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _new_signatures(self, address: str) -> Result[list[SignatureInfo]]:
+        """Signatures newer than the cursor, newest first"""
+        until = self.cursor(address)
+        result: list[SignatureInfo] = []
+        before = None
+        while True:
+            limit = self.page_size
+            if self.max_history is not None and until is None:
+                limit = min(limit, self.max_history - len(result))
+                if limit <= 0:
+                    break
+            res = solana_rpc.get_signatures_for_address(
+                self.node,
+                address,
+                before=before,
+                until=until,
+                limit=limit,
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+            if res.is_error():
+                return res
+            result.extend(res.ok)
+            if len(res.ok) < limit:
+                break
+            before = res.ok[-1].signature
+        return Result(ok=result)
+
+    def _indexed(self, signatures: list[str]) -> set[str]:
+        """Signatures which are indexed already, e.g. for another address"""
+        result: set[str] = set()
+        for i in range(0, len(signatures), 500):  # sqlite limits the number of query parameters
+            end = i + 500
+            chunk = signatures[i:end]
+            query = f"SELECT signature FROM transactions WHERE signature IN ({','.join('?' * len(chunk))})"
+            result.update(row[0] for row in self._db.execute(query, chunk))
+        return result
+
+    def _save(
+        self,
+        address: str,
+        batch: list[SignatureInfo],
+        transfers: dict[str, list[TransferInfo]],
+        indexed: set[str],
+    ) -> int:
+        if not batch:
+            return 0
+        count = 0
+        with self._db:
+            for s in batch:
+                if s.signature in indexed:
+                    continue
+                self._db.execute(
+                    "INSERT INTO transactions VALUES (?, ?, ?, ?)",
+                    (s.signature, s.slot, s.block_time, int(s.err is not None)),
+                )
+                tx_transfers = transfers.get(s.signature, [])
+                rows = [(s.signature, n, t.source, t.destination, t.lamports) for n, t in enumerate(tx_transfers)]
+                self._db.executemany("INSERT INTO transfers VALUES (?, ?, ?, ?, ?)", rows)
+                count += len(rows)
+            self._db.execute("INSERT OR REPLACE INTO cursors VALUES (?, ?, ?)", (address, batch[-1].signature, batch[-1].slot))
+        return count
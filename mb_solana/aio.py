@@ -0,0 +1,695 @@
+"""Asyncio versions of rpc_call, rpc_batch_call, send_transaction and the get_* functions of solana_rpc, of
+block.calc_block_tx_count, helpers.find_transfers(_many) and solana_account.is_empty_account / are_empty_accounts.
+
+All functions take an AsyncTransport. It holds one connection pool for all nodes and limits the number of requests in flight,
+so thousands of coroutines can be started at once with asyncio.gather.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator
+
+import httpx
+from mb_std import Result
+
+from mb_solana import solana_account, solana_rpc
+from mb_solana.block import BlockTxCount, CompactBlockTxCount, get_block_params, parse_block_tx_count
+from mb_solana.hedge import Hedger
+from mb_solana.helpers import TransferInfo, parse_transfers
+from mb_solana.json_decoder import get_decoder
+from mb_solana.node_pool import NodePool, is_node_ok, pick_node, report_node
+from mb_solana.response_cache import ResponseCache
+from mb_solana.solana_rpc import (
+    BlockProduction,
+    ClusterNode,
+    CompactBlockProduction,
+    CompactClusterNode,
+    CompactVoteAccount,
+    EpochInfo,
+    SignatureInfo,
+    VoteAccount,
+)
+
+
+class AsyncTransport:
+    def __init__(
+        self,
+        *,
+        concurrency=100,
+        http2=False,
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=30.0,
+        timeout=10,
+        json_decoder="auto",
+    ):
+        """json_decoder is a name from json_decoder.DECODERS, by default the fastest installed one is used"""
+        self.http2 = http2
+        self.decode = get_decoder(json_decoder)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._http_clients: dict[str | None, httpx.AsyncClient] = {}
+
+    def http_client(self, proxy: str | None = None) -> httpx.AsyncClient:
+        client = self._http_clients.get(proxy)
+        if client is None:
+            client = httpx.AsyncClient(http2=self.http2, limits=self.limits, timeout=self.timeout, proxies=proxy)  # type:ignore
+            self._http_clients[proxy] = client
+        return client
+
+    async def post(self, node: str, data: Any, timeout: int, proxy: str | None = None, raw=False) -> Result:
+        """POST json data to the node. The result's ok is the decoded json response, or the response body if raw is set."""
+        async with self._semaphore:
+            try:
+                res = await self.http_client(proxy).post(node, json=data, timeout=timeout)
+            except Exception as e:
+                return Result(error=f"exception: {str(e)}", data={"node": node})
+        response_data = {"node": node, "http_code": res.status_code}  # the body is kept only for errors, see HttpTransport.post
+        if res.status_code != 200:
+            return Result(error=f"http_error: {res.status_code}", data=response_data | {"body": res.text})
+        if raw:
+            return Result(ok=res.content, data=response_data)
+        try:
+            return Result(ok=self.decode(res.content), data=response_data)
+        except Exception as e:
+            return Result(error=f"exception: {str(e)}", data=response_data | {"body": res.text})
+
+    async def aclose(self):
+        for client in self._http_clients.values():
+            await client.aclose()
+        self._http_clients.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+
+async def rpc_call(
+    *,
+    node: str | list[str] | NodePool,
+    method: str,
+    params: list[Any],
+    transport: AsyncTransport,
+    id_=1,
+    timeout=10,
+    proxy=None,
+    hedger: Hedger | None = None,
+    raw=False,
+    cache: ResponseCache | None = None,
+) -> Result:
+    """node can be a list of nodes or a NodePool. Set hedger to send hedged requests to them, use it for read-only calls only.
+    Set raw to get the response body as bytes, the JSON RPC error isn't checked then. Set cache to reuse results, see
+    solana_rpc.rpc_call."""
+    if cache and not raw:
+        return await cache.acall(
+            method,
+            params,
+            lambda: rpc_call(
+                node=node,
+                method=method,
+                params=params,
+                transport=transport,
+                id_=id_,
+                timeout=timeout,
+                proxy=proxy,
+                hedger=hedger,
+            ),
+        )
+    if hedger and not isinstance(node, str):
+        return await hedger.acall(
+            node,
+            lambda n: rpc_call(
+                node=n,
+                method=method,
+                params=params,
+                transport=transport,
+                id_=id_,
+                timeout=timeout,
+                proxy=proxy,
+                raw=raw,
+            ),
+        )
+    node_ = pick_node(node)
+    data = {"jsonrpc": "2.0", "method": method, "params": params, "id": id_}
+    if not node_.startswith("http"):
+        return Result(error=solana_rpc.WS_CALL_ERROR, data={"node": node_})
+    started_at = time.monotonic()
+    res = await transport.post(node_, data, timeout, proxy, raw)
+    if res.is_ok() and not raw:
+        try:
+            res = solana_rpc.parse_rpc_response(res.ok, res.data)
+        except Exception as e:
+            res = Result(error=f"exception: {str(e)}", data=res.data)
+    report_node(node, node_, started_at, is_node_ok(res))
+    return res
+
+
+async def rpc_batch_call(
+    *,
+    node: str | NodePool,
+    calls: list[tuple[str, list[Any]]],
+    transport: AsyncTransport,
+    batch_size=100,
+    timeout=10,
+    proxy=None,
+) -> list[Result]:
+    """Sends (method, params) calls as JSON RPC batches, the batches are sent concurrently"""
+
+    async def send_batch(chunk: list[tuple[str, list[Any]]]) -> list[Result]:
+        node_ = pick_node(node)
+        if not node_.startswith("http"):
+            return [Result(error="batch calls are not supported over ws", data={"node": node_}) for _ in chunk]
+        data = [{"jsonrpc": "2.0", "method": method, "params": params, "id": id_} for id_, (method, params) in enumerate(chunk)]
+        started_at = time.monotonic()
+        res = await transport.post(node_, data, timeout, proxy)
+        if res.is_error():
+            results = [Result(error=res.error, data=res.data) for _ in data]
+        else:
+            results = solana_rpc.parse_rpc_batch_response(data, res.ok)
+        report_node(node, node_, started_at, any(is_node_ok(r) for r in results))
+        return results
+
+    chunks = []
+    for i in range(0, len(calls), batch_size):
+        end = i + batch_size
+        chunks.append(calls[i:end])
+    batches = await asyncio.gather(*[send_batch(chunk) for chunk in chunks])
+    return [res for batch in batches for res in batch]
+
+
+async def get_balance(
+    node: str | list[str] | NodePool,
+    address: str,
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+    hedger: Hedger | None = None,
+) -> Result[int]:
+    """Returns balance in lamports"""
+    res = await rpc_call(
+        node=node,
+        method="getBalance",
+        params=[address],
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+        hedger=hedger,
+    )
+    return solana_rpc.parse_balance(res)
+
+
+async def get_balance_batch(
+    node: str | NodePool,
+    addresses: list[str],
+    *,
+    transport: AsyncTransport,
+    batch_size=100,
+    timeout=10,
+    proxy=None,
+) -> dict[str, Result[int]]:
+    calls = [("getBalance", [address]) for address in addresses]
+    results = await rpc_batch_call(
+        node=node,
+        calls=calls,
+        transport=transport,
+        batch_size=batch_size,
+        timeout=timeout,
+        proxy=proxy,
+    )
+    return {address: solana_rpc.parse_balance(res) for address, res in zip(addresses, results)}
+
+
+async def get_multiple_accounts(
+    node: str | list[str] | NodePool,
+    addresses: list[str],
+    encoding="base64",
+    data_slice: tuple[int, int] | None = None,
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+) -> Result[list[dict | None]]:
+    params = solana_rpc.multiple_accounts_params(addresses, encoding, data_slice)
+    res = await rpc_call(
+        node=node,
+        method="getMultipleAccounts",
+        params=params,
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+    )
+    return solana_rpc.parse_multiple_accounts(res)
+
+
+async def get_program_accounts(
+    node: str | list[str] | NodePool,
+    program_id: str,
+    filters: list[dict] | None = None,
+    encoding="base64",
+    data_slice: tuple[int, int] | None = None,
+    *,
+    transport: AsyncTransport,
+    timeout=60,
+    proxy=None,
+) -> Result[list[dict]]:
+    params = solana_rpc.program_accounts_params(program_id, filters, encoding, data_slice)
+    return await rpc_call(
+        node=node,
+        method="getProgramAccounts",
+        params=params,
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+    )
+
+
+async def get_token_accounts_by_owner(
+    node: str | list[str] | NodePool,
+    owner_address: str,
+    mint: str | None = None,
+    program_id: str = solana_rpc.TOKEN_PROGRAM_ID,
+    encoding="jsonParsed",
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+) -> Result[list[dict]]:
+    params = [owner_address, {"mint": mint} if mint else {"programId": program_id}, {"encoding": encoding}]
+    res = await rpc_call(
+        node=node,
+        method="getTokenAccountsByOwner",
+        params=params,
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+    )
+    return solana_rpc.parse_token_accounts_by_owner(res)
+
+
+async def get_slot(
+    node: str | list[str] | NodePool,
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+    hedger: Hedger | None = None,
+) -> Result[int]:
+    res = await rpc_call(node=node, method="getSlot", params=[], transport=transport, timeout=timeout, proxy=proxy, hedger=hedger)
+    return solana_rpc.parse_slot(res)
+
+
+async def get_epoch_info(
+    node: str | list[str] | NodePool,
+    epoch: int | None = None,
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+    hedger: Hedger | None = None,
+    cache: ResponseCache | None = None,
+) -> Result[EpochInfo]:
+    params = [epoch] if epoch else []
+    res = await rpc_call(
+        node=node,
+        method="getEpochInfo",
+        params=params,
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+        hedger=hedger,
+        cache=cache,
+    )
+    return solana_rpc.parse_epoch_info(res)
+
+
+async def get_cluster_nodes(
+    node: str | NodePool,
+    *,
+    transport: AsyncTransport,
+    timeout=30,
+    proxy=None,
+    compact=False,
+    cache: ResponseCache | None = None,
+) -> Result[list[ClusterNode]] | Result[list[CompactClusterNode]]:
+    res = await rpc_call(
+        node=node,
+        method="getClusterNodes",
+        params=[],
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+        cache=cache,
+    )
+    return solana_rpc.parse_cluster_nodes(res, compact)
+
+
+async def get_vote_accounts(
+    node: str | NodePool,
+    *,
+    transport: AsyncTransport,
+    timeout=30,
+    proxy=None,
+    compact=False,
+    cache: ResponseCache | None = None,
+) -> Result[list[VoteAccount]] | Result[list[CompactVoteAccount]]:
+    res = await rpc_call(
+        node=node,
+        method="getVoteAccounts",
+        params=[],
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+        cache=cache,
+    )
+    return solana_rpc.parse_vote_accounts(res, compact)
+
+
+async def get_leader_scheduler(
+    node: str | NodePool,
+    slot: int | None = None,
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+    cache: ResponseCache | None = None,
+) -> Result[dict[str, list[int]]]:
+    return await rpc_call(
+        node=node,
+        method="getLeaderSchedule",
+        params=[slot],
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+        cache=cache,
+    )
+
+
+async def get_block_production(
+    node: str | NodePool,
+    *,
+    transport: AsyncTransport,
+    timeout=60,
+    proxy=None,
+    compact=False,
+    first_slot: int | None = None,
+    last_slot: int | None = None,
+    identity: str | None = None,
+) -> Result[BlockProduction] | Result[CompactBlockProduction]:
+    params = solana_rpc.block_production_params(first_slot, last_slot, identity)
+    res = await rpc_call(node=node, method="getBlockProduction", params=params, transport=transport, timeout=timeout, proxy=proxy)
+    return solana_rpc.parse_block_production(res, compact)
+
+
+async def get_transaction(
+    node: str | list[str] | NodePool,
+    signature: str,
+    encoding="json",
+    *,
+    transport: AsyncTransport,
+    timeout=60,
+    proxy=None,
+    hedger: Hedger | None = None,
+    cache: ResponseCache | None = None,
+) -> Result[dict | None]:
+    params = [signature, encoding]
+    return await rpc_call(
+        node=node,
+        method="getTransaction",
+        params=params,
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+        hedger=hedger,
+        cache=cache,
+    )
+
+
+async def get_signatures_for_address(
+    node: str | list[str] | NodePool,
+    address: str,
+    before: str | None = None,
+    until: str | None = None,
+    limit=1000,
+    commitment="finalized",
+    *,
+    transport: AsyncTransport,
+    timeout=30,
+    proxy=None,
+) -> Result[list[SignatureInfo]]:
+    params = [address, solana_rpc.signatures_for_address_config(before, until, limit, commitment)]
+    res = await rpc_call(
+        node=node,
+        method="getSignaturesForAddress",
+        params=params,
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+    )
+    return solana_rpc.parse_signatures_for_address(res)
+
+
+async def get_transaction_batch(
+    node: str | NodePool,
+    signatures: list[str],
+    encoding="json",
+    *,
+    transport: AsyncTransport,
+    batch_size=100,
+    timeout=60,
+    proxy=None,
+) -> dict[str, Result[dict | None]]:
+    calls = [("getTransaction", [signature, encoding]) for signature in signatures]
+    results = await rpc_batch_call(
+        node=node,
+        calls=calls,
+        transport=transport,
+        batch_size=batch_size,
+        timeout=timeout,
+        proxy=proxy,
+    )
+    return dict(zip(signatures, results))
+
+
+async def get_latest_blockhash(
+    node: str | list[str] | NodePool,
+    commitment="finalized",
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+    hedger: Hedger | None = None,
+) -> Result[solana_rpc.LatestBlockhash]:
+    res = await rpc_call(
+        node=node,
+        method="getLatestBlockhash",
+        params=[{"commitment": commitment}],
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+        hedger=hedger,
+    )
+    return solana_rpc.parse_latest_blockhash(res)
+
+
+async def get_blocks(
+    node: str | list[str] | NodePool,
+    start_slot: int,
+    end_slot: int,
+    commitment="finalized",
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+) -> Result[list[int]]:
+    params = [start_slot, end_slot, {"commitment": commitment}]
+    return await rpc_call(node=node, method="getBlocks", params=params, transport=transport, timeout=timeout, proxy=proxy)
+
+
+async def get_block_height(
+    node: str | list[str] | NodePool,
+    commitment="confirmed",
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+    hedger: Hedger | None = None,
+) -> Result[int]:
+    return await rpc_call(
+        node=node,
+        method="getBlockHeight",
+        params=[{"commitment": commitment}],
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+        hedger=hedger,
+    )
+
+
+async def send_transaction(
+    node: str | list[str] | NodePool,
+    raw_tx: bytes,
+    skip_preflight=False,
+    preflight_commitment="finalized",
+    max_retries: int | None = None,
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+) -> Result[str]:
+    """Sends a signed and serialized transaction, returns its signature. There is no hedger: it's not a read-only call."""
+    params = solana_rpc.send_transaction_params(raw_tx, skip_preflight, preflight_commitment, max_retries)
+    return await rpc_call(node=node, method="sendTransaction", params=params, transport=transport, timeout=timeout, proxy=proxy)
+
+
+async def get_signature_statuses(
+    node: str | list[str] | NodePool,
+    signatures: list[str],
+    search_transaction_history=False,
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+) -> Result[list[dict | None]]:
+    params = [signatures, {"searchTransactionHistory": search_transaction_history}]
+    res = await rpc_call(
+        node=node,
+        method="getSignatureStatuses",
+        params=params,
+        transport=transport,
+        timeout=timeout,
+        proxy=proxy,
+    )
+    return solana_rpc.parse_signature_statuses(res)
+
+
+async def calc_block_tx_count(
+    node: str | NodePool,
+    slot: int,
+    *,
+    transport: AsyncTransport,
+    timeout=10,
+    proxy=None,
+    light=False,
+    compact=False,
+) -> Result[BlockTxCount] | Result[CompactBlockTxCount]:
+    params = get_block_params(slot, light)
+    res = await rpc_call(node=node, method="getBlock", params=params, transport=transport, timeout=timeout, proxy=proxy)
+    return parse_block_tx_count(slot, res, compact)
+
+
+async def find_transfers(
+    node: str | NodePool,
+    tx_signature: str,
+    *,
+    transport: AsyncTransport,
+    cache: ResponseCache | None = None,
+) -> Result[list[TransferInfo]]:
+    res = await get_transaction(node, tx_signature, encoding="jsonParsed", transport=transport, cache=cache)
+    return parse_transfers(res)
+
+
+async def find_transfers_many(
+    node: str | NodePool,
+    signatures: list[str],
+    *,
+    transport: AsyncTransport,
+    batch_size=100,
+    timeout=60,
+    cache: ResponseCache | None = None,
+    inner=False,
+) -> AsyncIterator[tuple[str, Result[list[TransferInfo]]]]:
+    """See helpers.find_transfers_many. All batches are sent at once, the transport limits the number of them in flight."""
+    missing = []
+    for signature in signatures:
+        cached = cache.get("getTransaction", [signature, "jsonParsed"]) if cache else None
+        if cached is None:
+            missing.append(signature)
+        else:
+            yield signature, parse_transfers(cached, inner)
+
+    batches = []
+    for i in range(0, len(missing), batch_size):
+        end = i + batch_size
+        batches.append(missing[i:end])
+    tasks = [
+        asyncio.ensure_future(
+            get_transaction_batch(node, batch, encoding="jsonParsed", transport=transport, batch_size=batch_size, timeout=timeout)
+        )
+        for batch in batches
+    ]
+    try:
+        for task in tasks:
+            for signature, res in (await task).items():
+                if cache:
+                    cache.put("getTransaction", [signature, "jsonParsed"], res)
+                yield signature, parse_transfers(res, inner)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # the cancelled tasks are awaited, so they don't outlive the generator with "Task was destroyed but it is pending"
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def is_empty_account(
+    *,
+    address: str,
+    transport: AsyncTransport,
+    node: str | None = None,
+    nodes: list[str] | NodePool | None = None,
+    attempts=3,
+    hedger: Hedger | None = None,
+) -> Result[bool]:
+    """Set hedger to send hedged requests to nodes on each attempt"""
+    if not node and not nodes:
+        raise ValueError("node or nodes must be set")
+    params = [address, {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}]
+    res = Result(error="unknown response")
+    for _ in range(attempts):
+        rpc_res = await rpc_call(
+            node=node or nodes,  # type:ignore
+            method="getAccountInfo",
+            params=params,
+            transport=transport,
+            hedger=None if node else hedger,
+        )
+        res = solana_account.parse_empty_account(rpc_res)
+        if res.is_ok():
+            return res
+    return res
+
+
+async def are_empty_accounts(
+    addresses: list[str],
+    *,
+    nodes: str | list[str] | NodePool,
+    transport: AsyncTransport,
+    chunk_size=100,
+    attempts=3,
+    timeout=10,
+) -> dict[str, Result[bool]]:
+    """Checks many accounts with getMultipleAccounts calls, the chunks are sent concurrently"""
+
+    async def check_chunk(chunk: list[str]) -> dict[str, Result[bool]]:
+        res: Result = Result(error="unknown response")
+        for _ in range(attempts):
+            res = await get_multiple_accounts(nodes, chunk, data_slice=(0, 0), transport=transport, timeout=timeout)
+            if res.is_ok() and len(res.ok) == len(chunk):
+                return {address: Result(ok=value is None) for address, value in zip(chunk, res.ok)}
+        error = res.error if res.is_error() else "unknown response"
+        return {address: Result(error=error, data=res.data) for address in chunk}
+
+    chunks = []
+    for i in range(0, len(addresses), chunk_size):
+        end = i + chunk_size
+        chunks.append(addresses[i:end])
+    result: dict[str, Result[bool]] = {}
+    for chunk_result in await asyncio.gather(*[check_chunk(chunk) for chunk in chunks]):
+        result.update(chunk_result)
+    return result
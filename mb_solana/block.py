@@ -1,7 +1,19 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator
+
 from mb_std import Result
 from pydantic import BaseModel
 
+from mb_solana import solana_rpc
+from mb_solana.node_pool import NodePool
+from mb_solana.response_cache import ResponseCache
 from mb_solana.solana_rpc import rpc_call
+from mb_solana.transport import HttpTransport
+
+VOTE_PROGRAM_ID = "Vote111111111111111111111111111111111111111"
 
 
 class BlockTxCount(BaseModel):
@@ -13,26 +25,65 @@ class BlockTxCount(BaseModel):
     non_vote_tx_error: int
 
 
-def calc_block_tx_count(node: str, slot: int, timeout=10, proxy=None) -> Result[BlockTxCount]:
-    res = rpc_call(node=node, method="getBlock", params=[slot], timeout=timeout, proxy=proxy)
+@dataclass(slots=True)
+class CompactBlockTxCount:
+    """BlockTxCount without validation, see solana_rpc.CompactVoteAccount"""
+
+    slot: int
+    block_time: int | None
+    vote_tx_ok: int
+    vote_tx_error: int
+    non_vote_tx_ok: int
+    non_vote_tx_error: int
+
+    def to_model(self) -> BlockTxCount:
+        return BlockTxCount(
+            slot=self.slot,
+            block_time=self.block_time,
+            vote_tx_ok=self.vote_tx_ok,
+            vote_tx_error=self.vote_tx_error,
+            non_vote_tx_ok=self.non_vote_tx_ok,
+            non_vote_tx_error=self.non_vote_tx_error,
+        )
+
+
+def calc_block_tx_count(
+    node: str | list[str] | NodePool,
+    slot: int,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    light=False,
+    compact=False,
+    cache: ResponseCache | None = None,
+) -> Result[BlockTxCount] | Result[CompactBlockTxCount]:
+    """Set light to download only the account keys and the status of each transaction instead of full transactions"""
+    params = get_block_params(slot, light)
+    res = rpc_call(node=node, method="getBlock", params=params, timeout=timeout, proxy=proxy, transport=transport, cache=cache)
+    return parse_block_tx_count(slot, res, compact)
+
+
+def get_block_params(slot: int, light=False) -> list:
+    config: dict = {"encoding": "json", "maxSupportedTransactionVersion": 0}
+    if light:
+        config |= {"transactionDetails": "accounts", "rewards": False}
+    return [slot, config]
+
+
+def parse_block_tx_count(slot: int, res: Result, compact=False) -> Result[BlockTxCount] | Result[CompactBlockTxCount]:
+    """Parses a getBlock response with transactionDetails full or accounts"""
     if res.is_error():
         return res
     vote_tx_ok = 0
     vote_tx_error = 0
     non_vote_tx_ok = 0
     non_vote_tx_error = 0
-    vote_tx_keys = [
-        "SysvarS1otHashes111111111111111111111111111",
-        "SysvarC1ock11111111111111111111111111111111",
-        "Vote111111111111111111111111111111111111111",
-    ]
     try:
         txs = res.ok["transactions"]
         block_time = res.ok["blockTime"]
         for tx in txs:
             is_error = tx["meta"]["err"] is not None
-            account_keys = tx["transaction"]["message"]["accountKeys"]
-            if len(account_keys) == 5 and vote_tx_keys == account_keys[2:]:
+            if is_vote_tx(tx):
                 if is_error:
                     vote_tx_error += 1
                 else:
@@ -44,7 +95,7 @@ def calc_block_tx_count(node: str, slot: int, timeout=10, proxy=None) -> Result[
                     non_vote_tx_ok += 1
 
         return res.new_ok(
-            BlockTxCount(
+            (CompactBlockTxCount if compact else BlockTxCount)(
                 slot=slot,
                 vote_tx_ok=vote_tx_ok,
                 vote_tx_error=vote_tx_error,
@@ -55,3 +106,127 @@ def calc_block_tx_count(node: str, slot: int, timeout=10, proxy=None) -> Result[
         )
     except Exception as e:
         return Result(error=f"exception: {str(e)}", data=res.dict())
+
+
+def is_vote_tx(tx: dict) -> bool:
+    """A transaction is a vote if the Vote program is in its account keys. A program can't be loaded from an address lookup
+    table, so for a versioned transaction it's enough to check the static keys."""
+    transaction = tx["transaction"]
+    if "message" in transaction:  # transactionDetails: full
+        return VOTE_PROGRAM_ID in transaction["message"]["accountKeys"]
+    # transactionDetails: accounts
+    return any(key["pubkey"] == VOTE_PROGRAM_ID for key in transaction["accountKeys"])
+
+
+def scan_blocks(
+    node: str | list[str] | NodePool,
+    start_slot: int,
+    end_slot: int,
+    *,
+    window=32,
+    attempts=3,
+    light=True,
+    compact=False,
+    slots_per_request=10_000,
+    progress_path: str | None = None,
+    progress_every=100,
+    timeout=10,
+    transport: HttpTransport | None = None,
+) -> Iterator[tuple[int, Result[BlockTxCount] | Result[CompactBlockTxCount]]]:
+    """Yields (slot, block tx count) for each slot between start_slot and end_slot inclusive which has a block, in slot order.
+
+    Skipped slots are listed with getBlocks and not requested. Up to `window` blocks are fetched at the same time,
+    in the light mode of calc_block_tx_count by default.
+    If progress_path is set, the last yielded slot is saved to it every `progress_every` blocks and at the end, and the scan
+    starts after the saved slot. After an interruption up to `progress_every` blocks can be yielded again.
+    A block which can't be fetched is yielded with an error result, and the progress isn't saved past it anymore, so a resumed
+    scan starts from it. If getBlocks fails, an error result is yielded for the first slot of its range and the scan stops.
+    """
+    last_slot = _read_progress(progress_path)
+    if last_slot is not None:
+        start_slot = max(start_slot, last_slot + 1)
+
+    def fetch(slot: int) -> Result[BlockTxCount] | Result[CompactBlockTxCount]:
+        res: Result = Result(error="not_fetched")
+        for _ in range(attempts):
+            res = calc_block_tx_count(node, slot, timeout=timeout, transport=transport, light=light, compact=compact)
+            if res.is_ok():
+                break
+        return res
+
+    pending: deque[tuple[int, Future]] = deque()
+    yielded = 0
+    last_ok_slot = start_slot - 1
+    failed = False
+
+    def done(slot: int, future: Future) -> Result:
+        nonlocal yielded, last_ok_slot, failed
+        res = future.result()
+        yielded += 1
+        if failed:
+            return res
+        if res.is_error():
+            failed = True
+            if progress_path:
+                _write_progress(progress_path, last_ok_slot)
+            return res
+        last_ok_slot = slot
+        if progress_path and yielded % progress_every == 0:
+            _write_progress(progress_path, slot)
+        return res
+
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        for slot, blocks_error in _iter_block_slots(node, start_slot, end_slot, slots_per_request, attempts, timeout, transport):
+            if len(pending) >= window:
+                done_slot, future = pending.popleft()
+                yield done_slot, done(done_slot, future)
+            if blocks_error is not None:  # the last item, the scan stops after the blocks in flight
+                future = Future()
+                future.set_result(blocks_error)
+                pending.append((slot, future))
+            else:
+                pending.append((slot, executor.submit(fetch, slot)))
+        while pending:
+            done_slot, future = pending.popleft()
+            yield done_slot, done(done_slot, future)
+    if progress_path and not failed:
+        _write_progress(progress_path, end_slot)
+
+
+def _iter_block_slots(
+    node: str | list[str] | NodePool,
+    start_slot: int,
+    end_slot: int,
+    slots_per_request: int,
+    attempts: int,
+    timeout: int,
+    transport: HttpTransport | None,
+) -> Iterator[tuple[int, Result | None]]:
+    """Yields (slot, None) for each slot with a block, and at last (first slot of the range, error) if getBlocks fails"""
+    for range_start in range(start_slot, end_slot + 1, slots_per_request):
+        range_end = min(range_start + slots_per_request - 1, end_slot)
+        res: Result = Result(error="not_fetched")
+        for _ in range(attempts):
+            res = solana_rpc.get_blocks(node, range_start, range_end, timeout=timeout, transport=transport)
+            if res.is_ok():
+                break
+        if res.is_error():
+            yield range_start, res
+            return
+        for slot in res.ok:
+            yield slot, None
+
+
+def _read_progress(path: str | None) -> int | None:
+    if path and os.path.exists(path):
+        with open(path) as f:
+            value = f.read().strip()
+            return int(value) if value else None
+    return None
+
+
+def _write_progress(path: str, slot: int):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(slot))
+    os.replace(tmp_path, path)
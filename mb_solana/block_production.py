@@ -0,0 +1,117 @@
+"""Block production of leaders over an epoch, tracked incrementally.
+
+A getBlockProduction call without a range counts every slot of the epoch. BlockProductionTracker asks only for the slots after
+the last polled one and adds them to its counters, so the cost of a poll depends on the number of new slots.
+"""
+import threading
+from array import array
+
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.node_pool import NodePool
+from mb_solana.solana_rpc import BlockProduction, CompactBlockProduction, EpochInfo
+from mb_solana.transport import HttpTransport
+
+
+class BlockProductionTracker:
+    """Running produced/skipped counters of each leader since first_slot, by default since the first slot of the current epoch.
+
+    A poll range never crosses an epoch boundary. If reset_each_epoch is set, the counters start from zero with the first poll
+    of the next epoch, and the totals of the finished epoch are kept in previous_epoch.
+    """
+
+    def __init__(
+        self,
+        nodes: str | list[str] | NodePool,
+        *,
+        first_slot: int | None = None,
+        identity: str | None = None,
+        reset_each_epoch=True,
+        timeout=60,
+        transport: HttpTransport | None = None,
+    ):
+        self.nodes = nodes
+        self.identity = identity
+        self.reset_each_epoch = reset_each_epoch
+        self.timeout = timeout
+        self.transport = transport
+        self.first_slot = first_slot
+        self.next_slot = first_slot
+        self.produced: dict[str, int] = {}
+        self.skipped: dict[str, int] = {}
+        self.previous_epoch: BlockProduction | None = None
+        self._lock = threading.Lock()
+
+    def poll(self) -> Result[CompactBlockProduction]:
+        """Adds the new slots to the counters, returns the block production of these slots only"""
+        with self._lock:
+            res = solana_rpc.get_epoch_info(self.nodes, timeout=self.timeout, transport=self.transport)
+            if res.is_error():
+                return res
+            epoch_info: EpochInfo = res.ok
+            epoch_first_slot = epoch_info.absolute_slot - epoch_info.slot_index
+
+            if self.next_slot is None:
+                self.first_slot = self.next_slot = epoch_first_slot
+            if self.next_slot < epoch_first_slot:
+                last_slot = epoch_first_slot - 1  # the rest of the previous epoch goes first
+            else:
+                last_slot = epoch_info.absolute_slot
+            if self.next_slot > last_slot:
+                return Result(ok=_empty(epoch_info.absolute_slot, self.next_slot))
+
+            res = solana_rpc.get_block_production(
+                self.nodes,
+                timeout=self.timeout,
+                transport=self.transport,
+                compact=True,
+                first_slot=self.next_slot,
+                last_slot=last_slot,
+                identity=self.identity,
+            )
+            if res.is_error():
+                return res
+
+            delta: CompactBlockProduction = res.ok
+            if self.reset_each_epoch and self.next_slot == epoch_first_slot and self.first_slot != epoch_first_slot:
+                self.previous_epoch = self._snapshot()
+                self.produced.clear()
+                self.skipped.clear()
+                self.first_slot = epoch_first_slot
+            for address, produced, skipped in zip(delta.addresses, delta.produced, delta.skipped):
+                self.produced[address] = self.produced.get(address, 0) + produced
+                self.skipped[address] = self.skipped.get(address, 0) + skipped
+            self.next_slot = delta.last_slot + 1
+            return res
+
+    def snapshot(self) -> BlockProduction:
+        """The counters as a BlockProduction over first_slot..the last polled slot"""
+        with self._lock:
+            return self._snapshot()
+
+    def skip_rate(self, identity: str) -> float | None:
+        """None if the identity had no leader slots in the tracked range"""
+        with self._lock:
+            leader_slots = self.produced.get(identity, 0) + self.skipped.get(identity, 0)
+            return self.skipped[identity] / leader_slots if leader_slots else None
+
+    def reset(self, first_slot: int | None = None):
+        """Clears the counters, the next poll starts at first_slot, by default at the first slot of the current epoch"""
+        with self._lock:
+            self.produced.clear()
+            self.skipped.clear()
+            self.first_slot = self.next_slot = first_slot
+            self.previous_epoch = None
+
+    def _snapshot(self) -> BlockProduction:
+        leaders = [BlockProduction.Leader(address=a, produced=p, skipped=self.skipped[a]) for a, p in self.produced.items()]
+        first_slot = self.first_slot or 0
+        last_slot = (self.next_slot or first_slot) - 1
+        return BlockProduction(slot=last_slot, first_slot=first_slot, last_slot=last_slot, leaders=leaders)
+
+
+def _empty(slot: int, next_slot: int) -> CompactBlockProduction:
+    return CompactBlockProduction(
+        slot=slot, first_slot=next_slot, last_slot=next_slot - 1, addresses=[], produced=array("Q"), skipped=array("Q")
+    )
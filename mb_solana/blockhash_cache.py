@@ -0,0 +1,156 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.node_pool import NodePool
+from mb_solana.solana_rpc import LatestBlockhash
+from mb_solana.transport import HttpTransport
+
+
+@dataclass
+class BlockhashStats:
+    hits: int = 0  # get() served from the cache
+    misses: int = 0  # get() had to fetch a blockhash
+    refreshes: int = 0  # background refreshes
+    refresh_errors: int = 0
+    stale_retries: int = 0  # a transaction was rejected because of its blockhash, see report_stale()
+
+
+class BlockhashProvider:
+    """Caches the latest blockhash for `ttl` seconds and refreshes it in a background thread every `refresh_interval` seconds,
+    so building a transaction doesn't need an extra RPC round trip.
+
+    Nodes without getLatestBlockhash are supported via getRecentBlockhash, its last valid block height is estimated.
+    """
+
+    def __init__(
+        self,
+        nodes: str | list[str] | NodePool,
+        *,
+        ttl=20.0,
+        refresh_interval=10.0,
+        commitment="finalized",
+        background=True,
+        transport: HttpTransport | None = None,
+    ):
+        self.nodes = nodes
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.commitment = commitment
+        self.background = background
+        self.transport = transport
+        self.stats = BlockhashStats()
+        self._blockhash: LatestBlockhash | None = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def get(self) -> Result[LatestBlockhash]:
+        if self.background:
+            self._start()
+        with self._lock:
+            if self._blockhash and time.monotonic() - self._fetched_at < self.ttl:
+                self.stats.hits += 1
+                return Result(ok=self._blockhash)
+            self.stats.misses += 1
+        return self._fetch()
+
+    def report_stale(self):
+        """Call it when a transaction was rejected with "Blockhash not found", the next get() fetches a new blockhash"""
+        with self._lock:
+            self.stats.stale_retries += 1
+            self._blockhash = None
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stops the background thread"""
+        self.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            res = self._fetch()
+            with self._lock:
+                if res.is_ok():
+                    self.stats.refreshes += 1
+                else:
+                    self.stats.refresh_errors += 1
+
+    def _fetch(self) -> Result[LatestBlockhash]:
+        with self._fetch_lock:
+            with self._lock:  # another thread could fetch it while this one was waiting for _fetch_lock
+                if self._blockhash and time.monotonic() - self._fetched_at < min(self.ttl, self.refresh_interval / 2):
+                    return Result(ok=self._blockhash)
+            res = solana_rpc.get_latest_blockhash(self.nodes, commitment=self.commitment, transport=self.transport)
+            if res.is_error() and "Method not found" in res.error:
+                res = self._fetch_recent_blockhash()
+            if res.is_ok():
+                with self._lock:
+                    self._blockhash = res.ok
+                    self._fetched_at = time.monotonic()
+            return res
+
+    def _fetch_recent_blockhash(self) -> Result[LatestBlockhash]:
+        params = [{"commitment": self.commitment}]
+        res = solana_rpc.rpc_call(node=self.nodes, method="getRecentBlockhash", params=params, transport=self.transport)
+        if res.is_error():
+            return res
+        height_res = solana_rpc.get_block_height(self.nodes, commitment=self.commitment, transport=self.transport)
+        if height_res.is_error():
+            return height_res
+        try:
+            # a blockhash is valid for 150 blocks
+            value = {"blockhash": res.ok["value"]["blockhash"], "lastValidBlockHeight": height_res.ok + 150}
+            return Result(ok=LatestBlockhash(**value), data=res.data)
+        except Exception as e:
+            return Result(error=f"exception: {str(e)}", data=res.dict())
+
+
+_providers: dict[tuple, BlockhashProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def shared_blockhash_provider(nodes: str | list[str] | NodePool, transport: HttpTransport | None = None) -> BlockhashProvider:
+    """Process-wide provider for the nodes and the transport, all transaction-building functions can share it"""
+    nodes_key = (id(nodes),) if isinstance(nodes, NodePool) else (nodes,) if isinstance(nodes, str) else tuple(nodes)
+    key = (*nodes_key, id(transport) if transport else None)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = BlockhashProvider(nodes, transport=transport)
+            _providers[key] = provider
+        return provider
+
+
+def close_shared_blockhash_providers():
+    """Stops the background threads of the shared providers"""
+    with _providers_lock:
+        providers = list(_providers.values())
+        _providers.clear()
+    for provider in providers:
+        provider.close()
+
+
+def is_stale_blockhash_error(error: str | None) -> bool:
+    return bool(error) and "Blockhash not found" in error  # type:ignore
@@ -1,14 +1,13 @@
-import random
+from concurrent.futures import ThreadPoolExecutor
 
 import click
-import pydash
 from mb_std import str_to_list
 from pydantic import StrictStr, validator
-from solana.publickey import PublicKey
-from solana.rpc.api import Client
-from solana.rpc.types import TokenAccountOpts
 
+from mb_solana import solana_rpc
 from mb_solana.cli.helpers import BaseCmdConfig, parse_config, print_config_and_exit, print_json
+from mb_solana.node_pool import NodePool
+from mb_solana.transport import HttpTransport
 
 
 class Config(BaseCmdConfig):
@@ -24,53 +23,94 @@ class Config(BaseCmdConfig):
             return str_to_list(v, unique=True, remove_comments=True)
         return v
 
-    @property
-    def random_node(self) -> str:
-        return random.choice(self.nodes)
 
-
-@click.command(name="balance", help="Print SOL and tokens balances")
+class _Engine:
+    """Runs balance requests with bounded parallelism across the nodes"""
+
+    def __init__(self, nodes: list[str], concurrency: int, timeout: int, attempts=3):
+        self.nodes = NodePool(nodes)
+        self.timeout = timeout
+        self.attempts = attempts
+        self.transport = HttpTransport(max_connections=concurrency, max_keepalive_connections=concurrency, timeout=timeout)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def sol_balances(self, accounts: list[str]) -> dict[str, float | None]:
+        """SOL balances are fetched with getMultipleAccounts, 100 accounts per request.
+        A zero balance and a missing account are 0, None is only for a failed request."""
+        chunks = []
+        for i in range(0, len(accounts), 100):
+            end = i + 100
+            chunks.append(accounts[i:end])
+        result: dict[str, float | None] = {}
+        for chunk_result in self.executor.map(self._sol_balances_chunk, chunks):
+            result.update(chunk_result)
+        return result
+
+    def token_balances(self, token: str, accounts: list[str]) -> dict[str, float | None]:
+        """One jsonParsed getTokenAccountsByOwner request per account, the balance is the sum of all its token accounts of the
+        mint. None if the account has no token account of the mint or the request failed."""
+        balances = self.executor.map(lambda account: self._token_balance(token, account), accounts)
+        return dict(zip(accounts, balances))
+
+    def close(self):
+        self.executor.shutdown()
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _sol_balances_chunk(self, chunk: list[str]) -> dict[str, float | None]:
+        for _ in range(self.attempts):
+            res = solana_rpc.get_multiple_accounts(
+                self.nodes,
+                chunk,
+                data_slice=(0, 0),
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+            if res.is_ok() and len(res.ok) == len(chunk):
+                return {account: (value["lamports"] if value else 0) / 10**9 for account, value in zip(chunk, res.ok)}
+        return {account: None for account in chunk}
+
+    def _token_balance(self, token: str, account: str) -> float | None:
+        for _ in range(self.attempts):
+            res = solana_rpc.get_token_accounts_by_owner(
+                self.nodes,
+                account,
+                mint=token,
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+            if res.is_ok():
+                if not res.ok:
+                    return None
+                try:
+                    return sum(a["account"]["data"]["parsed"]["info"]["tokenAmount"]["uiAmount"] or 0 for a in res.ok)
+                except (KeyError, TypeError):
+                    return None
+        return None
+
+
+@click.command(
+    name="balance",
+    help="Print SOL and tokens balances. A token balance is the sum of all token accounts of the mint, a SOL balance is 0 "
+    "for an empty or missing account, null means a failed request.",
+)
 @click.argument("config_path", type=click.Path(exists=True))
+@click.option("--concurrency", type=int, default=10, help="Max number of requests in flight.")
+@click.option("--timeout", type=int, default=10, help="Timeout of each request, in seconds.")
 @click.pass_context
-def cli(ctx, config_path):
+def cli(ctx, config_path, concurrency: int, timeout: int):
     config = parse_config(ctx, config_path, Config)
     print_config_and_exit(ctx, config)
-    result = {"sol": _get_sol_balances(config.accounts, config.nodes)}
+    with _Engine(config.nodes, concurrency, timeout) as engine:
+        result = {"sol": engine.sol_balances(config.accounts)}
 
-    if config.tokens:
-        for token in config.tokens:
-            result[token] = _get_token_balances(token, config.accounts, config.nodes)
+        if config.tokens:
+            for token in config.tokens:
+                result[token] = engine.token_balances(token, config.accounts)
 
     print_json(result)
-
-
-def _get_token_balances(token: str, accounts: list[str], nodes: list[str]) -> dict[str, float | None]:
-    result = {}
-    for account in accounts:
-        result[account] = _get_token_balance(token, account, nodes)
-    return result
-
-
-def _get_token_balance(token: str, account: str, nodes: list[str]) -> float | None:
-    for _ in range(3):
-        client = Client(random.choice(nodes))
-        res = client.get_token_accounts_by_owner(PublicKey(account), TokenAccountOpts(mint=PublicKey(token)))
-        token_account = pydash.get(res, "result.value.0.pubkey")
-        if token_account:
-            res = client.get_token_account_balance(token_account)
-            return pydash.get(res, "result.value.uiAmount")
-
-
-def _get_sol_balances(accounts: list[str], nodes: list[str]) -> dict[str, float | None]:
-    result = {}
-    for account in accounts:
-        result[account] = _get_balance(account, nodes)
-    return result
-
-
-def _get_balance(account: str, nodes: list[str]) -> float | None:
-    for _ in range(3):
-        client = Client(random.choice(nodes))
-        value = pydash.get(client.get_balance(account), "result.value")
-        if value:
-            return value / 10**9
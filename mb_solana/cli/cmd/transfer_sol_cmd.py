@@ -1,12 +1,13 @@
-import random
 from decimal import Decimal
 
 import click
 from mb_std import str_to_list
 from pydantic import StrictStr, validator
 
-from mb_solana import helpers
+from mb_solana import helpers, payout, solana_account
 from mb_solana.cli.helpers import BaseCmdConfig, parse_config, print_config_and_exit, print_json
+from mb_solana.node_pool import NodePool
+from mb_solana.transport import HttpTransport
 
 
 class Config(BaseCmdConfig):
@@ -24,17 +25,37 @@ class Config(BaseCmdConfig):
             return str_to_list(v, unique=True, remove_comments=True)
         return v
 
-    @property
-    def random_node(self) -> str:
-        return random.choice(self.nodes)
-
 
 @click.command(name="transfer-sol", help="Transfer SOL")
 @click.argument("config_path", type=click.Path(exists=True))
+@click.option("--pack", is_flag=True, help="Pack many transfers into each transaction. Not with --checkpoint.")
+@click.option("--checkpoint", "checkpoint_path", help="Pipelined mode: payout state file, an interrupted payout resumes from it.")
+@click.option("--window", type=int, help="Pipelined mode only: transactions per blockhash.  [default: 100]")
+@click.option("--concurrency", type=int, help="Pipelined mode only: transactions sent in parallel.  [default: 16]")
 @click.pass_context
-def cli(ctx, config_path):
+def cli(ctx, config_path, pack: bool, checkpoint_path: str | None, window: int | None, concurrency: int | None):
+    if checkpoint_path and pack:
+        click.secho("--pack can't be used with --checkpoint", err=True, fg="red")
+        exit(1)
+    if not checkpoint_path and (window is not None or concurrency is not None):
+        click.secho("--window and --concurrency need --checkpoint", err=True, fg="red")
+        exit(1)
     config = parse_config(ctx, config_path, Config)
     print_config_and_exit(ctx, config)
+    nodes = NodePool(config.nodes)
+    if checkpoint_path:
+        _pipelined_transfer(config, nodes, checkpoint_path, window or 100, concurrency or 16)
+        return
+    if pack:
+        packed_res = helpers.transfer_sol_many(
+            from_address=config.from_address,
+            private_key_base58=config.private_key,
+            recipients={recipient: config.amount for recipient in config.recipients},
+            nodes=nodes,
+        )
+        print_json({recipient: res.ok_or_error for recipient, res in packed_res.items()})
+        return
+
     result = {}
     for recipient in config.recipients:
         res = helpers.transfer_sol(
@@ -42,7 +63,31 @@ def cli(ctx, config_path):
             private_key_base58=config.private_key,
             recipient_address=recipient,
             amount_sol=config.amount,
-            nodes=config.nodes,
+            nodes=nodes,
         )
         result[recipient] = res.ok_or_error
     print_json(result)
+
+
+def _pipelined_transfer(config: Config, nodes: NodePool, checkpoint_path: str, window: int, concurrency: int):
+    if solana_account.get_public_key(config.private_key) != config.from_address:
+        click.secho("from_address or private_key is invalid", err=True, fg="red")
+        exit(1)
+    lamports = int(config.amount * 10**9)
+    with HttpTransport(max_connections=concurrency) as transport:
+        report = payout.pipelined_transfer_sol(
+            private_key=config.private_key,
+            recipients={recipient: lamports for recipient in config.recipients},
+            nodes=nodes,
+            checkpoint_path=checkpoint_path,
+            window=window,
+            concurrency=concurrency,
+            transport=transport,
+        )
+    result: dict = {r: report.signatures.get(r) or report.errors.get(r) for r in config.recipients}
+    result["stats"] = {
+        "sent": report.sent,
+        "seconds": round(report.total_seconds, 2),
+        "tx_per_second": round(report.tx_per_second, 2),
+    }
+    print_json(result)
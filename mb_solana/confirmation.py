@@ -0,0 +1,221 @@
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable
+
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.node_pool import NodePool, is_node_ok, pick_node, report_node
+from mb_solana.transport import HttpTransport
+
+COMMITMENTS = ["processed", "confirmed", "finalized"]
+MAX_SIGNATURES_PER_CALL = 256  # getSignatureStatuses limit
+BLOCKHASH_VALID_BLOCKS = 150
+
+
+@dataclass
+class _Tracked:
+    signature: str
+    future: Future
+    last_valid_block_height: int | None
+    raw_tx: bytes | None
+    callback: Callable[[str, Result[dict]], None] | None
+    sent_at: float = field(default_factory=time.monotonic)
+
+
+class ConfirmationTracker:
+    """Confirms many submitted transactions with a fixed number of RPC calls per poll.
+
+    Each poll is one getBlockHeight call and one getSignatureStatuses call per 256 tracked signatures, all to the same node.
+    A signature is resolved when it reaches the commitment: Result(ok=status), or Result(error="failed: ...") if the transaction
+    landed with an error. It's dropped with Result(error="expired") when its blockhash expired, it can't land anymore after
+    that. An expired signature is looked up once more with searchTransactionHistory first: a transaction which landed may be
+    out of the status cache of the node already. If the last valid block height of the blockhash is unknown, it's estimated
+    from the block height of the first poll.
+
+    If raw_tx is given to track() and resend_interval is set, a transaction which isn't seen by the node is sent again
+    every resend_interval seconds.
+    """
+
+    def __init__(
+        self,
+        nodes: str | list[str] | NodePool,
+        *,
+        commitment="confirmed",
+        poll_interval=2.0,
+        resend_interval: float | None = None,
+        on_resolved: Callable[[dict[str, Result[dict]]], None] | None = None,
+        timeout=10,
+        transport: HttpTransport | None = None,
+    ):
+        """on_resolved is called once per poll with all the signatures resolved by it, before they leave pending_count()"""
+        if commitment not in COMMITMENTS:
+            raise ValueError(f"unknown commitment: {commitment}")
+        self.nodes = nodes
+        self.commitment = commitment
+        self.poll_interval = poll_interval
+        self.resend_interval = resend_interval
+        self.on_resolved = on_resolved
+        self.timeout = timeout
+        self.transport = transport
+        self._tracked: dict[str, _Tracked] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def track(
+        self,
+        signature: str,
+        *,
+        last_valid_block_height: int | None = None,
+        raw_tx: bytes | None = None,
+        callback: Callable[[str, Result[dict]], None] | None = None,
+    ) -> Future:
+        """Returns a future of Result[dict], the result is the signature status"""
+        with self._lock:
+            tracked = self._tracked.get(signature)
+            if tracked is None:
+                tracked = _Tracked(signature, Future(), last_valid_block_height, raw_tx, callback)
+                self._tracked[signature] = tracked
+            return tracked.future
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._tracked)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stops polling. The futures of signatures which are still pending are resolved with Result(error="stopped")"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            tracked_list = list(self._tracked.values())
+            self._tracked.clear()
+        for tracked in tracked_list:
+            tracked.future.set_result(Result(error="stopped"))
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Waits until all the tracked signatures are resolved, returns False on timeout"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.pending_count():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(min(self.poll_interval / 2, 0.5))
+        return True
+
+    def poll(self) -> dict[str, Result[dict]]:
+        """Polls the statuses once, returns the resolved signatures. It's called by the background thread after start()"""
+        with self._lock:
+            tracked_list = list(self._tracked.values())
+        if not tracked_list:
+            return {}
+
+        # nodes lag each other, a missing status is compared with the block height of the same node
+        node = pick_node(self.nodes)
+        started_at = time.monotonic()
+        block_height = solana_rpc.get_block_height(node, timeout=self.timeout, transport=self.transport)
+        report_node(self.nodes, node, started_at, is_node_ok(block_height))
+        resolved: dict[str, Result[dict]] = {}
+        expired: list[_Tracked] = []
+        for i in range(0, len(tracked_list), MAX_SIGNATURES_PER_CALL):
+            end = i + MAX_SIGNATURES_PER_CALL
+            chunk = tracked_list[i:end]
+            res = solana_rpc.get_signature_statuses(
+                node, [t.signature for t in chunk], timeout=self.timeout, transport=self.transport
+            )
+            if res.is_error() or len(res.ok) != len(chunk):
+                continue
+            for tracked, status in zip(chunk, res.ok):
+                status_res = self._check(tracked, status, block_height.ok if block_height.is_ok() else None)
+                if status_res is None:
+                    continue
+                if status_res.error == "expired":
+                    expired.append(tracked)
+                else:
+                    resolved[tracked.signature] = status_res
+        resolved |= self._check_expired(node, expired)
+
+        if resolved:
+            if self.on_resolved:
+                self.on_resolved(resolved)
+            with self._lock:
+                resolved_list = [self._tracked.pop(signature) for signature in resolved if signature in self._tracked]
+            for tracked in resolved_list:
+                if tracked.callback:
+                    tracked.callback(tracked.signature, resolved[tracked.signature])
+                tracked.future.set_result(resolved[tracked.signature])
+        return resolved
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception:  # nosec # the next poll will try again
+                pass
+
+    def _check_expired(self, node: str, expired: list[_Tracked]) -> dict[str, Result[dict]]:
+        """Expired signatures which the node doesn't find with searchTransactionHistory either. The ones it finds are resolved
+        as usual when they reach the commitment, the ones of a failed call are checked again on the next poll."""
+        resolved: dict[str, Result[dict]] = {}
+        for i in range(0, len(expired), MAX_SIGNATURES_PER_CALL):
+            end = i + MAX_SIGNATURES_PER_CALL
+            chunk = expired[i:end]
+            res = solana_rpc.get_signature_statuses(
+                node,
+                [t.signature for t in chunk],
+                search_transaction_history=True,
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+            if res.is_error() or len(res.ok) != len(chunk):
+                continue
+            for tracked, status in zip(chunk, res.ok):
+                status_res = self._check(tracked, status, None) if status else Result(error="expired")
+                if status_res is not None:
+                    resolved[tracked.signature] = status_res
+        return resolved
+
+    def _check(self, tracked: _Tracked, status: dict | None, block_height: int | None) -> Result[dict] | None:
+        if status and is_commitment_reached(status.get("confirmationStatus"), self.commitment):
+            if status.get("err"):
+                return Result(error=f"failed: {status['err']}", data=status)
+            return Result(ok=status)
+        if status is not None or block_height is None:
+            return None
+
+        if tracked.last_valid_block_height is None:
+            tracked.last_valid_block_height = block_height + BLOCKHASH_VALID_BLOCKS
+        if block_height > tracked.last_valid_block_height:
+            return Result(error="expired")
+        if tracked.raw_tx and self.resend_interval and time.monotonic() - tracked.sent_at > self.resend_interval:
+            tracked.sent_at = time.monotonic()
+            solana_rpc.send_transaction(
+                self.nodes,
+                tracked.raw_tx,
+                skip_preflight=True,
+                max_retries=0,
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+        return None
+
+
+def is_commitment_reached(status: str | None, commitment: str) -> bool:
+    return status in COMMITMENTS and COMMITMENTS.index(status) >= COMMITMENTS.index(commitment)
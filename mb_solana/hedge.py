@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+from mb_std import Result
+
+from mb_solana.node_pool import NodePool, is_node_ok, pick_node, report_node
+
+T = TypeVar("T")
+
+
+@dataclass
+class HedgeStats:
+    calls: int = 0
+    hedged: int = 0  # how many times the second request was sent
+    hedge_won: int = 0  # how many times the second request answered first
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.calls if self.calls else 0
+
+
+class Hedger:
+    """Hedged requests for read-only calls.
+
+    The request goes to the first node. If it hasn't answered within the `percentile` latency of the previous requests,
+    the same request goes to a second node and the first healthy answer wins. The losing request is cancelled: an asyncio task
+    is cancelled for real, a thread which is already running can't be interrupted, its result is dropped.
+    """
+
+    def __init__(self, *, percentile=95, initial_delay=0.5, min_delay=0.05, window=200, min_samples=20, max_workers=32):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.stats = HedgeStats()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._max_workers = max_workers
+
+    def delay(self) -> float:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(self.min_delay, latencies[index])
+
+    def call(self, nodes: list[str] | NodePool, fn: Callable[[str], Result[T]]) -> Result[T]:
+        first_node = pick_node(nodes)
+        started_at = {first_node: time.monotonic()}
+        futures: dict[Future, str] = {self._get_executor().submit(fn, first_node): first_node}
+        done, _ = wait(futures, timeout=self.delay())
+        second_node = None if done else _pick_other_node(nodes, first_node)
+        if second_node:
+            started_at[second_node] = time.monotonic()
+            futures[self._get_executor().submit(fn, second_node)] = second_node
+
+        res: Result[T] | None = None
+        winner = first_node
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                res, winner = future.result(), futures[future]
+                report_node(nodes, winner, started_at[winner], is_node_ok(res))
+                if is_node_ok(res):
+                    break
+            if res is not None and is_node_ok(res):
+                break
+        for future in pending:
+            future.cancel()
+
+        self._record(time.monotonic() - started_at[first_node], second_node is not None, winner == second_node)
+        return res  # type:ignore
+
+    async def acall(self, nodes: list[str] | NodePool, fn: Callable[[str], Awaitable[Result[T]]]) -> Result[T]:
+        first_node = pick_node(nodes)
+        started_at = {first_node: time.monotonic()}
+        tasks: dict[asyncio.Task, str] = {asyncio.ensure_future(fn(first_node)): first_node}
+        done, _ = await asyncio.wait(tasks, timeout=self.delay())
+        second_node = None if done else _pick_other_node(nodes, first_node)
+        if second_node:
+            started_at[second_node] = time.monotonic()
+            tasks[asyncio.ensure_future(fn(second_node))] = second_node
+
+        res: Result[T] | None = None
+        winner = first_node
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    res, winner = task.result(), tasks[task]
+                    report_node(nodes, winner, started_at[winner], is_node_ok(res))
+                    if is_node_ok(res):
+                        break
+                if res is not None and is_node_ok(res):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self._record(time.monotonic() - started_at[first_node], second_node is not None, winner == second_node)
+        return res  # type:ignore
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="hedge")
+            return self._executor
+
+    def _record(self, latency: float, hedged: bool, hedge_won: bool):
+        with self._lock:
+            self._latencies.append(latency)
+            self.stats.calls += 1
+            if hedged:
+                self.stats.hedged += 1
+            if hedge_won:
+                self.stats.hedge_won += 1
+
+
+def _pick_other_node(nodes: list[str] | NodePool, node: str) -> str | None:
+    for _ in range(5):
+        other = pick_node(nodes)
+        if other != node:
+            return other
+    others = [n for n in (nodes.nodes if isinstance(nodes, NodePool) else nodes) if n != node]
+    return others[0] if others else None
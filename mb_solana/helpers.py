@@ -1,16 +1,26 @@
-import random
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from decimal import Decimal
+from typing import Generator, Iterator
 
-import pydash
+import base58
 from mb_std import Result
 from pydantic import BaseModel
+from solana.blockhash import Blockhash
+from solana.keypair import Keypair
 from solana.publickey import PublicKey
-from solana.rpc.api import Client
 from solana.system_program import TransferParams, transfer
 from solana.transaction import Transaction
 
 from mb_solana import solana_rpc
+from mb_solana.blockhash_cache import BlockhashProvider, is_stale_blockhash_error
+from mb_solana.node_pool import NodePool, pick_node, report_node
+from mb_solana.response_cache import ResponseCache
 from mb_solana.solana_account import get_keypair
+from mb_solana.transport import HttpTransport, get_solana_client
+
+SYSTEM_PROGRAM_ID = "11111111111111111111111111111111"
 
 
 def transfer_sol(
@@ -20,9 +30,12 @@ def transfer_sol(
     recipient_address: str,
     amount_sol: Decimal,
     node: str | None = None,
-    nodes: list[str] | None = None,
+    nodes: list[str] | NodePool | None = None,
     attempts=3,
+    transport: HttpTransport | None = None,
+    blockhash_provider: BlockhashProvider | None = None,
 ) -> Result[str]:
+    """Set blockhash_provider to take the recent blockhash from its cache instead of asking the node each time"""
     if not node and not nodes:
         raise ValueError("node or nodes must be set")
 
@@ -34,24 +47,183 @@ def transfer_sol(
     error = None
     data = None
     for _ in range(attempts):
+        node_ = node or pick_node(nodes)  # type:ignore
+        started_at = time.monotonic()
         try:
-            client = Client(node or random.choice(nodes))  # type:ignore
+            client = get_solana_client(node_, transport)
             tx = Transaction(fee_payer=acc.public_key)
             ti = transfer(
                 TransferParams(from_pubkey=acc.public_key, to_pubkey=PublicKey(recipient_address), lamports=lamports),
             )
             tx.add(ti)
-            res = client.send_transaction(tx, acc)
+            recent_blockhash = None
+            if blockhash_provider:
+                blockhash_res = blockhash_provider.get()
+                if blockhash_res.is_ok():
+                    recent_blockhash = Blockhash(blockhash_res.ok.blockhash)
+            res = client.send_transaction(tx, acc, recent_blockhash=recent_blockhash)
             data = res
             tx = data.get("result")
             if tx and isinstance(tx, str):
+                report_node(nodes, node_, started_at, True)
                 return Result(ok=tx, data=data)
         except Exception as e:
             error = str(e)
+            if blockhash_provider and is_stale_blockhash_error(error):
+                blockhash_provider.report_stale()
+        report_node(nodes, node_, started_at, False)
 
     return Result(error=error, data=data)
 
 
+def transfer_sol_many(
+    *,
+    from_address: str,
+    private_key_base58: str,
+    recipients: dict[str, Decimal],
+    node: str | None = None,
+    nodes: list[str] | NodePool | None = None,
+    attempts=3,
+    transport: HttpTransport | None = None,
+    blockhash_provider: BlockhashProvider | None = None,
+) -> dict[str, Result[str]]:
+    """Transfers SOL to many recipients, recipients is {recipient_address: amount_sol}.
+
+    Transfer instructions are packed into as few transactions as the packet size allows (21 per transaction), each
+    transaction is signed once. Returns the signature of the transaction which pays each recipient.
+    A failed send is retried with the same signed transaction, so a recipient is never paid twice. It's signed again with a
+    new blockhash only if its blockhash was rejected and it can't land: either the preflight check rejected every send of it,
+    or the outcome of a send is unknown (e.g. a timeout), but a history search doesn't find it and its blockhash expired.
+    If a transaction which may have been sent fails, the error data has its "signature", check it before paying again.
+    """
+    if not node and not nodes:
+        raise ValueError("node or nodes must be set")
+
+    acc = get_keypair(private_key_base58)
+    if acc.public_key != PublicKey(from_address):
+        raise ValueError("from_address or private_key_base58 is invalid")
+
+    transfers = [(address, int(amount * 10**9)) for address, amount in recipients.items()]
+    packs = pack_transfers(transfers, from_address)
+    result: dict[str, Result[str]] = {}
+
+    if not blockhash_provider:
+        blockhash_provider = BlockhashProvider(node or nodes, background=False, transport=transport)  # type:ignore
+
+    for pack in packs:
+        res: Result = Result(error="not_sent")
+        tx: SignedTransaction | None = None
+        last_valid_block_height = 0
+        maybe_sent = False  # a send of tx failed without a response of the node, it may have been broadcast
+        for _ in range(attempts):
+            if tx is None:
+                res = blockhash_provider.get()
+                if res.is_error():
+                    continue
+                tx = sign_transfer_transaction(acc, pack, res.ok.blockhash)
+                last_valid_block_height = res.ok.last_valid_block_height
+                maybe_sent = False
+            res = solana_rpc.send_transaction(node or nodes, tx.raw_tx, transport=transport)  # type:ignore
+            if res.is_ok():
+                break
+            if not is_stale_blockhash_error(res.error):
+                maybe_sent = maybe_sent or not res.error.startswith("service_error")
+                continue
+            blockhash_provider.report_stale()
+            if not maybe_sent:
+                tx = None  # the preflight check rejected every send of it, it's safe to sign it again with a new blockhash
+                continue
+            status_res = _find_expired_transaction(node or nodes, tx.signature, last_valid_block_height, transport)  # type:ignore
+            if status_res.is_ok() and status_res.ok:
+                res = Result(ok=tx.signature, data=status_res.data)  # an earlier send landed
+                if status_res.ok.get("err"):
+                    res = Result(error=f"failed: {status_res.ok['err']}", data=status_res.data)
+                break
+            if status_res.is_ok():
+                tx = None  # it's not found and it can't land anymore
+        if res.is_error() and tx and maybe_sent:
+            res = Result(error=res.error, data={**(res.data or {}), "signature": tx.signature})  # it may still land
+        for address, _lamports in pack:
+            result[address] = Result(ok=tx.signature, data=res.data) if res.is_ok() and tx else res
+    return result
+
+
+def _find_expired_transaction(
+    nodes: str | list[str] | NodePool,
+    signature: str,
+    last_valid_block_height: int,
+    transport: HttpTransport | None,
+) -> Result[dict | None]:
+    """The status of a sent transaction, searched in the history: a transaction which landed may be out of the status cache.
+    None if it's not found and its blockhash expired, so it can't land anymore. An error if it's not found yet."""
+    node = pick_node(nodes)  # the block height and the status from the same node
+    res = solana_rpc.get_signature_statuses(node, [signature], search_transaction_history=True, transport=transport)
+    if res.is_error() or res.ok[0]:
+        return Result(ok=res.ok[0], data=res.data) if res.is_ok() else res
+    block_height = solana_rpc.get_block_height(node, transport=transport)
+    if block_height.is_error():
+        return block_height
+    if block_height.ok <= last_valid_block_height:
+        return Result(error="not_expired", data={"block_height": block_height.ok})
+    return Result(ok=None, data={"block_height": block_height.ok})
+
+
+MAX_TX_SIZE = 1232  # bytes, IPv6 MTU minus headers
+
+
+def legacy_tx_size(num_signatures: int, num_accounts: int, instructions: list[tuple[int, int]]) -> int:
+    """Serialized size of a legacy transaction. instructions is a list of (number of accounts, data length)."""
+    size = _compact_u16_len(num_signatures) + 64 * num_signatures
+    size += 3  # message header
+    size += _compact_u16_len(num_accounts) + 32 * num_accounts
+    size += 32  # recent blockhash
+    size += _compact_u16_len(len(instructions))
+    for accounts_len, data_len in instructions:
+        size += 1 + _compact_u16_len(accounts_len) + accounts_len + _compact_u16_len(data_len) + data_len
+    return size
+
+
+def pack_transfers(transfers: list[tuple[str, int]], from_address: str) -> list[list[tuple[str, int]]]:
+    """Splits (recipient_address, lamports) into groups which fit into one legacy transaction each"""
+    packs: list[list[tuple[str, int]]] = []
+    pack: list[tuple[str, int]] = []
+    accounts = {from_address, SYSTEM_PROGRAM_ID}
+    for recipient, lamports in transfers:
+        new_accounts = accounts | {recipient}
+        size = legacy_tx_size(1, len(new_accounts), [(2, 12)] * (len(pack) + 1))
+        if pack and size > MAX_TX_SIZE:
+            packs.append(pack)
+            pack = []
+            new_accounts = {from_address, SYSTEM_PROGRAM_ID, recipient}
+        pack.append((recipient, lamports))
+        accounts = new_accounts
+    if pack:
+        packs.append(pack)
+    return packs
+
+
+def _compact_u16_len(value: int) -> int:
+    return 1 if value < 0x80 else 2 if value < 0x4000 else 3
+
+
+class SignedTransaction(BaseModel):
+    signature: str
+    raw_tx: bytes
+
+
+def sign_transfer_transaction(keypair: Keypair, transfers: list[tuple[str, int]], recent_blockhash: str) -> SignedTransaction:
+    """Builds and signs a transaction with a system transfer instruction for each (recipient_address, lamports)"""
+    tx = Transaction(recent_blockhash=Blockhash(recent_blockhash), fee_payer=keypair.public_key)
+    for recipient_address, lamports in transfers:
+        params = TransferParams(from_pubkey=keypair.public_key, to_pubkey=PublicKey(recipient_address), lamports=lamports)
+        tx.add(transfer(params))
+    tx.sign(keypair)
+    signature = tx.signature()
+    if signature is None:
+        raise ValueError("the transaction is not signed")
+    return SignedTransaction(signature=base58.b58encode(signature).decode(), raw_tx=tx.serialize())
+
+
 def lamports_to_sol(lamports: int, ndigits=4) -> Decimal:
     return Decimal(str(round(lamports / 10**9, ndigits=ndigits)))
 
@@ -62,21 +234,105 @@ class TransferInfo(BaseModel):
     lamports: int
 
 
-def find_transfers(node: str, tx_signature: str) -> Result[list[TransferInfo]]:
-    res = solana_rpc.get_transaction(node, tx_signature, encoding="jsonParsed")
+def find_transfers(
+    node: str | NodePool,
+    tx_signature: str,
+    transport: HttpTransport | None = None,
+    cache: ResponseCache | None = None,
+) -> Result[list[TransferInfo]]:
+    res = solana_rpc.get_transaction(node, tx_signature, encoding="jsonParsed", transport=transport, cache=cache)
+    return parse_transfers(res)
+
+
+def find_transfers_many(
+    node: str | NodePool,
+    signatures: list[str],
+    *,
+    batch_size=100,
+    window=4,
+    attempts=3,
+    timeout=60,
+    transport: HttpTransport | None = None,
+    cache: ResponseCache | None = None,
+    inner=False,
+) -> Generator[tuple[str, Result[list[TransferInfo]]], None, None]:
+    """Yields (signature, transfers) for each signature as soon as its batch arrives. Set inner to add the transfers made by
+    other programs (inner instructions), see parse_transfers.
+
+    Signatures found in the cache are yielded first, the rest are fetched as batched getTransaction calls, batch_size
+    transactions per request and up to `window` requests at the same time. Batches are yielded in the order of signatures.
+    Fetched transactions are finalized, so with a cache they are kept permanently if it has a disk store.
+    """
+    missing = []
+    for signature in signatures:
+        cached = cache.get("getTransaction", [signature, "jsonParsed"]) if cache else None
+        if cached is None:
+            missing.append(signature)
+        else:
+            yield signature, parse_transfers(cached, inner)
+
+    def fetch(batch: list[str]) -> dict[str, Result[dict | None]]:
+        results: dict[str, Result[dict | None]] = {}
+        for _ in range(attempts):
+            retry = [s for s in batch if s not in results or results[s].is_error()]
+            if not retry:
+                break
+            results |= solana_rpc.get_transaction_batch(
+                node,
+                retry,
+                encoding="jsonParsed",
+                batch_size=batch_size,
+                timeout=timeout,
+                transport=transport,
+            )
+        return results
+
+    pending: deque[Future] = deque()
+    executor = ThreadPoolExecutor(max_workers=window)
+    try:
+        for i in range(0, len(missing), batch_size):
+            if len(pending) >= window:
+                yield from _parse_batch(pending.popleft().result(), cache, inner)
+            end = i + batch_size
+            pending.append(executor.submit(fetch, missing[i:end]))
+        while pending:
+            yield from _parse_batch(pending.popleft().result(), cache, inner)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_batch(
+    results: dict[str, Result[dict | None]],
+    cache: ResponseCache | None,
+    inner: bool,
+) -> Iterator[tuple[str, Result[list[TransferInfo]]]]:
+    for signature, res in results.items():
+        if cache:
+            cache.put("getTransaction", [signature, "jsonParsed"], res)
+        yield signature, parse_transfers(res, inner)
+
+
+def parse_transfers(res: Result, inner=False) -> Result[list[TransferInfo]]:
+    """System program transfers of a jsonParsed transaction. Set inner to add the ones made by other programs
+    (inner instructions). A not found transaction (a null result) is an "exception" error with data["error"] == "not_found"."""
     if res.is_error():
         return res  # type:ignore
+    if res.ok is None:
+        return Result(error="exception", data={"error": "not_found", "response": res.dict()})
     result = []
     try:
-        for ix in pydash.get(res.ok, "transaction.message.instructions"):
-            program_id = ix.get("programId")
-            ix_type = pydash.get(ix, "parsed.type")
-            if program_id == "11111111111111111111111111111111" and ix_type == "transfer":
-                source = pydash.get(ix, "parsed.info.source")
-                destination = pydash.get(ix, "parsed.info.destination")
-                lamports = pydash.get(ix, "parsed.info.lamports")
-                if source and destination and lamports:
-                    result.append(TransferInfo(source=source, destination=destination, lamports=lamports))
-        return Result.new_ok(result, res.dict())
+        instructions = res.ok["transaction"]["message"]["instructions"]
+        if inner:
+            inner_instructions = (res.ok.get("meta") or {}).get("innerInstructions") or []
+            instructions = instructions + [ix for group in inner_instructions for ix in group["instructions"]]
+        for ix in instructions:
+            parsed = ix.get("parsed")
+            if ix.get("programId") != SYSTEM_PROGRAM_ID or not isinstance(parsed, dict) or parsed.get("type") != "transfer":
+                continue
+            info = parsed.get("info") or {}
+            source, destination, lamports = info.get("source"), info.get("destination"), info.get("lamports")
+            if source and destination and lamports:
+                result.append(TransferInfo(source=source, destination=destination, lamports=lamports))
+        return Result(ok=result, data=res.dict())
     except Exception as e:
-        return Result.new_error("exception", {"error": str(e), "response": res.dict()})
+        return Result(error="exception", data={"error": str(e), "response": res.dict()})
@@ -0,0 +1,47 @@
+"""JSON decoders for RPC responses.
+
+getBlock, getVoteAccounts, getLeaderSchedule and getClusterNodes responses are megabytes, orjson and msgspec decode them up to
+twice as fast as the json module (see benchmarks/bench_json.py). The first installed one of DECODERS is used by default,
+`pip install mb-solana[fast-json]` installs orjson.
+"""
+import json
+from typing import Any, Callable
+
+JsonDecoder = Callable[[bytes | str], Any]
+
+DECODERS = ["orjson", "msgspec", "stdlib"]
+
+
+def get_decoder(name="auto") -> JsonDecoder:
+    """name is one of DECODERS or "auto": the first installed one"""
+    if name == "auto":
+        for name_ in DECODERS:
+            decoder = _load_decoder(name_)
+            if decoder:
+                return decoder
+    if name not in DECODERS:
+        raise ValueError(f"unknown json decoder: {name}")
+    decoder = _load_decoder(name)
+    if decoder is None:
+        raise ValueError(f"json decoder is not installed: {name}")
+    return decoder
+
+
+def available_decoders() -> list[str]:
+    return [name for name in DECODERS if _load_decoder(name)]
+
+
+def _load_decoder(name: str) -> JsonDecoder | None:
+    if name == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            return None
+        return orjson.loads
+    if name == "msgspec":
+        try:
+            import msgspec
+        except ImportError:
+            return None
+        return msgspec.json.Decoder().decode
+    return json.loads
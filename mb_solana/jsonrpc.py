@@ -0,0 +1,13 @@
+from typing import Any
+
+from mb_std import Result
+
+
+def parse_rpc_response(response: dict, data: Any) -> Result:
+    """Result of a JSON RPC response, data is kept in the result. It's shared by the http and the ws transports."""
+    err = response.get("error", {}).get("message", "")
+    if err:
+        return Result(error=f"service_error: {err}", data=data)
+    if "result" in response:
+        return Result(ok=response["result"], data=data)
+    return Result(error="unknown_response", data=data)
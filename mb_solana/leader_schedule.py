@@ -0,0 +1,183 @@
+"""Leader schedule of an epoch, indexed by slot and by leader, and its cache.
+
+A schedule doesn't change once its epoch is known, so LeaderScheduleCache keeps it in memory and, if cache_dir is set, on disk.
+"""
+import base64
+import bisect
+import json
+import os
+import threading
+from array import array
+
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.node_pool import NodePool
+from mb_solana.solana_rpc import EpochInfo
+from mb_solana.transport import HttpTransport
+
+
+class LeaderSchedule:
+    """slot_leaders[i] is the index in leaders of the leader of the slot first_slot + i.
+    A leader's slots are kept as runs of consecutive slots: run_starts and run_lengths, sorted by slot."""
+
+    def __init__(self, epoch: int, first_slot: int, leaders: list[str], slot_leaders: array):
+        self.epoch = epoch
+        self.first_slot = first_slot
+        self.leaders = leaders
+        self.slot_leaders = slot_leaders
+        self.run_starts: dict[str, array] = {leader: array("Q") for leader in leaders}
+        self.run_lengths: dict[str, array] = {leader: array("I") for leader in leaders}
+        run_start = 0
+        for i in range(1, len(slot_leaders) + 1):
+            if i == len(slot_leaders) or slot_leaders[i] != slot_leaders[run_start]:
+                leader = leaders[slot_leaders[run_start]]
+                self.run_starts[leader].append(first_slot + run_start)
+                self.run_lengths[leader].append(i - run_start)
+                run_start = i
+
+    @property
+    def last_slot(self) -> int:
+        return self.first_slot + len(self.slot_leaders) - 1
+
+    def leader(self, slot: int) -> str | None:
+        """Leader of the slot, None if the slot isn't in the epoch"""
+        if self.first_slot <= slot <= self.last_slot:
+            return self.leaders[self.slot_leaders[slot - self.first_slot]]
+        return None
+
+    def slots(self, leader: str) -> list[int]:
+        runs = zip(self.run_starts.get(leader, []), self.run_lengths.get(leader, []))
+        return [slot for start, length in runs for slot in range(start, start + length)]
+
+    def next_slots(self, leader: str, after_slot: int, limit: int | None = None) -> list[int]:
+        """The leader's slots greater than after_slot, in this epoch"""
+        starts = self.run_starts.get(leader)
+        if not starts:
+            return []
+        lengths = self.run_lengths[leader]
+        result: list[int] = []
+        i = max(bisect.bisect_right(starts, after_slot) - 1, 0)  # the run which can contain after_slot
+        while i < len(starts) and (limit is None or len(result) < limit):
+            result.extend(range(max(starts[i], after_slot + 1), starts[i] + lengths[i]))
+            i += 1
+        return result if limit is None else result[:limit]
+
+    def upcoming(self, from_slot: int, count: int) -> list[tuple[int, str]]:
+        """(slot, leader) of count slots starting with from_slot, in this epoch"""
+        first = max(from_slot, self.first_slot)
+        last = min(first + count - 1, self.last_slot)
+        return [(slot, self.leaders[self.slot_leaders[slot - self.first_slot]]) for slot in range(first, last + 1)]
+
+    def to_dict(self) -> dict:
+        return {
+            "epoch": self.epoch,
+            "first_slot": self.first_slot,
+            "leaders": self.leaders,
+            "typecode": self.slot_leaders.typecode,
+            "slot_leaders": base64.b64encode(self.slot_leaders.tobytes()).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LeaderSchedule":
+        slot_leaders = array(data["typecode"])
+        slot_leaders.frombytes(base64.b64decode(data["slot_leaders"]))
+        return cls(data["epoch"], data["first_slot"], data["leaders"], slot_leaders)
+
+    @classmethod
+    def from_rpc(cls, epoch: int, first_slot: int, schedule: dict[str, list[int]]) -> "LeaderSchedule":
+        """schedule is a getLeaderSchedule result: leader -> slot indexes relative to the first slot of the epoch"""
+        leaders = list(schedule)
+        size = max((max(indexes) for indexes in schedule.values() if indexes), default=-1) + 1
+        slot_leaders = array("H" if len(leaders) <= 0xFFFF else "I", [0]) * size
+        for leader_index, indexes in enumerate(schedule.values()):
+            for i in indexes:
+                slot_leaders[i] = leader_index
+        return cls(epoch, first_slot, leaders, slot_leaders)
+
+
+class LeaderScheduleCache:
+    """Leader schedules by epoch. The epoch bounds are calculated from one getEpochInfo call, it assumes that all epochs
+    have the same number of slots, as on mainnet-beta where the warmup epochs are long gone."""
+
+    def __init__(
+        self,
+        nodes: str | list[str] | NodePool,
+        *,
+        cache_dir: str | None = None,
+        timeout=30,
+        transport: HttpTransport | None = None,
+    ):
+        self.nodes = nodes
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.transport = transport
+        self._schedules: dict[int, LeaderSchedule] = {}
+        self._epoch_info: EpochInfo | None = None
+        self._lock = threading.Lock()
+
+    def get(self, epoch: int | None = None) -> Result[LeaderSchedule]:
+        """The schedule of the epoch, by default of the current one"""
+        res = self._get_epoch_info(refresh=epoch is None)
+        if res.is_error():
+            return res
+        epoch_info: EpochInfo = res.ok
+        if epoch is None:
+            epoch = epoch_info.epoch
+
+        with self._lock:
+            schedule = self._schedules.get(epoch)
+        if schedule is None:
+            schedule = self._read(epoch)
+        if schedule is None:
+            first_slot = epoch_info.absolute_slot - epoch_info.slot_index + (epoch - epoch_info.epoch) * epoch_info.slots_in_epoch
+            res = solana_rpc.get_leader_scheduler(self.nodes, first_slot, timeout=self.timeout, transport=self.transport)
+            if res.is_error():
+                return res
+            if not res.ok:
+                return Result(error="leader_schedule_not_available", data=res.data)
+            schedule = LeaderSchedule.from_rpc(epoch, first_slot, res.ok)
+            self._write(schedule)
+        with self._lock:
+            self._schedules[epoch] = schedule
+        return Result(ok=schedule)
+
+    def leader(self, slot: int) -> Result[str | None]:
+        res = self._get_epoch_info()
+        if res.is_error():
+            return res
+        epoch_info: EpochInfo = res.ok
+        first_slot = epoch_info.absolute_slot - epoch_info.slot_index
+        epoch = epoch_info.epoch + (slot - first_slot) // epoch_info.slots_in_epoch
+        res = self.get(epoch)
+        if res.is_error():
+            return res
+        return Result(ok=res.ok.leader(slot))
+
+    def _get_epoch_info(self, refresh=False) -> Result[EpochInfo]:
+        with self._lock:
+            if self._epoch_info and not refresh:
+                return Result(ok=self._epoch_info)
+        res = solana_rpc.get_epoch_info(self.nodes, timeout=self.timeout, transport=self.transport)
+        if res.is_ok():
+            with self._lock:
+                self._epoch_info = res.ok
+        return res
+
+    def _path(self, epoch: int) -> str:
+        return os.path.join(self.cache_dir, f"leader_schedule_{epoch}.json")  # type:ignore
+
+    def _read(self, epoch: int) -> LeaderSchedule | None:
+        if not self.cache_dir or not os.path.exists(self._path(epoch)):
+            return None
+        with open(self._path(epoch)) as f:
+            return LeaderSchedule.from_dict(json.load(f))
+
+    def _write(self, schedule: LeaderSchedule):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(schedule.epoch)
+        with open(path + ".tmp", "w") as f:
+            json.dump(schedule.to_dict(), f)
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,176 @@
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, TypeVar
+
+from mb_std import Result
+
+T = TypeVar("T")
+
+
+@dataclass
+class NodeStats:
+    node: str
+    latency: float | None = None  # exponentially weighted moving average, seconds
+    results: deque[bool] = field(default_factory=deque)  # the last `window` results, True is ok
+    consecutive_errors: int = 0
+    slot: int | None = None
+    slot_lag: int = 0
+    ejected_until: float = 0  # time.monotonic(), 0 if the node is not ejected
+    probe_started_at: float | None = None
+
+    @property
+    def error_rate(self) -> float:
+        if not self.results:
+            return 0
+        return self.results.count(False) / len(self.results)
+
+    @property
+    def is_ejected(self) -> bool:
+        return self.ejected_until > 0
+
+
+class NodePool:
+    """Picks the best node for the next request.
+
+    Nodes are ranked by the rolling latency, the error rate and the slot lag. The next request goes to a random node from the
+    best `spread` ones. A node is ejected after `max_consecutive_errors` errors in a row or when its error rate is above
+    `max_error_rate`. After `eject_seconds` it gets exactly one probe request: on success it's back in the pool, on error it's
+    ejected again.
+
+    Call report() after each request (or use call()), and refresh_slots() periodically to track the slot lag.
+    """
+
+    def __init__(
+        self,
+        nodes: list[str],
+        *,
+        spread=2,
+        window=50,
+        latency_alpha=0.3,
+        max_error_rate=0.5,
+        min_samples=10,
+        max_consecutive_errors=3,
+        eject_seconds=30.0,
+        max_slot_lag=50,
+    ):
+        if not nodes:
+            raise ValueError("nodes must not be empty")
+        self.spread = spread
+        self.latency_alpha = latency_alpha
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.max_consecutive_errors = max_consecutive_errors
+        self.eject_seconds = eject_seconds
+        self.max_slot_lag = max_slot_lag
+        self._stats = {node: NodeStats(node=node, results=deque(maxlen=window)) for node in dict.fromkeys(nodes)}
+        self._lock = threading.Lock()
+
+    @property
+    def nodes(self) -> list[str]:
+        return list(self._stats)
+
+    def stats(self) -> list[NodeStats]:
+        with self._lock:
+            return sorted(self._stats.values(), key=self._score)
+
+    def pick(self) -> str:
+        now = time.monotonic()
+        with self._lock:
+            for s in self._stats.values():
+                if s.is_ejected and s.ejected_until <= now and not self._is_probing(s, now):
+                    s.probe_started_at = now
+                    return s.node
+
+            candidates = [s for s in self._stats.values() if not s.is_ejected and s.slot_lag <= self.max_slot_lag]
+            if not candidates:
+                candidates = [s for s in self._stats.values() if not s.is_ejected]
+            if not candidates:  # all nodes are ejected, take the one which is going to be back first
+                return min(self._stats.values(), key=lambda s: s.ejected_until).node
+
+            candidates.sort(key=self._score)
+            return random.choice(candidates[: self.spread]).node
+
+    def report(self, node: str, latency: float, ok: bool):
+        with self._lock:
+            s = self._stats.get(node)
+            if s is None:
+                return
+            s.latency = latency if s.latency is None else self.latency_alpha * latency + (1 - self.latency_alpha) * s.latency
+            s.results.append(ok)
+
+            if s.is_ejected:
+                if s.probe_started_at is not None:
+                    s.probe_started_at = None
+                    if ok:
+                        s.ejected_until = 0
+                        s.consecutive_errors = 0
+                        s.results.clear()
+                    else:
+                        s.ejected_until = time.monotonic() + self.eject_seconds
+                return
+
+            s.consecutive_errors = 0 if ok else s.consecutive_errors + 1
+            too_many_errors = len(s.results) >= self.min_samples and s.error_rate > self.max_error_rate
+            if s.consecutive_errors >= self.max_consecutive_errors or too_many_errors:
+                s.ejected_until = time.monotonic() + self.eject_seconds
+
+    def report_slot(self, node: str, slot: int):
+        with self._lock:
+            if node in self._stats:
+                self._stats[node].slot = slot
+            max_slot = max((s.slot for s in self._stats.values() if s.slot is not None), default=0)
+            for s in self._stats.values():
+                s.slot_lag = max_slot - s.slot if s.slot is not None else 0
+
+    def refresh_slots(self, timeout=5, transport=None):
+        """Calls getSlot on every node, it updates the slot lag and the latency of each node"""
+        from mb_solana import solana_rpc  # solana_rpc imports this module
+
+        for node in self.nodes:
+            res = self.call(lambda n: solana_rpc.get_slot(n, timeout=timeout, transport=transport), node=node)
+            if res.is_ok():
+                self.report_slot(node, res.ok)
+
+    def call(
+        self,
+        fn: Callable[[str], Result[T]],
+        node: str | None = None,
+        is_ok: Callable[[Result], bool] | None = None,
+    ) -> Result[T]:
+        """Calls fn with the picked node (or the given one) and reports its latency and result.
+        is_ok tells whether the result means the node is healthy, by default it's is_node_ok."""
+        node = node or self.pick()
+        started_at = time.monotonic()
+        res = fn(node)
+        self.report(node, time.monotonic() - started_at, (is_ok or is_node_ok)(res))
+        return res
+
+    def _is_probing(self, s: NodeStats, now: float) -> bool:
+        return s.probe_started_at is not None and now - s.probe_started_at < self.eject_seconds
+
+    def _score(self, s: NodeStats) -> float:
+        if s.latency is None:  # try the new nodes first
+            return 0
+        return s.latency * (1 + 4 * s.error_rate) + (float("inf") if s.is_ejected else 0)
+
+
+def is_node_ok(res: Result) -> bool:
+    """An error returned by the service itself (invalid params, skipped slot, ...) doesn't mean the node is unhealthy"""
+    return res.is_ok() or (res.error or "").startswith("service_error")
+
+
+def pick_node(node: str | list[str] | NodePool) -> str:
+    if isinstance(node, NodePool):
+        return node.pick()
+    if isinstance(node, list):
+        return random.choice(node)
+    return node
+
+
+def report_node(nodes: str | list[str] | NodePool | None, node: str, started_at: float, ok: bool):
+    """Reports the request result if nodes is a NodePool. started_at is time.monotonic() before the request."""
+    if isinstance(nodes, NodePool):
+        nodes.report(node, time.monotonic() - started_at, ok)
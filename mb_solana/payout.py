@@ -0,0 +1,204 @@
+"""Pipelined mass SOL payouts.
+
+One blockhash is taken for each window of transactions, all transactions of the window are signed ahead and sent
+concurrently with preflight skipped, then confirmed in the background. Every state change is appended to a checkpoint file
+before the next step, so an interrupted payout can be resumed without sending anything twice:
+- a signed transaction is written to the checkpoint before it's sent. On resume the same signed transaction is sent again,
+  which is safe, the cluster processes a signature only once.
+- a recipient gets a new transaction only when the previous one expired: its blockhash is too old to land anymore, and a
+  status lookup with searchTransactionHistory doesn't find it (see ConfirmationTracker). A transaction of a resumed payout
+  may have landed long ago, out of the status cache of the nodes.
+"""
+import base64
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mb_std import Result
+from pydantic import BaseModel
+
+from mb_solana import solana_rpc
+from mb_solana.blockhash_cache import BlockhashProvider
+from mb_solana.confirmation import ConfirmationTracker
+from mb_solana.helpers import sign_transfer_transaction
+from mb_solana.node_pool import NodePool
+from mb_solana.solana_account import get_keypair
+from mb_solana.transport import HttpTransport
+
+
+class PayoutReport(BaseModel):
+    signatures: dict[str, str]  # recipient -> signature of the landed transaction
+    errors: dict[str, str]  # recipient -> error
+    sent: int
+    send_seconds: float
+    total_seconds: float
+
+    @property
+    def tx_per_second(self) -> float:
+        return self.sent / self.send_seconds if self.send_seconds else 0
+
+
+class PayoutCheckpoint:
+    """Append-only JSON lines file, one line per state change of a recipient. The last line of a recipient is its state.
+
+    status: sent -- signed and maybe sent; confirmed; failed -- landed with an error; expired -- can't land anymore
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.state[entry["recipient"]] = entry
+
+    def write(self, entries: list[dict]):
+        with self._lock:
+            with open(self.path, "a") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for entry in entries:
+                self.state[entry["recipient"]] = entry
+
+
+def pipelined_transfer_sol(
+    *,
+    private_key: str,
+    recipients: dict[str, int],
+    nodes: str | list[str] | NodePool,
+    checkpoint_path: str,
+    window=100,
+    concurrency=16,
+    commitment="confirmed",
+    poll_interval=2.0,
+    resend_interval=10.0,
+    confirm_timeout=300.0,
+    max_rounds=3,
+    transport: HttpTransport | None = None,
+    blockhash_provider: BlockhashProvider | None = None,
+) -> PayoutReport:
+    """Transfers lamports to each recipient, recipients is {recipient_address: lamports}.
+    If checkpoint_path exists, the payout is resumed from it."""
+    keypair = get_keypair(private_key)
+    if not blockhash_provider:
+        blockhash_provider = BlockhashProvider(nodes, background=False, transport=transport)
+    checkpoint = PayoutCheckpoint(checkpoint_path)
+    pending: dict[str, dict] = {}  # signature -> checkpoint entry, the tracker resolves them in its own thread
+    pending_lock = threading.Lock()
+
+    def write_resolved(resolved: dict[str, Result[dict]]):
+        entries = []
+        for signature, res in resolved.items():
+            with pending_lock:
+                pending_entry = pending.pop(signature, None)
+            if pending_entry is None:
+                continue
+            entry = {k: v for k, v in pending_entry.items() if k != "raw_tx"}
+            if res.is_ok():
+                entries.append({**entry, "status": "confirmed", "error": None})
+            elif res.error == "expired":
+                entries.append({**entry, "status": "expired"})
+            else:
+                entries.append({**entry, "status": "failed", "error": res.data.get("err")})
+        checkpoint.write(entries)
+
+    tracker = ConfirmationTracker(
+        nodes,
+        commitment=commitment,
+        poll_interval=poll_interval,
+        resend_interval=resend_interval,
+        on_resolved=write_resolved,
+        transport=transport,
+    )
+
+    def track(entry: dict):
+        with pending_lock:
+            pending[entry["signature"]] = entry
+        raw_tx = base64.b64decode(entry["raw_tx"])
+        tracker.track(entry["signature"], last_valid_block_height=entry["last_valid_block_height"], raw_tx=raw_tx)
+
+    started_at = time.monotonic()
+    send_seconds = 0.0
+    sent = 0
+
+    def send(entry: dict):
+        raw_tx = base64.b64decode(entry["raw_tx"])
+        solana_rpc.send_transaction(nodes, raw_tx, skip_preflight=True, transport=transport)
+
+    tracker.start()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # transactions which were signed before the interruption are sent again as is
+            in_flight = [e for r, e in checkpoint.state.items() if r in recipients and e["status"] == "sent"]
+            for entry in in_flight:
+                track(entry)
+            list(executor.map(send, in_flight))
+
+            for _ in range(max_rounds):
+                todo = [r for r in recipients if r not in checkpoint.state or checkpoint.state[r]["status"] == "expired"]
+                if not todo and not tracker.pending_count():
+                    break
+                for i in range(0, len(todo), window):
+                    window_started_at = time.monotonic()
+                    end = i + window
+                    entries = _sign_window(keypair, todo[i:end], recipients, blockhash_provider)
+                    checkpoint.write(entries)
+                    for entry in entries:
+                        track(entry)
+                    list(executor.map(send, entries))
+                    sent += len(entries)
+                    send_seconds += time.monotonic() - window_started_at
+                tracker.wait(confirm_timeout)
+    finally:
+        tracker.stop()
+
+    signatures: dict[str, str] = {}
+    errors: dict[str, str] = {}
+    for recipient in recipients:
+        state = checkpoint.state.get(recipient)
+        if state and state["status"] == "confirmed":
+            signatures[recipient] = state["signature"]
+        elif state and state["status"] == "failed":
+            errors[recipient] = f"failed: {state.get('error')}"
+        elif state:
+            errors[recipient] = f"not_confirmed: {state['status']}"
+        else:
+            errors[recipient] = "not_sent"
+    total_seconds = time.monotonic() - started_at
+    return PayoutReport(signatures=signatures, errors=errors, sent=sent, send_seconds=send_seconds, total_seconds=total_seconds)
+
+
+def _sign_window(
+    keypair,
+    window: list[str],
+    recipients: dict[str, int],
+    blockhash_provider: BlockhashProvider,
+) -> list[dict]:
+    res = blockhash_provider.get()
+    for _ in range(2):
+        if res.is_ok():
+            break
+        res = blockhash_provider.get()
+    if res.is_error():
+        raise RuntimeError(f"can't get a blockhash: {res.error}")
+
+    entries = []
+    for recipient in window:
+        tx = sign_transfer_transaction(keypair, [(recipient, recipients[recipient])], res.ok.blockhash)
+        entries.append(
+            {
+                "recipient": recipient,
+                "status": "sent",
+                "signature": tx.signature,
+                "raw_tx": base64.b64encode(tx.raw_tx).decode(),
+                "last_valid_block_height": res.ok.last_valid_block_height,
+            },
+        )
+    return entries
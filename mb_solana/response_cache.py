@@ -0,0 +1,255 @@
+"""Cache of RPC results, pass it as `cache` to rpc_call and the get_* functions.
+
+A result is looked up in memory (per-method TTL and LRU size), then in the disk store for immutable results: finalized
+transactions and blocks, leader schedules of an explicit slot. Identical calls in flight at the same time are coalesced: one
+caller fetches, the others wait for its result. Only ok results are cached, None results (not found) are never cached.
+
+A cache is keyed by method and params, not by node, so use one cache per cluster.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from mb_std import Result
+
+
+@dataclass
+class CachePolicy:
+    ttl: float | None  # seconds in memory, None is forever
+    max_size: int = 1000  # entries of the method in memory, the least recently used one is dropped
+    permanent: Callable[[list[Any], Any], bool] | None = None  # (params, result) -> True if it goes to the disk store
+    ttl_of: Callable[[list[Any]], float | None] | None = None  # params -> ttl of the call instead of ttl, 0 isn't cached
+
+    def call_ttl(self, params: list[Any]) -> float | None:
+        return self.ttl_of(params) if self.ttl_of else self.ttl
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0  # calls which waited for the same call in flight instead of fetching
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.disk_hits + self.misses + self.coalesced
+        return (self.hits + self.disk_hits + self.coalesced) / calls if calls else 0
+
+
+def is_finalized(params: list[Any], result: Any) -> bool:
+    """The request is at finalized commitment, the default one if it has no config"""
+    config = params[-1] if params and isinstance(params[-1], dict) else {}
+    return config.get("commitment", "finalized") == "finalized"
+
+
+def has_slot(params: list[Any], result: Any) -> bool:
+    """getLeaderSchedule of an explicit slot: a schedule doesn't change once it's known"""
+    return bool(params) and params[0] is not None
+
+
+def leader_schedule_ttl(params: list[Any]) -> float | None:
+    """The call without a slot is the schedule of the current epoch, it changes at the epoch rollover: it isn't cached"""
+    return 3600 if has_slot(params, None) else 0
+
+
+def finalized_ttl(params: list[Any]) -> float | None:
+    """A finalized result doesn't change, a confirmed one can still be rolled back: it's kept for a minute"""
+    return None if is_finalized(params, None) else 60
+
+
+DEFAULT_POLICIES: dict[str, CachePolicy] = {
+    "getEpochInfo": CachePolicy(ttl=1, max_size=10),
+    "getClusterNodes": CachePolicy(ttl=60, max_size=1),
+    "getVoteAccounts": CachePolicy(ttl=60, max_size=1),
+    "getLeaderSchedule": CachePolicy(ttl=3600, max_size=10, permanent=has_slot, ttl_of=leader_schedule_ttl),
+    "getTransaction": CachePolicy(ttl=None, max_size=10_000, permanent=is_finalized, ttl_of=finalized_ttl),
+    "getBlock": CachePolicy(ttl=None, max_size=20, permanent=is_finalized, ttl_of=finalized_ttl),
+}
+
+
+class ResponseCache:
+    """policies are merged into DEFAULT_POLICIES, methods without a policy aren't cached.
+    Set db_path to keep the immutable results in a sqlite file between restarts."""
+
+    def __init__(self, policies: dict[str, CachePolicy] | None = None, *, db_path: str | None = None):
+        self.policies = DEFAULT_POLICIES | (policies or {})
+        self.db_path = db_path
+        self._entries: dict[str, OrderedDict[str, tuple[float | None, Result]]] = {}
+        self._stats: dict[str, CacheStats] = {}
+        self._inflight: dict[tuple[str, str], Future] = {}
+        self._async_inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self._lock = threading.RLock()
+        self._db: sqlite3.Connection | None = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (method TEXT, params TEXT, result TEXT, PRIMARY KEY (method, params))"
+            )
+            self._db.commit()
+
+    def call(self, method: str, params: list[Any], fetch: Callable[[], Result]) -> Result:
+        policy = self.policies.get(method)
+        if policy is None or policy.call_ttl(params) == 0:
+            return fetch()
+        key = _key(params)
+        res = self._lookup(method, key)
+        if res is not None:
+            return res
+
+        with self._lock:
+            future = self._inflight.get((method, key))
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[(method, key)] = future
+            self._count(method, "misses" if owner else "coalesced")
+        if not owner:
+            return _copy(future.result())  # type:ignore
+
+        try:
+            res = fetch()
+            self._store(method, key, params, res, policy)
+        except BaseException as e:
+            res = Result(error=f"exception: {str(e)}")
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[(method, key)]
+            future.set_result(res)  # type:ignore
+        return res
+
+    async def acall(self, method: str, params: list[Any], fetch: Callable[[], Awaitable[Result]]) -> Result:
+        policy = self.policies.get(method)
+        if policy is None or policy.call_ttl(params) == 0:
+            return await fetch()
+        key = _key(params)
+        res = self._lookup(method, key)
+        if res is not None:
+            return res
+
+        future = self._async_inflight.get((method, key))
+        if future is not None:
+            self._count(method, "coalesced")
+            return _copy(await asyncio.shield(future))
+        future = asyncio.get_running_loop().create_future()
+        self._async_inflight[(method, key)] = future
+        self._count(method, "misses")
+        try:
+            res = await fetch()
+            self._store(method, key, params, res, policy)
+        except BaseException as e:
+            res = Result(error=f"exception: {str(e)}")
+            raise
+        finally:
+            del self._async_inflight[(method, key)]
+            future.set_result(res)
+        return res
+
+    def get(self, method: str, params: list[Any]) -> Result | None:
+        """The cached result or None, for callers which fetch by themselves, e.g. in batches. Store the result with put()."""
+        policy = self.policies.get(method)
+        if policy is None or policy.call_ttl(params) == 0:
+            return None
+        res = self._lookup(method, _key(params))
+        if res is None:
+            self._count(method, "misses")
+        return res
+
+    def put(self, method: str, params: list[Any], res: Result):
+        policy = self.policies.get(method)
+        if policy:
+            self._store(method, _key(params), params, res, policy)
+
+    def stats(self, method: str | None = None) -> CacheStats:
+        """Counters of the method, or the sum over all methods"""
+        with self._lock:
+            if method:
+                return CacheStats(**self._stats.get(method, CacheStats()).__dict__)
+            total = CacheStats()
+            for stats in self._stats.values():
+                total.hits += stats.hits
+                total.disk_hits += stats.disk_hits
+                total.misses += stats.misses
+                total.coalesced += stats.coalesced
+            return total
+
+    def invalidate(self, method: str | None = None):
+        """Drops the memory entries of the method, or all of them. The disk store is kept."""
+        with self._lock:
+            if method:
+                self._entries.pop(method, None)
+            else:
+                self._entries.clear()
+
+    def close(self):
+        with self._lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _lookup(self, method: str, key: str) -> Result | None:
+        with self._lock:
+            entries = self._entries.get(method)
+            entry = entries.get(key) if entries else None
+            if entry is not None:
+                expires_at, res = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    entries.move_to_end(key)  # type:ignore
+                    self._count(method, "hits")
+                    return _copy(res)
+                del entries[key]  # type:ignore
+
+            if self._db:
+                row = self._db.execute("SELECT result FROM responses WHERE method=? AND params=?", (method, key)).fetchone()
+                if row:
+                    res = Result(ok=json.loads(row[0]), data={"cache": "disk"})
+                    self._put(method, key, res, self.policies[method], self.policies[method].ttl)
+                    self._count(method, "disk_hits")
+                    return _copy(res)
+        return None
+
+    def _store(self, method: str, key: str, params: list[Any], res: Result, policy: CachePolicy):
+        ttl = policy.call_ttl(params)
+        if res.is_error() or res.ok is None or ttl == 0:
+            return
+        with self._lock:
+            self._put(method, key, res, policy, ttl)
+            if self._db and policy.permanent and policy.permanent(params, res.ok):
+                value = json.dumps(res.ok, separators=(",", ":"))
+                self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (method, key, value))
+                self._db.commit()
+
+    def _put(self, method: str, key: str, res: Result, policy: CachePolicy, ttl: float | None):
+        entries = self._entries.setdefault(method, OrderedDict())
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        entries[key] = (expires_at, _copy(res))
+        entries.move_to_end(key)
+        while len(entries) > policy.max_size:
+            entries.popitem(last=False)
+
+    def _count(self, method: str, counter: str):
+        with self._lock:
+            stats = self._stats.setdefault(method, CacheStats())
+            setattr(stats, counter, getattr(stats, counter) + 1)
+
+
+def _key(params: list[Any]) -> str:
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+
+def _copy(res: Result) -> Result:
+    """The parse_* functions replace res.ok, so every caller gets its own Result. The decoded json itself is shared."""
+    return Result(ok=res.ok, error=res.error, data=res.data)
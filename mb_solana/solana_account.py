@@ -1,4 +1,5 @@
-import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import base58
 import pydash
@@ -7,7 +8,11 @@ from nacl.public import PrivateKey
 from pydantic import BaseModel
 from solana.keypair import Keypair
 from solana.publickey import PublicKey
-from solana.rpc.api import Client
+
+from mb_solana import solana_rpc
+from mb_solana.hedge import Hedger
+from mb_solana.node_pool import NodePool, pick_node, report_node
+from mb_solana.transport import HttpTransport, get_solana_client
 
 
 class NewAccount(BaseModel):
@@ -61,22 +66,98 @@ def get_private_key_arr_str(private_key: str) -> str:
     return f"[{','.join(str(x) for x in get_private_key_arr(private_key))}]"
 
 
-def is_empty_account(*, address: str, node: str | None = None, nodes: list[str] | None = None, attempts=3) -> Result[bool]:
+def is_empty_account(
+    *,
+    address: str,
+    node: str | None = None,
+    nodes: list[str] | NodePool | None = None,
+    attempts=3,
+    transport: HttpTransport | None = None,
+    hedger: Hedger | None = None,
+) -> Result[bool]:
+    """Set hedger to send hedged requests to nodes on each attempt"""
     if not node and not nodes:
         raise ValueError("node or nodes must be set")
-    error = None
-    data = None
-    for _ in range(attempts):
+
+    def check(node_: str) -> Result[bool]:
         try:
-            client = Client(node or random.choice(nodes))  # type:ignore
-            res = client.get_account_info(PublicKey(address))
-            data = res
+            res = get_solana_client(node_, transport).get_account_info(PublicKey(address))
             slot = pydash.get(res, "result.context.slot")
             value = pydash.get(res, "result.value")
             if slot and value is None:
-                return Result(ok=True, data=data)
+                return Result(ok=True, data=res)
             if slot and value:
-                return Result(ok=False, data=data)
+                return Result(ok=False, data=res)
+            return Result(error="unknown response", data=res)
         except Exception as e:
-            error = str(e)
-    return Result(error=error or "unknown response", data=data)
+            return Result(error=str(e))
+
+    res = Result(error="unknown response")
+    for _ in range(attempts):
+        if hedger and nodes and not node:
+            res = hedger.call(nodes, check)
+        else:
+            node_ = node or pick_node(nodes)  # type:ignore
+            started_at = time.monotonic()
+            res = check(node_)
+            report_node(nodes, node_, started_at, res.is_ok())
+        if res.is_ok():
+            return res
+    return res
+
+
+def is_empty_account_batch(
+    *,
+    addresses: list[str],
+    node: str | NodePool,
+    batch_size=100,
+    timeout=10,
+    transport: HttpTransport | None = None,
+) -> dict[str, Result[bool]]:
+    """getAccountInfo calls are sent as JSON RPC batches, account data is not downloaded"""
+    params_config = {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}
+    calls = [("getAccountInfo", [address, params_config]) for address in addresses]
+    results = solana_rpc.rpc_batch_call(node=node, calls=calls, batch_size=batch_size, timeout=timeout, transport=transport)
+    return {address: parse_empty_account(res) for address, res in zip(addresses, results)}
+
+
+def parse_empty_account(res: Result) -> Result[bool]:
+    """Parses a getAccountInfo response"""
+    if res.is_error():
+        return res
+    if pydash.get(res.ok, "context.slot") and "value" in res.ok:
+        return Result(ok=res.ok["value"] is None, data=res.data)
+    return Result(error="unknown response", data=res.data)
+
+
+def are_empty_accounts(
+    addresses: list[str],
+    *,
+    nodes: str | list[str] | NodePool,
+    chunk_size=100,
+    concurrency=10,
+    attempts=3,
+    timeout=10,
+    transport: HttpTransport | None = None,
+) -> dict[str, Result[bool]]:
+    """Checks many accounts with getMultipleAccounts calls, chunk_size addresses per call, concurrency calls in parallel.
+    Account data is not downloaded."""
+
+    def check_chunk(chunk: list[str]) -> dict[str, Result[bool]]:
+        res: Result = Result(error="unknown response")
+        for _ in range(attempts):
+            res = solana_rpc.get_multiple_accounts(nodes, chunk, data_slice=(0, 0), timeout=timeout, transport=transport)
+            if res.is_ok() and len(res.ok) == len(chunk):
+                return {address: Result(ok=value is None) for address, value in zip(chunk, res.ok)}
+        error = res.error if res.is_error() else "unknown response"
+        return {address: Result(error=error, data=res.data) for address in chunk}
+
+    chunks = []
+    for i in range(0, len(addresses), chunk_size):
+        end = i + chunk_size
+        chunks.append(addresses[i:end])
+    result: dict[str, Result[bool]] = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for chunk_result in executor.map(check_chunk, chunks):
+            result.update(chunk_result)
+    return result
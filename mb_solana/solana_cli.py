@@ -1,14 +1,18 @@
+import base64
 import json
 import os
 import random
+import secrets
 from decimal import Decimal
-from typing import Literal
+from typing import Callable, Literal
 
 import pydash
 from mb_std import Result, md, shell
 from mb_std.shell import CommandResult
 from pydantic import BaseModel, Field, validator
 
+from mb_solana.ssh import SshSession
+
 
 class ValidatorInfo(BaseModel):
     identity_address: str
@@ -57,14 +61,22 @@ def get_balance(
     url="localhost",
     ssh_host: str | None = None,
     ssh_key_path: str | None = None,
+    ssh_session: SshSession | None = None,
     timeout=60,
 ) -> Result[Decimal]:
-    solana_dir = _solana_dir(solana_dir)
-    cmd = f"{solana_dir}solana balance {address} -u {url}"
-    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout)
-    data = md(cmd, res.stdout, res.stderr)
+    cmd = _balance_cmd(address, solana_dir, url)
+    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout, ssh_session)
+    return _parse_balance(cmd, res.stdout, res.stderr)
+
+
+def _balance_cmd(address: str, solana_dir: str, url: str) -> str:
+    return f"{_solana_dir(solana_dir)}solana balance {address} -u {url}"
+
+
+def _parse_balance(cmd: str, stdout: str, stderr: str) -> Result[Decimal]:
+    data = md(cmd, stdout, stderr)
     try:
-        return Result(ok=Decimal(res.stdout.replace("SOL", "").strip()), data=data)
+        return Result(ok=Decimal(stdout.replace("SOL", "").strip()), data=data)
     except Exception as e:
         return Result(error=str(e), data=data)
 
@@ -76,14 +88,22 @@ def get_stake_account(
     url="localhost",
     ssh_host: str | None = None,
     ssh_key_path: str | None = None,
+    ssh_session: SshSession | None = None,
     timeout=60,
 ) -> Result[StakeAccount]:
-    solana_dir = _solana_dir(solana_dir)
-    cmd = f"{solana_dir}solana stake-account --output json -u {url} {address}"
-    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout)
-    data = md(cmd, res.stdout, res.stderr)
+    cmd = _stake_account_cmd(address, solana_dir, url)
+    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout, ssh_session)
+    return _parse_stake_account(cmd, res.stdout, res.stderr)
+
+
+def _stake_account_cmd(address: str, solana_dir: str, url: str) -> str:
+    return f"{_solana_dir(solana_dir)}solana stake-account --output json -u {url} {address}"
+
+
+def _parse_stake_account(cmd: str, stdout: str, stderr: str) -> Result[StakeAccount]:
+    data = md(cmd, stdout, stderr)
     try:
-        json_res = json.loads(res.stdout)
+        json_res = json.loads(stdout)
         return Result(ok=StakeAccount(**json_res), data=data)
     except Exception as e:
         return Result(error=str(e), data=data)
@@ -99,6 +119,7 @@ def transfer_with_private_key_file(
     url="localhost",
     ssh_host: str | None = None,
     ssh_key_path: str | None = None,
+    ssh_session: SshSession | None = None,
     allow_unfunded_recipient=True,
     timeout=60,
 ) -> Result[str]:
@@ -107,7 +128,7 @@ def transfer_with_private_key_file(
     if allow_unfunded_recipient:
         cmd += " --allow-unfunded-recipient"
     cmd += f" -u {url} --output json"
-    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout)
+    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout, ssh_session)
     data = md(cmd, res.stdout, res.stderr)
     try:
         json_res = json.loads(res.stdout)
@@ -126,6 +147,7 @@ def transfer_with_private_key_str(
     url="localhost",
     ssh_host: str | None = None,
     ssh_key_path: str | None = None,
+    ssh_session: SshSession | None = None,
     timeout=60,
 ) -> Result[str]:
     # make private_key file
@@ -142,6 +164,7 @@ def transfer_with_private_key_str(
             url=url,
             ssh_host=ssh_host,
             ssh_key_path=ssh_key_path,
+            ssh_session=ssh_session,
             timeout=timeout,
         )
     finally:
@@ -158,11 +181,12 @@ def withdraw_from_vote_account(
     url="localhost",
     ssh_host: str | None = None,
     ssh_key_path: str | None = None,
+    ssh_session: SshSession | None = None,
     timeout=60,
 ) -> Result[str]:
     solana_dir = _solana_dir(solana_dir)
     cmd = f"{solana_dir}solana withdraw-from-vote-account --keypair {fee_payer_key_path} -u {url} --output json {vote_key_path} {recipient} {amount}"  # noqa
-    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout)
+    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout, ssh_session)
     data = md(cmd, res.stdout, res.stderr)
     try:
         json_res = json.loads(res.stdout)
@@ -177,11 +201,12 @@ def get_validators_info(
     url="localhost",
     ssh_host: str | None = None,
     ssh_key_path: str | None = None,
+    ssh_session: SshSession | None = None,
     timeout=60,
 ) -> Result[list[ValidatorInfo]]:
     solana_dir = _solana_dir(solana_dir)
     cmd = f"{solana_dir}solana validator-info get --output json -u {url}"
-    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout)
+    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout, ssh_session)
     data = md(cmd, res.stdout, res.stderr)
     try:
         validators = []
@@ -208,17 +233,26 @@ def get_vote_account_rewards(
     url="localhost",
     ssh_host: str | None = None,
     ssh_key_path: str | None = None,
+    ssh_session: SshSession | None = None,
     num_rewards_epochs=10,
     timeout=60,
 ) -> Result[dict[int, float]]:
+    cmd = _vote_account_rewards_cmd(address, num_rewards_epochs, solana_dir, url)
+    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout, ssh_session)
+    return _parse_vote_account_rewards(cmd, res.stdout, res.stderr)
+
+
+def _vote_account_rewards_cmd(address: str, num_rewards_epochs: int, solana_dir: str, url: str) -> str:
     solana_dir = _solana_dir(solana_dir)
     cmd = f"{solana_dir}solana vote-account {address} --with-rewards --num-rewards-epochs={num_rewards_epochs} -u {url}"
-    cmd += " --output json 2>/dev/null"
-    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout)
-    data = md(cmd, res.stdout, res.stderr)
+    return cmd + " --output json 2>/dev/null"
+
+
+def _parse_vote_account_rewards(cmd: str, stdout: str, stderr: str) -> Result[dict[int, float]]:
+    data = md(cmd, stdout, stderr)
     try:
         rewards: dict[int, float] = {}
-        for r in reversed(json.loads(res.stdout)["epochRewards"]):
+        for r in reversed(json.loads(stdout)["epochRewards"]):
             rewards[r["epoch"]] = r["amount"] / 10**9
         return Result(ok=rewards, data=data)
     except Exception as e:
@@ -232,11 +266,12 @@ def get_stakes(
     url="localhost",
     ssh_host: str | None = None,
     ssh_key_path: str | None = None,
+    ssh_session: SshSession | None = None,
     timeout=60,
 ) -> Result[list[Stake]]:
     solana_dir = _solana_dir(solana_dir)
     cmd = f"{solana_dir}solana stakes --output json -u {url} {vote_address}"
-    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout)
+    res = _exec_cmd(cmd, ssh_host, ssh_key_path, timeout, ssh_session)
     data = {"stdout": res.stdout, "stderr": res.stderr}
     try:
         return Result(ok=[Stake(**x) for x in json.loads(res.stdout)], data=data)
@@ -244,7 +279,106 @@ def get_stakes(
         return Result(error=str(e), data=data)
 
 
-def _exec_cmd(cmd: str, ssh_host: str | None, ssh_key_path: str | None, timeout: int) -> CommandResult:
+class CliBatch:
+    """Many solana_cli queries in one remote script: one SSH round trip, the commands run on the host at the same time.
+
+    Queue queries with get_balance, get_stake_account and get_vote_account_rewards, then run() returns their results in the
+    same order and of the same types as the functions of this module. Up to `parallel` commands run at the same time. Each
+    output is framed with a random boundary line, so it's parsed back separately.
+    """
+
+    def __init__(
+        self,
+        *,
+        solana_dir="",
+        url="localhost",
+        ssh_host: str | None = None,
+        ssh_key_path: str | None = None,
+        ssh_session: SshSession | None = None,
+        parallel=16,
+        timeout=120,
+    ):
+        self.solana_dir = solana_dir
+        self.url = url
+        self.ssh_host = ssh_host
+        self.ssh_key_path = ssh_key_path
+        self.ssh_session = ssh_session
+        self.parallel = parallel
+        self.timeout = timeout
+        self.queries: list[tuple[str, Callable[[str, str, str], Result]]] = []
+
+    def get_balance(self, address: str) -> "CliBatch":
+        self.queries.append((_balance_cmd(address, self.solana_dir, self.url), _parse_balance))
+        return self
+
+    def get_stake_account(self, address: str) -> "CliBatch":
+        self.queries.append((_stake_account_cmd(address, self.solana_dir, self.url), _parse_stake_account))
+        return self
+
+    def get_vote_account_rewards(self, address: str, num_rewards_epochs=10) -> "CliBatch":
+        cmd = _vote_account_rewards_cmd(address, num_rewards_epochs, self.solana_dir, self.url)
+        self.queries.append((cmd, _parse_vote_account_rewards))
+        return self
+
+    def script(self, boundary: str) -> str:
+        """sh script which runs the queries in the background, waits for them and prints the framed outputs"""
+        lines = ["d=$(mktemp -d) || exit 1"]
+        for i, (cmd, _) in enumerate(self.queries):
+            lines.append(f'( {cmd} ) >"$d/{i}.out" 2>"$d/{i}.err" &')
+            if (i + 1) % self.parallel == 0:
+                lines.append("wait")
+        lines.append("wait")
+        for i in range(len(self.queries)):
+            lines.append(f'echo "{boundary} {i} out"; cat "$d/{i}.out"; echo; echo "{boundary} {i} err"; cat "$d/{i}.err"; echo')
+        lines.append('rm -rf "$d"')
+        return "\n".join(lines)
+
+    def run(self) -> list[Result]:
+        if not self.queries:
+            return []
+        boundary = f"--mb-solana-{secrets.token_hex(8)}--"
+        # base64 keeps the script intact whatever quoting the ssh command line uses
+        script = base64.b64encode(self.script(boundary).encode()).decode()
+        cmd = f"echo {script} | base64 -d | sh"
+        res = _exec_cmd(cmd, self.ssh_host, self.ssh_key_path, self.timeout, self.ssh_session)
+        outputs = parse_framed_output(res.stdout, boundary)
+        results = []
+        for i, (cmd, parse) in enumerate(self.queries):
+            if i not in outputs:
+                results.append(Result(error="no_output", data={"cmd": cmd, "stdout": res.stdout, "stderr": res.stderr}))
+                continue
+            stdout, stderr = outputs[i]
+            results.append(parse(cmd, stdout, stderr))
+        return results
+
+
+def parse_framed_output(output: str, boundary: str) -> dict[int, tuple[str, str]]:
+    """{query index: (stdout, stderr)} of a CliBatch script output"""
+    result: dict[int, list[str]] = {}
+    current: list[str] | None = None
+    current_stream = 0
+    for line in output.splitlines(keepends=True):
+        if line.startswith(boundary + " "):
+            index, stream = line.split()[1:3]
+            current = result.setdefault(int(index), ["", ""])
+            current_stream = 0 if stream == "out" else 1
+            continue
+        if current is not None:
+            current[current_stream] += line
+    # the script adds a newline after each output, so an output without a trailing newline is framed too
+    return {i: (out[:-1], err[:-1]) for i, (out, err) in result.items()}
+
+
+def _exec_cmd(
+    cmd: str,
+    ssh_host: str | None,
+    ssh_key_path: str | None,
+    timeout: int,
+    ssh_session: SshSession | None = None,
+) -> CommandResult:
+    """ssh_session runs the command over its persistent connection, ssh_host and ssh_key_path are ignored then"""
+    if ssh_session:
+        return ssh_session.run(cmd, timeout=timeout)
     if ssh_host:
         return shell.run_ssh_command(ssh_host, cmd, ssh_key_path, timeout=timeout)
     return shell.run_command(cmd, timeout=timeout)
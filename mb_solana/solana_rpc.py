@@ -1,8 +1,22 @@
+import base64
+import time
+from array import array
+from dataclasses import dataclass
 from typing import Any
 
 from mb_std import Result, hr, md
 from pydantic import BaseModel, Field
 
+from mb_solana.hedge import Hedger
+from mb_solana.jsonrpc import parse_rpc_response
+from mb_solana.node_pool import NodePool, is_node_ok, pick_node, report_node
+from mb_solana.response_cache import ResponseCache
+from mb_solana.transport import HttpTransport
+
+# a node answers only pubsub methods over ws, they need a long-lived connection
+WS_CALL_ERROR = "ws nodes answer only subscriptions, use ws.WsClient"
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCr5uh6xtWj8Ap7DoNbNHk"
+
 
 class EpochInfo(BaseModel):
     epoch: int
@@ -49,12 +63,140 @@ class BlockProduction(BaseModel):
     leaders: list[Leader]
 
 
-def rpc_call(*, node: str, method: str, params: list[Any], id_=1, timeout=10, proxy=None) -> Result:
+class LatestBlockhash(BaseModel):
+    blockhash: str
+    last_valid_block_height: int = Field(..., alias="lastValidBlockHeight")
+
+
+class SignatureInfo(BaseModel):
+    signature: str
+    slot: int
+    err: Any | None
+    memo: str | None
+    block_time: int | None = Field(..., alias="blockTime")
+
+
+# Compact versions of the models above, parse_* functions return them with compact=True. They are built without validation and
+# take less memory: numbers of a list are stored in one array. to_model() converts them to the pydantic models.
+
+
+@dataclass(slots=True)
+class CompactClusterNode:
+    pubkey: str
+    version: str | None
+    gossip: str | None
+    rpc: str | None
+
+    def to_model(self) -> ClusterNode:
+        return ClusterNode(pubkey=self.pubkey, version=self.version, gossip=self.gossip, rpc=self.rpc)
+
+
+@dataclass(slots=True)
+class CompactVoteAccount:
+    validator: str
+    vote: str
+    commission: int
+    stake: int
+    credits: array  # epoch, credits, previous_credits of each epoch, one after another
+    epoch_vote_account: bool
+    root_slot: int
+    last_vote: int
+    delinquent: bool
+
+    def epoch_credits(self) -> list[tuple[int, int, int]]:
+        c = self.credits
+        return [(c[i], c[i + 1], c[i + 2]) for i in range(0, len(c), 3)]
+
+    def to_model(self) -> VoteAccount:
+        return VoteAccount(
+            validator=self.validator,
+            vote=self.vote,
+            commission=self.commission,
+            stake=self.stake,
+            credits=[VoteAccount.EpochCredits(epoch=e, credits=c, previous_credits=p) for e, c, p in self.epoch_credits()],
+            epoch_vote_account=self.epoch_vote_account,
+            root_slot=self.root_slot,
+            last_vote=self.last_vote,
+            delinquent=self.delinquent,
+        )
+
+
+@dataclass(slots=True)
+class CompactBlockProduction:
+    slot: int
+    first_slot: int
+    last_slot: int
+    addresses: list[str]  # leaders, produced[i] and skipped[i] are the numbers of addresses[i]
+    produced: array
+    skipped: array
+
+    def to_model(self) -> BlockProduction:
+        rows = zip(self.addresses, self.produced, self.skipped)
+        leaders = [BlockProduction.Leader(address=a, produced=p, skipped=s) for a, p, s in rows]
+        return BlockProduction(slot=self.slot, first_slot=self.first_slot, last_slot=self.last_slot, leaders=leaders)
+
+
+def rpc_call(
+    *,
+    node: str | list[str] | NodePool,
+    method: str,
+    params: list[Any],
+    id_=1,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    hedger: Hedger | None = None,
+    raw=False,
+    cache: ResponseCache | None = None,
+) -> Result:
+    """node can be a list of nodes or a NodePool. Set hedger to send hedged requests to them, use it for read-only calls only.
+
+    Set raw to get the response body as bytes and decode it yourself, the JSON RPC error isn't checked then. It needs a transport.
+    Set cache to reuse the results of the methods it has a policy for, raw calls aren't cached.
+    """
+    if raw and not transport:
+        raise ValueError("raw needs a transport")
+    if cache and not raw:
+        return cache.call(
+            method,
+            params,
+            lambda: rpc_call(
+                node=node,
+                method=method,
+                params=params,
+                id_=id_,
+                timeout=timeout,
+                proxy=proxy,
+                transport=transport,
+                hedger=hedger,
+            ),
+        )
+
+    def call(n: str) -> Result:
+        return rpc_call(node=n, method=method, params=params, id_=id_, timeout=timeout, proxy=proxy, transport=transport, raw=raw)
+
+    if hedger and not isinstance(node, str):
+        return hedger.call(node, call)
+    if isinstance(node, NodePool):
+        return node.call(call)
+    node = pick_node(node)
     data = {"jsonrpc": "2.0", "method": method, "params": params, "id": id_}
     if node.startswith("http"):
+        if transport:
+            return _transport_call(transport, node, data, timeout, proxy, raw)
         return _http_call(node, data, timeout, proxy)
     else:
-        raise NotImplementedError("ws is not implemented")
+        return Result(error=WS_CALL_ERROR, data={"node": node})
+
+
+def _transport_call(transport: HttpTransport, node: str, data: dict, timeout: int, proxy: str | None, raw=False) -> Result:
+    res = transport.post(node, data, timeout, proxy, raw)
+    if res.is_error() or raw:
+        return res
+    try:
+        return parse_rpc_response(res.ok, res.data)
+    except Exception as e:
+        return Result(error=f"exception: {str(e)}", data=res.data)
 
 
 def _http_call(node: str, data: dict, timeout: int, proxy: str | None) -> Result:
@@ -74,10 +216,145 @@ def _http_call(node: str, data: dict, timeout: int, proxy: str | None) -> Result
         return res.to_error(f"exception: {str(e)}")
 
 
-def get_balance(node: str, address: str, timeout=10, proxy=None) -> Result[int]:
+def rpc_batch_call(
+    *,
+    node: str | NodePool,
+    calls: list[tuple[str, list[Any]]],
+    batch_size=100,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> list[Result]:
+    """Sends (method, params) calls as JSON RPC batches, batch_size calls per POST.
+    Returns a result for each call, in the same order as calls."""
+    results: list[Result] = []
+    for i in range(0, len(calls), batch_size):
+        end = i + batch_size
+        chunk = calls[i:end]
+        data = [{"jsonrpc": "2.0", "method": method, "params": params, "id": id_} for id_, (method, params) in enumerate(chunk)]
+        node_ = node.pick() if isinstance(node, NodePool) else node
+        if not node_.startswith("http"):
+            results.extend(Result(error="batch calls are not supported over ws", data={"node": node_}) for _ in chunk)
+            continue
+        started_at = time.monotonic()
+        batch_results = _http_batch_call(node_, data, timeout, proxy, transport)
+        report_node(node, node_, started_at, any(is_node_ok(r) for r in batch_results))
+        results.extend(batch_results)
+    return results
+
+
+def _http_batch_call(
+    node: str,
+    data: list[dict],
+    timeout: int,
+    proxy: str | None,
+    transport: HttpTransport | None,
+) -> list[Result]:
+    if transport:
+        res = transport.post(node, data, timeout, proxy)
+        if res.is_error():
+            return [Result(error=res.error, data=res.data) for _ in data]
+        response = res.ok
+    else:
+        http_res = hr(node, method="POST", proxy=proxy, timeout=timeout, params=data, json_params=True)  # type:ignore
+        if http_res.is_error():
+            return [http_res.to_error() for _ in data]
+        try:
+            response = http_res.json
+        except Exception as e:
+            return [http_res.to_error(f"exception: {str(e)}") for _ in data]
+    return parse_rpc_batch_response(data, response)
+
+
+def parse_rpc_batch_response(data: list[dict], response: Any) -> list[Result]:
+    if not isinstance(response, list):
+        err = response.get("error", {}).get("message", "") if isinstance(response, dict) else ""
+        error = f"service_error: {err}" if err else "unknown_response"
+        return [Result(error=error, data=response) for _ in data]
+
+    responses = {r.get("id"): r for r in response if isinstance(r, dict)}
+    results = []
+    for request in data:
+        item = responses.get(request["id"])
+        if item is None:
+            results.append(Result(error="no_response", data={"request": request}))
+            continue
+        try:
+            results.append(parse_rpc_response(item, item))
+        except Exception as e:
+            results.append(Result(error=f"exception: {str(e)}", data=item))
+    return results
+
+
+def get_balance(
+    node: str | list[str] | NodePool,
+    address: str,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    hedger: Hedger | None = None,
+) -> Result[int]:
     """Returns balance in lamports"""
     params = [address]
-    res = rpc_call(node=node, method="getBalance", params=params, timeout=timeout, proxy=proxy)
+    res = rpc_call(
+        node=node,
+        method="getBalance",
+        params=params,
+        timeout=timeout,
+        proxy=proxy,
+        transport=transport,
+        hedger=hedger,
+    )
+    return parse_balance(res)
+
+
+def parse_balance(res: Result) -> Result[int]:
+    if res.is_error():
+        return res
+    try:
+        res.ok = res.ok["value"]
+        return res
+    except Exception as e:
+        return Result(error=f"exception: {str(e)}", data=res.dict())
+
+
+def get_balance_batch(
+    node: str | NodePool,
+    addresses: list[str],
+    batch_size=100,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> dict[str, Result[int]]:
+    """Returns balances in lamports, getBalance calls are sent as JSON RPC batches"""
+    calls = [("getBalance", [address]) for address in addresses]
+    results = rpc_batch_call(node=node, calls=calls, batch_size=batch_size, timeout=timeout, proxy=proxy, transport=transport)
+    return {address: parse_balance(res) for address, res in zip(addresses, results)}
+
+
+def get_multiple_accounts(
+    node: str | list[str] | NodePool,
+    addresses: list[str],
+    encoding="base64",
+    data_slice: tuple[int, int] | None = None,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> Result[list[dict | None]]:
+    """getMultipleAccounts method, up to 100 addresses. data_slice is (offset, length) of the account data to return."""
+    params = multiple_accounts_params(addresses, encoding, data_slice)
+    res = rpc_call(node=node, method="getMultipleAccounts", params=params, timeout=timeout, proxy=proxy, transport=transport)
+    return parse_multiple_accounts(res)
+
+
+def multiple_accounts_params(addresses: list[str], encoding: str, data_slice: tuple[int, int] | None) -> list[Any]:
+    config: dict[str, Any] = {"encoding": encoding}
+    if data_slice:
+        config["dataSlice"] = {"offset": data_slice[0], "length": data_slice[1]}
+    return [addresses, config]
+
+
+def parse_multiple_accounts(res: Result) -> Result[list[dict | None]]:
     if res.is_error():
         return res
     try:
@@ -87,8 +364,70 @@ def get_balance(node: str, address: str, timeout=10, proxy=None) -> Result[int]:
         return Result(error=f"exception: {str(e)}", data=res.dict())
 
 
-def get_slot(node: str, timeout=10, proxy=None) -> Result[int]:
-    res = rpc_call(node=node, method="getSlot", params=[], timeout=timeout, proxy=proxy)
+def get_program_accounts(
+    node: str | list[str] | NodePool,
+    program_id: str,
+    filters: list[dict] | None = None,
+    encoding="base64",
+    data_slice: tuple[int, int] | None = None,
+    timeout=60,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> Result[list[dict]]:
+    """getProgramAccounts method, returns [{"pubkey": ..., "account": ...}]. filters are dataSize/memcmp filters of the RPC."""
+    params = program_accounts_params(program_id, filters, encoding, data_slice)
+    return rpc_call(node=node, method="getProgramAccounts", params=params, timeout=timeout, proxy=proxy, transport=transport)
+
+
+def program_accounts_params(
+    program_id: str, filters: list[dict] | None, encoding: str, data_slice: tuple[int, int] | None
+) -> list[Any]:
+    config: dict[str, Any] = {"encoding": encoding}
+    if filters:
+        config["filters"] = filters
+    if data_slice:
+        config["dataSlice"] = {"offset": data_slice[0], "length": data_slice[1]}
+    return [program_id, config]
+
+
+def get_token_accounts_by_owner(
+    node: str | list[str] | NodePool,
+    owner_address: str,
+    mint: str | None = None,
+    program_id: str = TOKEN_PROGRAM_ID,
+    encoding="jsonParsed",
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> Result[list[dict]]:
+    """getTokenAccountsByOwner method. Filters by mint if it's set, otherwise by program_id."""
+    params = [owner_address, {"mint": mint} if mint else {"programId": program_id}, {"encoding": encoding}]
+    res = rpc_call(node=node, method="getTokenAccountsByOwner", params=params, timeout=timeout, proxy=proxy, transport=transport)
+    return parse_token_accounts_by_owner(res)
+
+
+def parse_token_accounts_by_owner(res: Result) -> Result[list[dict]]:
+    if res.is_error():
+        return res
+    try:
+        res.ok = res.ok["value"]
+        return res
+    except Exception as e:
+        return Result(error=f"exception: {str(e)}", data=res.dict())
+
+
+def get_slot(
+    node: str | list[str] | NodePool,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    hedger: Hedger | None = None,
+) -> Result[int]:
+    res = rpc_call(node=node, method="getSlot", params=[], timeout=timeout, proxy=proxy, transport=transport, hedger=hedger)
+    return parse_slot(res)
+
+
+def parse_slot(res: Result) -> Result[int]:
     if res.is_error():
         return res
     try:
@@ -98,10 +437,31 @@ def get_slot(node: str, timeout=10, proxy=None) -> Result[int]:
         return Result(error=f"exception: {str(e)}", data=res.dict())
 
 
-def get_epoch_info(node: str, epoch: int | None = None, timeout=10, proxy=None) -> Result[EpochInfo]:
+def get_epoch_info(
+    node: str | list[str] | NodePool,
+    epoch: int | None = None,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    hedger: Hedger | None = None,
+    cache: ResponseCache | None = None,
+) -> Result[EpochInfo]:
     """getEpochInfo method"""
     params = [epoch] if epoch else []
-    res = rpc_call(node=node, method="getEpochInfo", params=params, timeout=timeout, proxy=proxy)
+    res = rpc_call(
+        node=node,
+        method="getEpochInfo",
+        params=params,
+        timeout=timeout,
+        proxy=proxy,
+        transport=transport,
+        hedger=hedger,
+        cache=cache,
+    )
+    return parse_epoch_info(res)
+
+
+def parse_epoch_info(res: Result) -> Result[EpochInfo]:
     if res.is_error():
         return res
     try:
@@ -111,56 +471,67 @@ def get_epoch_info(node: str, epoch: int | None = None, timeout=10, proxy=None)
         return Result(error=f"exception: {str(e)}", data=res.dict())
 
 
-def get_cluster_nodes(node: str, timeout=30, proxy=None) -> Result[list[ClusterNode]]:
-    res = rpc_call(node=node, method="getClusterNodes", timeout=timeout, proxy=proxy, params=[])
+def get_cluster_nodes(
+    node: str | NodePool,
+    timeout=30,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    compact=False,
+    cache: ResponseCache | None = None,
+) -> Result[list[ClusterNode]] | Result[list[CompactClusterNode]]:
+    res = rpc_call(node=node, method="getClusterNodes", timeout=timeout, proxy=proxy, transport=transport, params=[], cache=cache)
+    return parse_cluster_nodes(res, compact)
+
+
+def parse_cluster_nodes(res: Result, compact=False) -> Result[list[ClusterNode]] | Result[list[CompactClusterNode]]:
     if res.is_error():
         return res
     try:
-        res.ok = [ClusterNode(**n) for n in res.ok]
+        if compact:
+            res.ok = [CompactClusterNode(n["pubkey"], n.get("version"), n.get("gossip"), n.get("rpc")) for n in res.ok]
+        else:
+            res.ok = [ClusterNode(**n) for n in res.ok]
         return res
     except Exception as e:
         return Result(error=f"exception: {str(e)}", data=res.dict())
 
 
-def get_vote_accounts(node: str, timeout=30, proxy=None) -> Result[list[VoteAccount]]:
-    res = rpc_call(node=node, method="getVoteAccounts", timeout=timeout, proxy=proxy, params=[])
+def get_vote_accounts(
+    node: str | NodePool,
+    timeout=30,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    compact=False,
+    cache: ResponseCache | None = None,
+) -> Result[list[VoteAccount]] | Result[list[CompactVoteAccount]]:
+    res = rpc_call(node=node, method="getVoteAccounts", timeout=timeout, proxy=proxy, transport=transport, params=[], cache=cache)
+    return parse_vote_accounts(res, compact)
+
+
+def parse_vote_accounts(res: Result, compact=False) -> Result[list[VoteAccount]] | Result[list[CompactVoteAccount]]:
     if res.is_error():
         return res
     try:
-
-        result: list[VoteAccount] = []
-        for a in res.ok["current"]:
-            result.append(
-                VoteAccount(
+        result: list = []
+        for delinquent in (False, True):
+            for a in res.ok["delinquent" if delinquent else "current"]:
+                fields = dict(
                     validator=a["nodePubkey"],
                     vote=a["votePubkey"],
                     commission=a["commission"],
                     stake=a["activatedStake"],
-                    credits=[
-                        VoteAccount.EpochCredits(epoch=c[0], credits=c[1], previous_credits=c[2]) for c in a["epochCredits"]
-                    ],
-                    delinquent=False,
+                    delinquent=delinquent,
                     epoch_vote_account=a["epochVoteAccount"],
                     root_slot=a["rootSlot"],
                     last_vote=a["lastVote"],
-                ),
-            )
-        for a in res.ok["delinquent"]:
-            result.append(
-                VoteAccount(
-                    validator=a["nodePubkey"],
-                    vote=a["votePubkey"],
-                    commission=a["commission"],
-                    stake=a["activatedStake"],
-                    credits=[
+                )
+                if compact:
+                    result.append(CompactVoteAccount(credits=array("Q", [x for c in a["epochCredits"] for x in c]), **fields))
+                else:
+                    credits = [
                         VoteAccount.EpochCredits(epoch=c[0], credits=c[1], previous_credits=c[2]) for c in a["epochCredits"]
-                    ],
-                    delinquent=True,
-                    epoch_vote_account=a["epochVoteAccount"],
-                    root_slot=a["rootSlot"],
-                    last_vote=a["lastVote"],
-                ),
-            )
+                    ]
+                    result.append(VoteAccount(credits=credits, **fields))
         res.ok = result
 
         return res
@@ -168,31 +539,240 @@ def get_vote_accounts(node: str, timeout=30, proxy=None) -> Result[list[VoteAcco
         return Result(error=f"exception: {str(e)}", data=res.dict())
 
 
-def get_leader_scheduler(node: str, slot: int | None = None, timeout=10, proxy=None) -> Result[dict[str, list[int]]]:
-    res = rpc_call(node=node, method="getLeaderSchedule", timeout=timeout, proxy=proxy, params=[slot])
+def get_leader_scheduler(
+    node: str | list[str] | NodePool,
+    slot: int | None = None,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    cache: ResponseCache | None = None,
+) -> Result[dict[str, list[int]]]:
+    params = [slot]
+    return rpc_call(
+        node=node,
+        method="getLeaderSchedule",
+        params=params,
+        timeout=timeout,
+        proxy=proxy,
+        transport=transport,
+        cache=cache,
+    )
+
+
+def get_block_production(
+    node: str | list[str] | NodePool,
+    timeout=60,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    compact=False,
+    first_slot: int | None = None,
+    last_slot: int | None = None,
+    identity: str | None = None,
+) -> Result[BlockProduction] | Result[CompactBlockProduction]:
+    """By default it's the current epoch up to the latest slot. Set first_slot to get a slot range, last_slot defaults to
+    the latest slot. Set identity to get only this leader."""
+    params = block_production_params(first_slot, last_slot, identity)
+    res = rpc_call(node=node, method="getBlockProduction", timeout=timeout, proxy=proxy, transport=transport, params=params)
+    return parse_block_production(res, compact)
+
+
+def block_production_params(first_slot: int | None = None, last_slot: int | None = None, identity: str | None = None) -> list:
+    config: dict[str, Any] = {}
+    if first_slot is not None:
+        config["range"] = {"firstSlot": first_slot}
+        if last_slot is not None:
+            config["range"]["lastSlot"] = last_slot
+    if identity:
+        config["identity"] = identity
+    return [config] if config else []
+
+
+def parse_block_production(res: Result, compact=False) -> Result[BlockProduction] | Result[CompactBlockProduction]:
+    if res.is_error():
+        return res
+    try:
+        slot = res.ok["context"]["slot"]
+        first_slot = res.ok["value"]["range"]["firstSlot"]
+        last_slot = res.ok["value"]["range"]["lastSlot"]
+        if compact:
+            by_identity = res.ok["value"]["byIdentity"]
+            produced = array("Q", (p for _, p in by_identity.values()))
+            skipped = array("Q", (leader - p for leader, p in by_identity.values()))
+            return Result(ok=CompactBlockProduction(slot, first_slot, last_slot, list(by_identity), produced, skipped))
+        leaders = []
+        for address, (leader, produced) in res.ok["value"]["byIdentity"].items():
+            leaders.append(BlockProduction.Leader(address=address, produced=produced, skipped=leader - produced))
+        return Result(ok=BlockProduction(**md(slot, first_slot, last_slot, leaders)))
+    except Exception as e:
+        return Result(error=f"exception: {str(e)}", data=res.dict())
+
+
+def get_transaction(
+    node: str | list[str] | NodePool,
+    signature: str,
+    encoding="json",
+    timeout=60,
+    proxy=None,
+    transport: HttpTransport | None = None,
+    hedger: Hedger | None = None,
+    cache: ResponseCache | None = None,
+) -> Result[dict | None]:
+    params = [signature, encoding]
+    return rpc_call(
+        node=node,
+        method="getTransaction",
+        timeout=timeout,
+        proxy=proxy,
+        transport=transport,
+        hedger=hedger,
+        params=params,
+        cache=cache,
+    )
+
+
+def get_transaction_batch(
+    node: str | NodePool,
+    signatures: list[str],
+    encoding="json",
+    batch_size=100,
+    timeout=60,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> dict[str, Result[dict | None]]:
+    calls = [("getTransaction", [signature, encoding]) for signature in signatures]
+    results = rpc_batch_call(node=node, calls=calls, batch_size=batch_size, timeout=timeout, proxy=proxy, transport=transport)
+    return dict(zip(signatures, results))
+
+
+def get_latest_blockhash(
+    node: str | list[str] | NodePool,
+    commitment="finalized",
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> Result[LatestBlockhash]:
+    params = [{"commitment": commitment}]
+    res = rpc_call(node=node, method="getLatestBlockhash", params=params, timeout=timeout, proxy=proxy, transport=transport)
+    return parse_latest_blockhash(res)
+
+
+def parse_latest_blockhash(res: Result) -> Result[LatestBlockhash]:
     if res.is_error():
         return res
     try:
+        res.ok = LatestBlockhash(**res.ok["value"])
         return res
     except Exception as e:
         return Result(error=f"exception: {str(e)}", data=res.dict())
 
 
-def get_block_production(node: str, timeout=60, proxy=None) -> Result[BlockProduction]:
-    res = rpc_call(node=node, method="getBlockProduction", timeout=timeout, proxy=proxy, params=[])
+def get_blocks(
+    node: str | list[str] | NodePool,
+    start_slot: int,
+    end_slot: int,
+    commitment="finalized",
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> Result[list[int]]:
+    """Slots between start_slot and end_slot inclusive which have a block. A node accepts a range up to 500,000 slots."""
+    params = [start_slot, end_slot, {"commitment": commitment}]
+    return rpc_call(node=node, method="getBlocks", params=params, timeout=timeout, proxy=proxy, transport=transport)
+
+
+def get_block_height(
+    node: str | list[str] | NodePool,
+    commitment="confirmed",
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> Result[int]:
+    params = [{"commitment": commitment}]
+    return rpc_call(node=node, method="getBlockHeight", params=params, timeout=timeout, proxy=proxy, transport=transport)
+
+
+def send_transaction(
+    node: str | list[str] | NodePool,
+    raw_tx: bytes,
+    skip_preflight=False,
+    preflight_commitment="finalized",
+    max_retries: int | None = None,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> Result[str]:
+    """Sends a signed and serialized transaction, returns its signature"""
+    params = send_transaction_params(raw_tx, skip_preflight, preflight_commitment, max_retries)
+    return rpc_call(node=node, method="sendTransaction", params=params, timeout=timeout, proxy=proxy, transport=transport)
+
+
+def send_transaction_params(raw_tx: bytes, skip_preflight: bool, preflight_commitment: str, max_retries: int | None) -> list[Any]:
+    config: dict[str, Any] = {
+        "encoding": "base64",
+        "skipPreflight": skip_preflight,
+        "preflightCommitment": preflight_commitment,
+    }
+    if max_retries is not None:
+        config["maxRetries"] = max_retries
+    return [base64.b64encode(raw_tx).decode(), config]
+
+
+def get_signature_statuses(
+    node: str | list[str] | NodePool,
+    signatures: list[str],
+    search_transaction_history=False,
+    timeout=10,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> Result[list[dict | None]]:
+    """getSignatureStatuses method, up to 256 signatures. None in the result means the signature is unknown to the node."""
+    params = [signatures, {"searchTransactionHistory": search_transaction_history}]
+    res = rpc_call(node=node, method="getSignatureStatuses", params=params, timeout=timeout, proxy=proxy, transport=transport)
+    return parse_signature_statuses(res)
+
+
+def parse_signature_statuses(res: Result) -> Result[list[dict | None]]:
     if res.is_error():
         return res
     try:
-        slot = res.ok["context"]["slot"]
-        first_slot = res.ok["value"]["range"]["firstSlot"]
-        last_slot = res.ok["value"]["range"]["lastSlot"]
-        leaders = []
-        for address, (leader, produced) in res.ok["value"]["byIdentity"].items():
-            leaders.append(BlockProduction.Leader(address=address, produced=produced, skipped=leader - produced))
-        return Result(ok=BlockProduction(**md(slot, first_slot, last_slot, leaders)))
+        res.ok = res.ok["value"]
+        return res
     except Exception as e:
         return Result(error=f"exception: {str(e)}", data=res.dict())
 
 
-def get_transaction(node: str, signature: str, encoding="json", timeout=60, proxy=None) -> Result[dict | None]:
-    return rpc_call(node=node, method="getTransaction", timeout=timeout, proxy=proxy, params=[signature, encoding])
+def get_signatures_for_address(
+    node: str | list[str] | NodePool,
+    address: str,
+    before: str | None = None,
+    until: str | None = None,
+    limit=1000,
+    commitment="finalized",
+    timeout=30,
+    proxy=None,
+    transport: HttpTransport | None = None,
+) -> Result[list[SignatureInfo]]:
+    """Signatures of the transactions with the address, newest first: older than `before` and newer than `until`.
+    limit is up to 1000."""
+    params = [address, signatures_for_address_config(before, until, limit, commitment)]
+    res = rpc_call(node=node, method="getSignaturesForAddress", params=params, timeout=timeout, proxy=proxy, transport=transport)
+    return parse_signatures_for_address(res)
+
+
+def signatures_for_address_config(before: str | None, until: str | None, limit: int, commitment: str) -> dict[str, Any]:
+    config: dict[str, Any] = {"limit": limit, "commitment": commitment}
+    if before:
+        config["before"] = before
+    if until:
+        config["until"] = until
+    return config
+
+
+def parse_signatures_for_address(res: Result) -> Result[list[SignatureInfo]]:
+    if res.is_error():
+        return res
+    try:
+        res.ok = [SignatureInfo(**s) for s in res.ok]
+        return res
+    except Exception as e:
+        return Result(error=f"exception: {str(e)}", data=res.dict())
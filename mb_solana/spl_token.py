@@ -1,19 +1,33 @@
 from decimal import Decimal
 
 from mb_std import Result
+from solana.blockhash import Blockhash
 from solana.publickey import PublicKey
-from solana.rpc.api import Client
 from solana.rpc.core import RPCException
 from solana.rpc.types import TokenAccountOpts
 from spl.token.client import Token
 from spl.token.constants import TOKEN_PROGRAM_ID
 
 from mb_solana import solana_account
+from mb_solana.blockhash_cache import BlockhashProvider, is_stale_blockhash_error
+from mb_solana.node_pool import NodePool
+from mb_solana.transport import HttpTransport, get_solana_client
 
 
-def get_balance(node: str, owner_address: str, token_mint_address: str, token_account: str | None = None) -> Result[Decimal]:
+def get_balance(
+    node: str | NodePool,
+    owner_address: str,
+    token_mint_address: str,
+    token_account: str | None = None,
+    transport: HttpTransport | None = None,
+) -> Result[Decimal]:
+    if isinstance(node, NodePool):
+        return node.call(
+            lambda n: get_balance(n, owner_address, token_mint_address, token_account, transport),
+            is_ok=_is_node_ok,
+        )
     try:
-        client = Client(endpoint=node)
+        client = get_solana_client(node, transport)
         if not token_account:
             res = client.get_token_accounts_by_owner(
                 PublicKey(owner_address),
@@ -42,15 +56,32 @@ def get_balance(node: str, owner_address: str, token_mint_address: str, token_ac
 
 def transfer_to_wallet_address(
     *,
-    node: str,
+    node: str | NodePool,
     private_key: str,
     recipient_wallet_address: str,
     token_mint_address: str,
     amount: int,
+    transport: HttpTransport | None = None,
+    blockhash_provider: BlockhashProvider | None = None,
 ) -> Result[str]:
+    """Set blockhash_provider to take the recent blockhash from its cache instead of fetching it for each transaction"""
+    if isinstance(node, NodePool):
+        return node.call(
+            lambda n: transfer_to_wallet_address(
+                node=n,
+                private_key=private_key,
+                recipient_wallet_address=recipient_wallet_address,
+                token_mint_address=token_mint_address,
+                amount=amount,
+                transport=transport,
+                blockhash_provider=blockhash_provider,
+            ),
+            is_ok=_is_node_ok,
+        )
     try:
         keypair = solana_account.get_keypair(private_key)
-        token_client = Token(Client(node), PublicKey(token_mint_address), program_id=TOKEN_PROGRAM_ID, payer=keypair)
+        client = get_solana_client(node, transport)
+        token_client = Token(client, PublicKey(token_mint_address), program_id=TOKEN_PROGRAM_ID, payer=keypair)
 
         # get from_token_account
         res = token_client.get_accounts(keypair.public_key)
@@ -67,13 +98,35 @@ def transfer_to_wallet_address(
         elif len(token_accounts) == 1:
             to_token_account = PublicKey(token_accounts[0]["pubkey"])
         else:  # create a new to_token_account
-            to_token_account = token_client.create_account(owner=PublicKey(recipient_wallet_address))
+            to_token_account = token_client.create_account(
+                owner=PublicKey(recipient_wallet_address),
+                recent_blockhash=_recent_blockhash(blockhash_provider),
+            )
 
-        res = token_client.transfer(source=from_token_account, dest=to_token_account, owner=keypair, amount=amount)
+        res = token_client.transfer(
+            source=from_token_account,
+            dest=to_token_account,
+            owner=keypair,
+            amount=amount,
+            recent_blockhash=_recent_blockhash(blockhash_provider),
+        )
         if res.get("result"):
             return Result(ok=res.get("result"), data=res)
         return Result(error="unknown_response", data=res)
     except RPCException as e:
+        if blockhash_provider and is_stale_blockhash_error(str(e)):
+            blockhash_provider.report_stale()
         return Result(error="rcp_exception", data=str(e))
     except Exception as e:
         return Result(error="exception", data=str(e))
+
+
+def _recent_blockhash(blockhash_provider: BlockhashProvider | None) -> Blockhash | None:
+    if blockhash_provider is None:
+        return None  # the token client fetches it
+    res = blockhash_provider.get()
+    return Blockhash(res.ok.blockhash) if res.is_ok() else None
+
+
+def _is_node_ok(res: Result) -> bool:
+    return res.is_ok() or res.error not in ("exception", "rcp_exception")
@@ -0,0 +1,127 @@
+"""Persistent SSH connection for remote solana_cli commands.
+
+A new ssh process per command pays the TCP and SSH handshakes each time. SshSession keeps one OpenSSH master connection
+(ControlMaster) to the host, every command runs as a new channel over it, several of them at the same time.
+"""
+import hashlib
+import os
+import shlex
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mb_std import shell
+from mb_std.shell import CommandResult
+
+# anyone who can open a control socket uses the authenticated connection, so the sockets are kept in a private dir
+DEFAULT_CONTROL_DIR = "~/.ssh/mb-solana"
+
+
+class SshSession:
+    """max_sessions is the limit of commands in flight, sshd allows 10 channels per connection by default (MaxSessions).
+    The master connection closes itself after `persist` seconds without commands, the next command opens it again.
+
+    control_dir must be owned by the current user and closed to the others, DEFAULT_CONTROL_DIR is created with 0700.
+    The host key is checked as the ssh config says, set strict_host_key_checking to False to accept any host key.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        key_path: str | None = None,
+        *,
+        control_dir: str | None = None,
+        persist=600,
+        max_sessions=10,
+        connect_timeout=10,
+        strict_host_key_checking=True,
+    ):
+        self.host = host
+        self.key_path = key_path
+        self.strict_host_key_checking = strict_host_key_checking
+        self.persist = persist
+        self.max_sessions = max_sessions
+        self.connect_timeout = connect_timeout
+        # a unix socket path is limited to ~100 chars, so it's a short hash of the host and the connection settings
+        name = hashlib.sha1(f"{host}|{key_path}|{strict_host_key_checking}".encode()).hexdigest()[:16]
+        self.control_path = os.path.join(private_dir(control_dir or DEFAULT_CONTROL_DIR), f"mb-ssh-{name}")
+        self._semaphore = threading.BoundedSemaphore(max_sessions)
+        self._open_lock = threading.Lock()
+
+    def ssh_cmd(self, cmd: str | None = None) -> str:
+        """ssh command line which runs cmd over the master connection, opening it if it's not running"""
+        ssh_cmd = "ssh -o LogLevel=ERROR"
+        if not self.strict_host_key_checking:
+            ssh_cmd += " -o StrictHostKeyChecking=no"
+        ssh_cmd += f" -o ControlMaster=auto -o ControlPath={shlex.quote(self.control_path)} -o ControlPersist={self.persist}"
+        ssh_cmd += f" -o ConnectTimeout={self.connect_timeout}"
+        if self.key_path:
+            ssh_cmd += f" -i {shlex.quote(self.key_path)}"
+        ssh_cmd += f" {self.host}"
+        if cmd is not None:
+            ssh_cmd += f" {shlex.quote(cmd)}"
+        return ssh_cmd
+
+    def is_open(self) -> bool:
+        if not os.path.exists(self.control_path):
+            return False
+        return shell.run_command(self._control_cmd("check"), timeout=self.connect_timeout).code == 0
+
+    def open(self) -> bool:
+        """Opens the master connection if it isn't running, returns True if it's running. Commands open it by themselves too,
+        opening it first keeps concurrent commands from racing to do it."""
+        with self._open_lock:
+            if self.is_open():
+                return True
+            shell.run_command(self.ssh_cmd("true"), timeout=self.connect_timeout + 5)
+            return self.is_open()
+
+    def run(self, cmd: str, timeout=60) -> CommandResult:
+        with self._semaphore:
+            return shell.run_command(self.ssh_cmd(cmd), timeout=timeout)
+
+    def run_many(self, cmds: list[str], timeout=60) -> list[CommandResult]:
+        """Runs the commands at the same time over the connection, up to max_sessions of them, results are in cmds order"""
+        self.open()
+        with ThreadPoolExecutor(max_workers=self.max_sessions) as executor:
+            return list(executor.map(lambda cmd: self.run(cmd, timeout), cmds))
+
+    def close(self):
+        """Stops the master connection"""
+        with self._open_lock:
+            if os.path.exists(self.control_path):
+                shell.run_command(self._control_cmd("exit"), timeout=self.connect_timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _control_cmd(self, command: str) -> str:
+        return f"ssh -o ControlPath={shlex.quote(self.control_path)} -O {command} {self.host}"
+
+
+def private_dir(path: str) -> str:
+    """Creates the dir with 0700 if it doesn't exist. Raises PermissionError if it's not owned by the current user or if the
+    others have access to it."""
+    path = os.path.expanduser(path)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    stat = os.stat(path)
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+        raise PermissionError(f"{path} must be owned by the current user and have 0700 permissions")
+    return path
+
+
+_sessions: dict[tuple[str, str | None, bool], SshSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def shared_ssh_session(host: str, key_path: str | None = None, *, strict_host_key_checking=True) -> SshSession:
+    """Process-wide session for the host and the key, all solana_cli functions can share it"""
+    key = (host, key_path, strict_host_key_checking)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = SshSession(host, key_path, strict_host_key_checking=strict_host_key_checking)
+            _sessions[key] = session
+        return session
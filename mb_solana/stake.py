@@ -0,0 +1,162 @@
+"""RPC versions of solana_cli.get_balance, get_stake_account and get_stakes: no `solana` binary, no subprocess.
+
+Stake accounts are decoded from their binary layout (StakeStateV2, bincode):
+    0    u32   state: 0 Uninitialized, 1 Initialized, 2 Stake, 3 RewardsPool
+    4    Meta: u64 rent_exempt_reserve, pubkey staker, pubkey withdrawer, i64 lockup unix_timestamp, u64 lockup epoch,
+               pubkey custodian
+    124  Stake: pubkey voter, u64 stake, u64 activation_epoch, u64 deactivation_epoch, f64 warmup_cooldown_rate (unused),
+                u64 credits_observed
+"""
+import base64
+import struct
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+import base58
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.node_pool import NodePool
+from mb_solana.solana_cli import Stake, StakeAccount
+from mb_solana.transport import HttpTransport
+
+STAKE_PROGRAM_ID = "Stake11111111111111111111111111111111111111"
+STAKE_ACCOUNT_SIZE = 200
+VOTER_OFFSET = 124  # of the delegated vote account, for memcmp filters
+MAX_EPOCH = 2**64 - 1  # deactivation_epoch of a stake which isn't deactivated, activation_epoch of a bootstrap stake
+
+STAKE_TYPES = ["Uninitialized", "Initialized", "Stake", "RewardsPool"]  # stakeType values of the solana cli
+
+
+@dataclass(slots=True)
+class StakeState:
+    type: str
+    staker: str | None = None
+    withdrawer: str | None = None
+    lockup_unix_timestamp: int = 0
+    lockup_epoch: int = 0
+    custodian: str | None = None
+    vote: str | None = None
+    stake: int | None = None  # delegated lamports
+    activation_epoch: int | None = None
+    deactivation_epoch: int | None = None
+    credits_observed: int | None = None
+
+    def is_lockup_in_force(self, epoch: int, unix_timestamp: int) -> bool:
+        return self.lockup_unix_timestamp > unix_timestamp or self.lockup_epoch > epoch
+
+    def active_stake(self, epoch: int) -> int:
+        """Delegated lamports if the stake is effective in the epoch, else 0. Warmup and cooldown are taken as one epoch:
+        the cluster-wide rate limit matters only when a large share of all stake changes at once."""
+        if self.stake is None or self.activation_epoch is None or self.deactivation_epoch is None:
+            return 0
+        activated = self.activation_epoch == MAX_EPOCH or self.activation_epoch < epoch
+        return self.stake if activated and self.deactivation_epoch >= epoch else 0
+
+
+def decode_stake_state(data: bytes) -> StakeState:
+    (state,) = struct.unpack_from("<I", data, 0)
+    if state >= len(STAKE_TYPES):
+        raise ValueError(f"unknown stake state: {state}")
+    result = StakeState(type=STAKE_TYPES[state])
+    if state in (1, 2):
+        _, staker, withdrawer, unix_timestamp, epoch, custodian = struct.unpack_from("<Q32s32sqQ32s", data, 4)
+        result.staker = base58.b58encode(staker).decode()
+        result.withdrawer = base58.b58encode(withdrawer).decode()
+        result.lockup_unix_timestamp = unix_timestamp
+        result.lockup_epoch = epoch
+        result.custodian = base58.b58encode(custodian).decode()
+    if state == 2:
+        voter, stake, activation_epoch, deactivation_epoch, _, credits = struct.unpack_from("<32sQQQdQ", data, VOTER_OFFSET)
+        result.vote = base58.b58encode(voter).decode()
+        result.stake = stake
+        result.activation_epoch = activation_epoch
+        result.deactivation_epoch = deactivation_epoch
+        result.credits_observed = credits
+    return result
+
+
+def get_balance(
+    node: str | list[str] | NodePool,
+    address: str,
+    timeout=10,
+    transport: HttpTransport | None = None,
+) -> Result[Decimal]:
+    """Balance in SOL, as solana_cli.get_balance returns it"""
+    res = solana_rpc.get_balance(node, address, timeout=timeout, transport=transport)
+    if res.is_error():
+        return res  # type:ignore
+    return Result(ok=Decimal(res.ok) / 10**9, data=res.data)
+
+
+def get_stake_account(
+    node: str | list[str] | NodePool,
+    address: str,
+    timeout=10,
+    transport: HttpTransport | None = None,
+) -> Result[StakeAccount]:
+    res = solana_rpc.get_multiple_accounts(node, [address], timeout=timeout, transport=transport)
+    if res.is_error():
+        return res  # type:ignore
+    try:
+        account = res.ok[0]
+        if account is None:
+            return Result(error="account_not_found", data=res.data)
+        if account["owner"] != STAKE_PROGRAM_ID:
+            return Result(error="not_stake_account", data=res.data)
+        state = decode_stake_state(base64.b64decode(account["data"][0]))
+        if state.staker is None or state.withdrawer is None:
+            return Result(error=f"unsupported_stake_state: {state.type}", data=res.data)  # no authorities to show
+        stake_account = StakeAccount(
+            stakeType=state.type,
+            accountBalance=account["lamports"],
+            withdrawer=state.withdrawer,
+            staker=state.staker,
+            delegatedVoteAccountAddress=state.vote,
+        )
+        return Result(ok=stake_account, data=res.data)
+    except Exception as e:
+        return Result(error=f"exception: {str(e)}", data=res.dict())
+
+
+def get_stakes(
+    node: str | list[str] | NodePool,
+    vote_address: str = "",
+    timeout=120,
+    transport: HttpTransport | None = None,
+) -> Result[list[Stake]]:
+    """Stake accounts delegated to vote_address, all stake accounts if it's empty. One getProgramAccounts call, filtered on the
+    node by the voter field of the account. activeStake is as in StakeState.active_stake."""
+    res = solana_rpc.get_epoch_info(node, timeout=timeout, transport=transport)
+    if res.is_error():
+        return res  # type:ignore
+    epoch = res.ok.epoch
+
+    filters: list[dict] = [{"dataSize": STAKE_ACCOUNT_SIZE}]
+    if vote_address:
+        filters.append({"memcmp": {"offset": VOTER_OFFSET, "bytes": vote_address}})
+    res = solana_rpc.get_program_accounts(node, STAKE_PROGRAM_ID, filters, timeout=timeout, transport=transport)
+    if res.is_error():
+        return res  # type:ignore
+    try:
+        now = int(time.time())
+        stakes = []
+        for item in res.ok:
+            account = item["account"]
+            state = decode_stake_state(base64.b64decode(account["data"][0]))
+            if state.withdrawer is None or (vote_address and state.type != "Stake"):
+                continue  # an uninitialized account or a rewards pool, or not delegated
+            stake = Stake(
+                stakePubkey=item["pubkey"],
+                withdrawer=state.withdrawer,
+                delegatedVoteAccountAddress=state.vote,
+                accountBalance=account["lamports"],
+                delegatedStake=state.stake,
+                activeStake=state.active_stake(epoch) or None,
+                unixTimestamp=state.lockup_unix_timestamp if state.is_lockup_in_force(epoch, now) else None,
+            )
+            stakes.append(stake)
+        return Result(ok=stakes, data={"epoch": epoch, "accounts": len(res.ok)})
+    except Exception as e:
+        return Result(error=f"exception: {str(e)}", data=res.dict())
@@ -0,0 +1,111 @@
+import threading
+from typing import Any
+
+import httpx
+from mb_std import Result
+from solana.exceptions import SolanaRpcException, handle_exceptions
+from solana.rpc.api import Client
+from solana.rpc.providers.http import HTTPProvider
+
+from mb_solana.json_decoder import get_decoder
+
+
+class HttpTransport:
+    """Reusable HTTP transport for JSON RPC calls.
+
+    It keeps one httpx client per proxy, so connections to every node are kept alive and reused between calls.
+    Set http2=True to multiplex requests over a single HTTP/2 connection per node (it requires `httpx[http2]`).
+    json_decoder is a name from json_decoder.DECODERS, by default the fastest installed one is used.
+    """
+
+    def __init__(
+        self,
+        *,
+        http2=False,
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=30.0,
+        timeout=10,
+        json_decoder="auto",
+    ):
+        self.http2 = http2
+        self.decode = get_decoder(json_decoder)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self._http_clients: dict[str | None, httpx.Client] = {}
+        self._solana_clients: dict[str, Client] = {}
+        self._lock = threading.Lock()
+
+    def http_client(self, proxy: str | None = None) -> httpx.Client:
+        with self._lock:
+            client = self._http_clients.get(proxy)
+            if client is None:
+                client = httpx.Client(http2=self.http2, limits=self.limits, timeout=self.timeout, proxies=proxy)  # type:ignore
+                self._http_clients[proxy] = client
+            return client
+
+    def solana_client(self, node: str) -> Client:
+        """solana.rpc.api.Client which sends its requests through the pooled connections of this transport"""
+        with self._lock:
+            client = self._solana_clients.get(node)
+            if client is None:
+                client = Client(node, timeout=self.timeout)
+                client._provider = _PooledHTTPProvider(node, self, timeout=self.timeout)  # noqa
+                self._solana_clients[node] = client
+            return client
+
+    def post(self, node: str, data: Any, timeout: int, proxy: str | None = None, raw=False) -> Result:
+        """POST json data to the node. The result's ok is the decoded json response, or the response body if raw is set."""
+        try:
+            res = self.http_client(proxy).post(node, json=data, timeout=timeout)
+        except Exception as e:
+            return Result(error=f"exception: {str(e)}", data={"node": node})
+        # the body is kept only for errors: responses like getProgramAccounts are megabytes, the decoded result is enough
+        response_data = {"node": node, "http_code": res.status_code}
+        if res.status_code != 200:
+            return Result(error=f"http_error: {res.status_code}", data=response_data | {"body": res.text})
+        if raw:
+            return Result(ok=res.content, data=response_data)
+        try:
+            return Result(ok=self.decode(res.content), data=response_data)
+        except Exception as e:
+            return Result(error=f"exception: {str(e)}", data=response_data | {"body": res.text})
+
+    def close(self):
+        with self._lock:
+            for client in self._http_clients.values():
+                client.close()
+            self._http_clients.clear()
+            self._solana_clients.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _PooledHTTPProvider(HTTPProvider):
+    def __init__(self, endpoint: str, transport: HttpTransport, timeout=10):
+        super().__init__(endpoint, timeout=timeout)
+        self._transport = transport
+
+    @handle_exceptions(SolanaRpcException, httpx.HTTPError)
+    def make_request(self, method, *params):
+        request_kwargs = self._before_request(method=method, params=params, is_async=False)
+        url = request_kwargs.pop("url")
+        if "data" in request_kwargs:
+            request_kwargs["content"] = request_kwargs.pop("data")
+        request_kwargs.setdefault("timeout", self.timeout)
+        raw_response = self._transport.http_client().post(url, **request_kwargs)
+        return self._after_request(raw_response=raw_response, method=method)
+
+
+def get_solana_client(node: str, transport: HttpTransport | None = None) -> Client:
+    if transport:
+        return transport.solana_client(node)
+    return Client(node)
@@ -0,0 +1,148 @@
+"""Columnar view of the validator set for vectorized analytics. It requires numpy: `pip install mb-solana[numpy]`."""
+from array import array
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("validator_table requires numpy: pip install mb-solana[numpy]") from e
+
+from mb_solana.solana_cli import ValidatorInfo
+from mb_solana.solana_rpc import BlockProduction, CompactBlockProduction, CompactVoteAccount, VoteAccount
+
+
+class ValidatorTable:
+    """One row per vote account, each field is a numpy column.
+
+    credits[i, j] is the credits earned by the row i in the epoch epochs[j], 0 if the row has no credits for it.
+    Block production and validator info are joined by identity: skipped_rate is NaN and name is None for rows without them.
+    """
+
+    def __init__(self, accounts: list[VoteAccount] | list[CompactVoteAccount]):
+        self.vote = np.array([a.vote for a in accounts], dtype=object)
+        self.identity = np.array([a.validator for a in accounts], dtype=object)
+        self.commission = np.array([a.commission for a in accounts], dtype=np.int16)
+        self.stake = np.array([a.stake for a in accounts], dtype=np.int64)
+        self.delinquent = np.array([a.delinquent for a in accounts], dtype=bool)
+        self.epoch_vote_account = np.array([a.epoch_vote_account for a in accounts], dtype=bool)
+        self.root_slot = np.array([a.root_slot for a in accounts], dtype=np.int64)
+        self.last_vote = np.array([a.last_vote for a in accounts], dtype=np.int64)
+        self.epochs, self.credits = _credits_matrix(accounts)
+        self.leader_slots = np.zeros(len(accounts), dtype=np.int64)
+        self.produced = np.zeros(len(accounts), dtype=np.int64)
+        self.skipped_rate = np.full(len(accounts), np.nan)
+        self.name = np.full(len(accounts), None, dtype=object)
+        self._rows_by_identity: dict[str, list[int]] = {}
+        for row, identity in enumerate(self.identity):
+            self._rows_by_identity.setdefault(identity, []).append(row)
+
+    def __len__(self) -> int:
+        return len(self.vote)
+
+    def rows(self, identity: str) -> list[int]:
+        return self._rows_by_identity.get(identity, [])
+
+    def join_block_production(self, block_production: BlockProduction | CompactBlockProduction):
+        """Sets leader_slots, produced and skipped_rate. Identities without leader slots in the range keep NaN."""
+        if isinstance(block_production, BlockProduction):
+            addresses = [leader.address for leader in block_production.leaders]
+            produced = np.array([leader.produced for leader in block_production.leaders], dtype=np.int64)
+            skipped = np.array([leader.skipped for leader in block_production.leaders], dtype=np.int64)
+        else:
+            addresses = block_production.addresses
+            produced = np.frombuffer(block_production.produced, dtype=np.uint64).astype(np.int64)
+            skipped = np.frombuffer(block_production.skipped, dtype=np.uint64).astype(np.int64)
+        source, target = self._join(addresses)
+        self.produced[target] = produced[source]
+        self.leader_slots[target] = produced[source] + skipped[source]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.skipped_rate[target] = skipped[source] / self.leader_slots[target]
+
+    def join_validators_info(self, validators_info: list[ValidatorInfo]):
+        source, target = self._join([v.identity_address for v in validators_info])
+        names = np.array([v.name for v in validators_info], dtype=object)
+        self.name[target] = names[source]
+
+    def epoch_credits(self, epoch: int | None = None) -> np.ndarray:
+        """Credits earned in the epoch by each row, by default in the last epoch"""
+        if not len(self.epochs):
+            return np.zeros(len(self), dtype=np.int64)
+        if epoch is None:
+            return self.credits[:, -1]
+        index = np.searchsorted(self.epochs, epoch)
+        if index == len(self.epochs) or self.epochs[index] != epoch:
+            return np.zeros(len(self), dtype=np.int64)
+        return self.credits[:, index]
+
+    def credits_per_slot(self, slots: int, epoch: int | None = None) -> np.ndarray:
+        """Credits earned in the epoch divided by the number of slots in it, or the slots passed if it isn't finished yet"""
+        return self.epoch_credits(epoch) / slots
+
+    def stake_share(self) -> np.ndarray:
+        total = self.stake.sum()
+        return self.stake / total if total else np.zeros(len(self))
+
+    def stake_weighted_mean(self, values: np.ndarray, mask: np.ndarray | None = None) -> float:
+        """Mean of a column weighted by stake, NaN values and rows outside mask are skipped"""
+        keep = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(len(self), dtype=bool)
+        if mask is not None:
+            keep &= mask
+        weights = self.stake[keep]
+        if not weights.sum():
+            return float("nan")
+        return float(np.average(values[keep], weights=weights))
+
+    def stake_percentiles(self, q: list[float], active_only=True) -> np.ndarray:
+        stake = self.stake[~self.delinquent] if active_only else self.stake
+        return np.percentile(stake, q) if len(stake) else np.full(len(q), np.nan)
+
+    def commission_buckets(self, bins: list[int]) -> tuple[np.ndarray, np.ndarray]:
+        """Returns (number of validators, stake) in each commission bucket, bins are the bucket edges as in numpy.histogram"""
+        count, _ = np.histogram(self.commission, bins=bins)
+        stake, _ = np.histogram(self.commission, bins=bins, weights=self.stake)
+        return count, stake.astype(np.int64)
+
+    def delinquent_stake_share(self) -> float:
+        total = self.stake.sum()
+        return float(self.stake[self.delinquent].sum() / total) if total else 0.0
+
+    def _join(self, identities: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Returns (source indexes, target rows) of the identities which are in the table"""
+        source: list[int] = []
+        target: list[int] = []
+        for i, identity in enumerate(identities):
+            for row in self._rows_by_identity.get(identity, []):
+                source.append(i)
+                target.append(row)
+        return np.array(source, dtype=np.int64), np.array(target, dtype=np.int64)
+
+
+def _credits_matrix(accounts: list[VoteAccount] | list[CompactVoteAccount]) -> tuple[np.ndarray, np.ndarray]:
+    if not accounts:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.int64)
+    arrays = [a.credits for a in accounts if isinstance(a.credits, array)]
+    if len(arrays) == len(accounts):
+        # the arrays of compact accounts are joined as bytes, without creating a python object for each number
+        flat = np.frombuffer(b"".join(c.tobytes() for c in arrays), dtype=np.uint64).astype(np.int64)
+        lengths = [len(c) // 3 for c in arrays]
+    else:
+        credits_lists = [a.credits.tolist() if isinstance(a.credits, array) else _credit_triples(a) for a in accounts]
+        flat = np.array([x for c in credits_lists for x in c], dtype=np.int64)
+        lengths = [len(c) // 3 for c in credits_lists]
+    triples = flat.reshape(-1, 3)
+
+    if not len(triples):
+        return np.zeros(0, dtype=np.int64), np.zeros((len(accounts), 0), dtype=np.int64)
+
+    # epochs are a short range of numbers, so a column of each epoch is found with bincount instead of sorting
+    offsets = triples[:, 0] - triples[:, 0].min()
+    present = np.bincount(offsets) > 0
+    epochs = np.flatnonzero(present) + triples[:, 0].min()
+    columns = (np.cumsum(present) - 1)[offsets]
+    rows = np.repeat(np.arange(len(accounts)), lengths)
+    credits = np.zeros((len(accounts), len(epochs)), dtype=np.int64)
+    credits[rows, columns] = triples[:, 1] - triples[:, 2]
+    return epochs, credits
+
+
+def _credit_triples(account: VoteAccount) -> list[int]:
+    return [x for c in account.credits for x in (c.epoch, c.credits, c.previous_credits)]
@@ -0,0 +1,309 @@
+"""WebSocket transport for Solana pubsub: slotSubscribe, accountSubscribe, signatureSubscribe, logsSubscribe.
+
+WsClient keeps one connection for many subscriptions. If the connection is lost, it reconnects with a growing delay and
+subscribes again to everything which is still active. Notifications are delivered to a callback, or, if there is no callback,
+to the subscription itself, which is an async iterator.
+"""
+import asyncio
+import json
+import random
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import websockets
+from mb_std import Result
+
+from mb_solana.jsonrpc import parse_rpc_response
+
+_CLOSED = object()
+
+
+@dataclass
+class WsStats:
+    reconnects: int = 0
+    notifications: int = 0
+    dropped: int = 0  # notifications dropped because the queue of a subscription was full
+    callback_errors: int = 0  # callbacks which raised, the connection and the other subscriptions aren't affected
+
+
+class Subscription:
+    """Active subscription. Iterate it with `async for` to get notifications, iteration stops after unsubscribe.
+
+    A signature subscription gets one notification only, then the node removes it.
+    """
+
+    def __init__(self, method: str, params: list[Any], callback: Callable[[Any], Any] | None, queue_size: int):
+        self.method = method
+        self.params = params
+        self.callback = callback
+        self.subscription_id: int | None = None  # given by the node, it changes after a reconnect
+        self.active = True
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    @property
+    def one_shot(self) -> bool:
+        return self.method == "signatureSubscribe"
+
+    @property
+    def unsubscribe_method(self) -> str:
+        return self.method.replace("Subscribe", "Unsubscribe")
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        if not self.active and self._queue.empty():
+            raise StopAsyncIteration
+        item = await self._queue.get()
+        if item is _CLOSED:
+            raise StopAsyncIteration
+        return item
+
+    def _put(self, item: Any) -> bool:
+        """Returns False if an old notification was dropped to make room for this one"""
+        dropped = False
+        if self._queue.full():
+            self._queue.get_nowait()
+            dropped = True
+        self._queue.put_nowait(item)
+        return not dropped
+
+    def _close(self):
+        self.active = False
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_CLOSED)
+
+
+class WsClient:
+    def __init__(
+        self,
+        url: str,
+        *,
+        request_timeout=10,
+        reconnect_delay=0.5,
+        max_reconnect_delay=30.0,
+        ping_interval: float | None = 20,
+        queue_size=1000,
+    ):
+        """url can be an http(s) url, it's converted to ws(s)"""
+        self.url = http_to_ws_url(url)
+        self.request_timeout = request_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.ping_interval = ping_interval
+        self.queue_size = queue_size
+        self.stats = WsStats()
+        self._ws: Any = None
+        self._connected = asyncio.Event()
+        self._closed = False
+        self._task: asyncio.Task | None = None
+        self._next_id = 0
+        self._requests: dict[int, tuple[asyncio.Future, Subscription | None]] = {}
+        self._subscriptions: list[Subscription] = []
+        self._by_id: dict[int, Subscription] = {}
+
+    async def connect(self):
+        """Starts the connection loop and waits for the first connection. Requests and subscriptions start it too."""
+        self._start()
+        await asyncio.wait_for(self._connected.wait(), self.request_timeout)
+
+    async def close(self):
+        self._closed = True
+        for sub in self._subscriptions:
+            sub._close()
+        self._subscriptions.clear()
+        self._by_id.clear()
+        if self._ws is not None:
+            await self._ws.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def call(self, method: str, params: list[Any]) -> Result:
+        return await self._request(method, params)
+
+    async def slot_subscribe(self, callback: Callable[[dict], Any] | None = None) -> Result[Subscription]:
+        return await self.subscribe("slotSubscribe", [], callback)
+
+    async def account_subscribe(
+        self,
+        address: str,
+        commitment="confirmed",
+        encoding="base64",
+        callback: Callable[[dict], Any] | None = None,
+    ) -> Result[Subscription]:
+        return await self.subscribe("accountSubscribe", [address, {"commitment": commitment, "encoding": encoding}], callback)
+
+    async def signature_subscribe(
+        self,
+        signature: str,
+        commitment="confirmed",
+        callback: Callable[[dict], Any] | None = None,
+    ) -> Result[Subscription]:
+        return await self.subscribe("signatureSubscribe", [signature, {"commitment": commitment}], callback)
+
+    async def logs_subscribe(
+        self,
+        mentions: str | None = None,
+        commitment="confirmed",
+        callback: Callable[[dict], Any] | None = None,
+    ) -> Result[Subscription]:
+        """mentions is an address, all transactions which mention it are notified. If it's not set, all transactions are."""
+        filter_ = {"mentions": [mentions]} if mentions else "all"
+        return await self.subscribe("logsSubscribe", [filter_, {"commitment": commitment}], callback)
+
+    async def subscribe(
+        self,
+        method: str,
+        params: list[Any],
+        callback: Callable[[Any], Any] | None = None,
+    ) -> Result[Subscription]:
+        sub = Subscription(method, params, callback, self.queue_size)
+        res = await self._request(method, params, sub)
+        if res.is_error():
+            return res
+        self._subscriptions.append(sub)
+        return Result(ok=sub, data=res.data)
+
+    async def unsubscribe(self, sub: Subscription) -> Result[bool]:
+        if sub in self._subscriptions:
+            self._subscriptions.remove(sub)
+        subscription_id = sub.subscription_id
+        was_active = sub.active
+        sub._close()
+        if subscription_id is None or not was_active:
+            return Result(ok=True)
+        self._by_id.pop(subscription_id, None)
+        return await self._request(sub.unsubscribe_method, [subscription_id])
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def _start(self):
+        if self._task is None:
+            self._closed = False
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _request(self, method: str, params: list[Any], sub: Subscription | None = None) -> Result:
+        self._start()
+        try:
+            await asyncio.wait_for(self._connected.wait(), self.request_timeout)
+            self._next_id += 1
+            id_ = self._next_id
+            future = asyncio.get_running_loop().create_future()
+            self._requests[id_] = (future, sub)
+            data = {"jsonrpc": "2.0", "method": method, "params": params, "id": id_}
+            try:
+                await self._ws.send(json.dumps(data))
+                response = await asyncio.wait_for(future, self.request_timeout)
+            finally:
+                self._requests.pop(id_, None)
+            return parse_rpc_response(response, {"url": self.url, "request": data})
+        except asyncio.TimeoutError:
+            return Result(error="timeout", data={"url": self.url, "method": method})
+        except Exception as e:
+            return Result(error=f"exception: {str(e)}", data={"url": self.url, "method": method})
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while not self._closed:
+            restore_task = None
+            try:
+                async with websockets.connect(self.url, ping_interval=self.ping_interval, max_size=None) as ws:
+                    self._ws = ws
+                    self._connected.set()
+                    delay = self.reconnect_delay
+                    if self._subscriptions:
+                        restore_task = asyncio.ensure_future(self._restore())
+                    async for message in ws:
+                        self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # nosec # reconnect below
+                pass
+            finally:
+                self._connected.clear()
+                self._ws = None
+                if restore_task:
+                    restore_task.cancel()
+                self._by_id.clear()
+                for future, _sub in self._requests.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError("connection closed"))
+            if self._closed:
+                break
+            self.stats.reconnects += 1
+            await asyncio.sleep(delay * (1 + random.random() / 2))  # nosec
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _restore(self):
+        for sub in list(self._subscriptions):
+            sub.subscription_id = None
+            res = await self._request(sub.method, sub.params, sub)
+            if res.is_error() and self._ws is not None:
+                await self._ws.close()  # the connection loop reconnects and tries again
+                return
+
+    def _dispatch(self, message: str | bytes):
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        if not isinstance(data, dict):
+            return
+
+        if "id" in data and data["id"] in self._requests:
+            future, sub = self._requests[data["id"]]
+            # the subscription is registered here, not in subscribe(): its first notification can come with the next message
+            if sub is not None and sub.active and isinstance(data.get("result"), int):
+                sub.subscription_id = data["result"]
+                self._by_id[sub.subscription_id] = sub
+            if not future.done():
+                future.set_result(data)
+            return
+
+        params = data.get("params")
+        if not isinstance(params, dict) or "subscription" not in params:
+            return
+        sub = self._by_id.get(params["subscription"])  # type:ignore
+        if sub is None:
+            return
+        self.stats.notifications += 1
+        result = params.get("result")
+        if sub.callback:
+            self._call_callback(sub.callback, result)
+        elif not sub._put(result):
+            self.stats.dropped += 1
+        if sub.one_shot:
+            self._by_id.pop(params["subscription"], None)
+            if sub in self._subscriptions:
+                self._subscriptions.remove(sub)
+            sub._close()
+
+    def _call_callback(self, callback: Callable[[Any], Any], result: Any):
+        try:
+            callback_res = callback(result)
+            if asyncio.iscoroutine(callback_res):
+                asyncio.ensure_future(callback_res).add_done_callback(self._on_callback_done)
+        except Exception:
+            self.stats.callback_errors += 1
+
+    def _on_callback_done(self, task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            self.stats.callback_errors += 1
+
+
+def http_to_ws_url(url: str) -> str:
+    """https://host -> wss://host. The port isn't changed: a default solana-validator listens for WebSocket on rpc port + 1."""
+    if url.startswith("http"):
+        return "ws" + url.removeprefix("http")
+    return url
@@ -28,9 +28,14 @@ setuptools.setup(
         "base58",
         "toml==0.10.2",
         "solana==0.23.3",
+        "httpx",
+        "websockets",
         "mb-std~=0.4",
     ],
     extras_require={
+        "http2": ["httpx[http2]"],
+        "fast-json": ["orjson"],
+        "numpy": ["numpy"],
         "dev": [
             "pytest==7.1.2",
             "pytest-xdist==2.5.0",
@@ -1,8 +1,13 @@
+import asyncio
 import os
 
+import httpx
 import pytest
 from dotenv import load_dotenv
 
+from mb_solana.aio import AsyncTransport
+from mb_solana.transport import HttpTransport
+
 load_dotenv()
 
 
@@ -19,3 +24,44 @@ def usdt_token_address():
 @pytest.fixture
 def usdt_owner_address():
     return os.getenv("USDT_OWNER_ADDRESS")
+
+
+@pytest.fixture
+def mock_transport():
+    """Returns make(handler, transport=None): an HttpTransport whose requests go to handler(request) -> httpx.Response instead
+    of the network. A given transport gets the mock client, its own client is put back after the test."""
+    mocked: list[tuple[HttpTransport, httpx.Client | None]] = []
+
+    def make(handler, transport: HttpTransport | None = None) -> HttpTransport:
+        transport = transport or HttpTransport()
+        mocked.append((transport, transport._http_clients.get(None)))  # noqa
+        transport._http_clients[None] = httpx.Client(transport=httpx.MockTransport(handler))  # noqa
+        return transport
+
+    yield make
+    for transport, client in reversed(mocked):
+        mock_client = transport._http_clients.pop(None, None)  # noqa
+        if mock_client:
+            mock_client.close()
+        if client:
+            transport._http_clients[None] = client  # noqa
+
+
+@pytest.fixture
+def mock_async_transport():
+    """Async variant of mock_transport: make(handler, transport=None) -> AsyncTransport, handler can be async"""
+    mocked: list[tuple[AsyncTransport, httpx.AsyncClient | None]] = []
+
+    def make(handler, transport: AsyncTransport | None = None) -> AsyncTransport:
+        transport = transport or AsyncTransport()
+        mocked.append((transport, transport._http_clients.get(None)))  # noqa
+        transport._http_clients[None] = httpx.AsyncClient(transport=httpx.MockTransport(handler))  # noqa
+        return transport
+
+    yield make
+    for transport, client in reversed(mocked):
+        mock_client = transport._http_clients.pop(None, None)  # noqa
+        if mock_client:
+            asyncio.run(mock_client.aclose())
+        if client:
+            transport._http_clients[None] = client  # noqa
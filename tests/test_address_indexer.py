@@ -0,0 +1,85 @@
+from mb_std import Result
+
+from mb_solana import helpers, solana_rpc
+from mb_solana.address_indexer import AddressIndexer
+from mb_solana.helpers import TransferInfo
+from mb_solana.solana_rpc import SignatureInfo
+
+
+def test_address_indexer(monkeypatch, tmp_path):
+    history = []  # newest first, as getSignaturesForAddress returns it
+    fetched = []
+    failing = set()
+
+    def add_signatures(count: int, err_every=0):
+        for _ in range(count):
+            n = len(history) + 1
+            err = {"InstructionError": [0, "Custom"]} if err_every and n % err_every == 0 else None
+            history.insert(0, SignatureInfo(signature=f"s{n}", slot=n, err=err, memo=None, blockTime=n))
+
+    def get_signatures_for_address(node, address, before=None, until=None, limit=1000, **kwargs):
+        signatures = [s.signature for s in history]
+        start = signatures.index(before) + 1 if before else 0
+        end = signatures.index(until) if until else len(signatures)
+        return Result(ok=history[start:end][:limit])
+
+    def find_transfers_many(node, signatures, **kwargs):
+        for signature in signatures:
+            fetched.append(signature)
+            if signature in failing:
+                yield signature, Result(error="timeout")
+            else:
+                yield signature, Result(ok=[TransferInfo(source="payer", destination="addr", lamports=int(signature[1:]))])
+
+    monkeypatch.setattr(solana_rpc, "get_signatures_for_address", get_signatures_for_address)
+    monkeypatch.setattr(helpers, "find_transfers_many", find_transfers_many)
+
+    add_signatures(7, err_every=3)
+    with AddressIndexer("node", str(tmp_path / "index.db"), batch_size=2, page_size=3) as indexer:
+        stats = indexer.run(["addr"])
+        assert (stats.new_signatures, stats.fetched, stats.transfers) == (7, 5, 5)
+        assert fetched == ["s1", "s2", "s4", "s5", "s7"]  # failed transactions aren't fetched
+        assert indexer.cursor("addr") == "s7"
+
+        # the next run fetches only new signatures, a failed fetch stops the cursor before it
+        add_signatures(3)
+        failing.add("s9")
+        stats = indexer.run(["addr"])
+        assert (stats.new_signatures, stats.errors) == (3, 1)
+        assert indexer.cursor("addr") == "s8"
+        failing.clear()
+        assert indexer.index_address("addr").ok == 2
+        assert fetched[-2:] == ["s9", "s10"]
+
+        transfers = indexer.transfers("addr", outgoing=False, since_slot=5)
+        assert [(t.signature, t.lamports, t.slot) for t in transfers] == [(f"s{n}", n, n) for n in (5, 7, 8, 9, 10)]
+        assert indexer.transfers("addr", incoming=False) == []
+
+
+def test_address_indexer_batches(monkeypatch, tmp_path):
+    history = {
+        "addr1": [SignatureInfo(signature="a1", slot=1, err=None, memo=None, blockTime=1)],
+        "addr2": [SignatureInfo(signature=f"b{n}", slot=n, err=None, memo=None, blockTime=n) for n in (4, 3, 2, 1)],
+    }
+
+    def find_transfers_many(node, signatures, **kwargs):
+        for signature in signatures:
+            if signature == "b3":
+                yield signature, helpers.parse_transfers(Result(ok=None))  # a null getTransaction result
+            else:
+                yield signature, Result(ok=[TransferInfo(source="payer", destination="addr2", lamports=1)])
+
+    monkeypatch.setattr(solana_rpc, "get_signatures_for_address", lambda node, address, **kwargs: Result(ok=history[address]))
+    monkeypatch.setattr(helpers, "find_transfers_many", find_transfers_many)
+
+    with AddressIndexer("node", str(tmp_path / "index.db"), batch_size=2) as indexer:
+        saved = []
+        save = indexer._save
+        monkeypatch.setattr(
+            indexer, "_save", lambda address, batch, *args: saved.append(len(batch)) or save(address, batch, *args)
+        )
+
+        stats = indexer.run(["addr1", "addr2"])
+        assert (stats.fetched, stats.not_found, stats.transfers, stats.errors) == (5, 1, 4, 0)
+        assert saved == [1, 2, 2, 0]  # the batches of each address are counted from its first signature
+        assert indexer.cursor("addr2") == "b4"  # a not found transaction doesn't stop the cursor
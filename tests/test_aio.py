@@ -0,0 +1,115 @@
+import asyncio
+import base64
+import json
+
+import httpx
+
+from mb_solana import aio
+
+BALANCE = {"context": {"slot": 1}, "value": 5}
+
+
+def _response(item: dict, result) -> dict:
+    if isinstance(result, Exception):
+        return {"jsonrpc": "2.0", "error": {"code": -32602, "message": str(result)}, "id": item["id"]}
+    return {"jsonrpc": "2.0", "result": result, "id": item["id"]}
+
+
+def _handler(results: dict, requests: list | None = None):
+    """results maps a method to its result, an Exception value is an error. A batch is answered in reverse order."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "down":
+            return httpx.Response(503, text="unavailable")
+        data = json.loads(request.content)
+        if requests is not None:
+            requests.append(data)
+        if isinstance(data, list):
+            return httpx.Response(200, json=[_response(item, results[item["params"][0]]) for item in reversed(data)])
+        return httpx.Response(200, json=_response(data, results[data["method"]]))
+
+    return handler
+
+
+def test_rpc_call(mock_async_transport):
+    async def run():
+        async with mock_async_transport(_handler({"getBalance": BALANCE, "getSlot": ValueError("bad")})) as transport:
+            res = await aio.get_balance("http://node", "a", transport=transport)
+            assert res.ok == 5
+            assert "body" not in res.data
+
+            res = await aio.get_slot("http://node", transport=transport)
+            assert res.error == "service_error: bad"
+
+            res = await aio.get_balance("http://down", "a", transport=transport)
+            assert res.error == "http_error: 503"
+            assert res.data["body"] == "unavailable"
+
+    asyncio.run(run())
+
+
+def test_rpc_batch_call(mock_async_transport):
+    async def run():
+        async with mock_async_transport(_handler({"a": BALANCE, "b": ValueError("invalid param"), "c": BALANCE})) as transport:
+            res = await aio.get_balance_batch("http://node", ["a", "b", "c"], transport=transport, batch_size=2)
+            assert [r.ok for r in res.values()] == [5, None, 5]
+            assert res["b"].error == "service_error: invalid param"
+
+            res = await aio.get_balance_batch("http://down", ["a", "b"], transport=transport)
+            assert [r.error for r in res.values()] == ["http_error: 503"] * 2
+
+            results = await aio.rpc_batch_call(node="ws://node", calls=[("getBalance", ["a"])], transport=transport)
+            assert results[0].error == "batch calls are not supported over ws"
+
+    asyncio.run(run())
+
+
+def test_tx_functions(mock_async_transport):
+    requests: list = []
+    results = {
+        "getLatestBlockhash": {"context": {"slot": 1}, "value": {"blockhash": "hash", "lastValidBlockHeight": 150}},
+        "getBlockHeight": 100,
+        "sendTransaction": "sig",
+        "getSignatureStatuses": {"context": {"slot": 1}, "value": [{"slot": 1, "err": None}, None]},
+        "getProgramAccounts": [{"pubkey": "p", "account": {}}],
+    }
+
+    async def run():
+        async with mock_async_transport(_handler(results, requests)) as transport:
+            res = await aio.get_latest_blockhash("http://node", transport=transport)
+            assert res.ok.last_valid_block_height == 150
+            assert (await aio.get_block_height("http://node", transport=transport)).ok == 100
+            assert (await aio.send_transaction("http://node", b"tx", transport=transport)).ok == "sig"
+            res = await aio.get_signature_statuses("http://node", ["s1", "s2"], True, transport=transport)
+            assert res.ok[1] is None
+            res = await aio.get_program_accounts("http://node", "program", [{"dataSize": 200}], transport=transport)
+            assert res.ok[0]["pubkey"] == "p"
+
+    asyncio.run(run())
+    params = {r["method"]: r["params"] for r in requests}
+    assert base64.b64decode(params["sendTransaction"][0]) == b"tx"
+    assert params["getSignatureStatuses"][1] == {"searchTransactionHistory": True}
+    assert params["getProgramAccounts"][1]["filters"] == [{"dataSize": 200}]
+
+
+def test_find_transfers_many_close(mock_async_transport):
+    """An abandoned iteration cancels and awaits the batches in flight"""
+    started = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        data = json.loads(request.content)
+        if data[0]["params"][0] != "1":
+            started.set()
+            await asyncio.sleep(10)
+        return httpx.Response(200, json=[_response(item, None) for item in data])
+
+    async def run():
+        async with mock_async_transport(handler) as transport:
+            results = aio.find_transfers_many("http://node", ["1", "2", "3"], transport=transport, batch_size=1)
+            signature, res = await results.__anext__()
+            assert signature == "1" and res.is_error()  # a not found transaction
+            await started.wait()
+            await results.aclose()
+            assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(run())
@@ -0,0 +1,44 @@
+import json
+
+import httpx
+
+from mb_solana.cli.cmd.balance_cmd import _Engine
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    data = json.loads(request.content)
+    if data["method"] == "getMultipleAccounts":
+        addresses = data["params"][0]
+        if "bad" in addresses:
+            return httpx.Response(503, text="unavailable")
+        # "a0" is a missing account, "e0" is an existing one with zero lamports
+        value = [None if a == "a0" else {"lamports": int(a[1:]) * 10**9, "data": ["", "base64"]} for a in addresses]
+        return httpx.Response(200, json={"jsonrpc": "2.0", "result": {"context": {"slot": 1}, "value": value}, "id": 1})
+
+    owner = data["params"][0]
+    if owner == "bad":
+        return httpx.Response(200, json={"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid param"}, "id": 1})
+    token_amount = {"uiAmount": float(owner[1:])}
+    value = [{"account": {"data": {"parsed": {"info": {"tokenAmount": token_amount}}}}}] if owner != "a0" else []
+    if owner == "a2":
+        value *= 2  # two token accounts of the mint
+    return httpx.Response(200, json={"jsonrpc": "2.0", "result": {"context": {"slot": 1}, "value": value}, "id": 1})
+
+
+def test_engine(mock_transport):
+    accounts = [f"a{i}" for i in range(150)]
+    with _Engine(["http://node"], concurrency=4, timeout=10) as engine:
+        mock_transport(_handler, engine.transport)
+
+        balances = engine.sol_balances(accounts)
+        assert list(balances) == accounts
+        assert balances["a0"] == 0 and balances["a7"] == 7 and balances["a149"] == 149
+        assert engine.sol_balances(["e0", "a0"]) == {"e0": 0, "a0": 0}  # a zero balance isn't None
+
+        # a failed chunk is None for each of its accounts, the other chunks are kept
+        balances = engine.sol_balances(["a1", "bad"] + accounts[:100])
+        assert balances["a1"] is None and balances["bad"] is None
+        assert balances["a97"] is None and balances["a99"] == 99  # "a97" is the last one of the failed chunk
+
+        balances = engine.token_balances("token", ["a3", "bad", "a0", "a5", "a2"])
+        assert balances == {"a3": 3, "bad": None, "a0": None, "a5": 5, "a2": 4}  # the token accounts of a mint are summed
@@ -0,0 +1,87 @@
+import random
+import time
+
+from mb_std import Result
+
+from mb_solana import block, solana_rpc
+
+_VOTE_TX_KEYS = [
+    "SysvarS1otHashes111111111111111111111111111",
+    "SysvarC1ock11111111111111111111111111111111",
+    "Vote111111111111111111111111111111111111111",
+]
+
+
+def _block(slot: int) -> dict:
+    vote_tx = {
+        "meta": {"err": None},
+        "transaction": {"message": {"accountKeys": ["a", "b", *_VOTE_TX_KEYS]}},
+    }
+    return {"blockTime": slot, "transactions": [vote_tx] * (slot % 3)}
+
+
+def test_scan_blocks(monkeypatch, tmp_path):
+    block_slots = [s for s in range(100, 400) if s % 4 != 0]  # each 4th slot is skipped
+    requested: list[int] = []
+
+    def get_blocks(node, start_slot, end_slot, **kwargs):
+        return Result(ok=[s for s in block_slots if start_slot <= s <= end_slot])
+
+    def rpc_call(*, node, method, params, **kwargs):
+        requested.append(params[0])
+        time.sleep(random.random() / 1000)  # nosec
+        return Result(ok=_block(params[0]))
+
+    monkeypatch.setattr(solana_rpc, "get_blocks", get_blocks)
+    monkeypatch.setattr(block, "rpc_call", rpc_call)
+    progress_path = str(tmp_path / "progress")
+
+    scan = block.scan_blocks("node", 100, 399, window=8, slots_per_request=50, progress_path=progress_path, progress_every=10)
+    first = [next(scan) for _ in range(25)]
+    scan.close()
+    assert [slot for slot, _ in first] == block_slots[:25]
+    assert all(res.ok.vote_tx_ok == slot % 3 for slot, res in first)
+    assert open(progress_path).read() == str(block_slots[19])
+
+    # resumed after the saved slot
+    rest = list(block.scan_blocks("node", 100, 399, window=8, progress_path=progress_path))
+    assert [slot for slot, _ in rest] == block_slots[20:]
+    assert open(progress_path).read() == "399"
+    assert not [s for s in requested if s % 4 == 0]
+
+
+def test_scan_blocks_errors(monkeypatch, tmp_path):
+    def get_blocks(node, start_slot, end_slot, **kwargs):
+        if start_slot >= 200:
+            return Result(error="timeout")
+        return Result(ok=list(range(start_slot, end_slot + 1)))
+
+    def rpc_call(*, node, method, params, **kwargs):
+        if params[0] == 105:
+            return Result(error="timeout")
+        return Result(ok=_block(params[0]))
+
+    monkeypatch.setattr(solana_rpc, "get_blocks", get_blocks)
+    monkeypatch.setattr(block, "rpc_call", rpc_call)
+    progress_path = str(tmp_path / "progress")
+
+    # a failed block is yielded, the progress stays before it. A failed getBlocks range stops the scan
+    results = list(block.scan_blocks("node", 100, 299, window=4, slots_per_request=100, progress_path=progress_path))
+    assert [slot for slot, _ in results] == list(range(100, 201))
+    assert results[5][1].error == "timeout"
+    assert results[-1][1].error == "timeout"
+    assert open(progress_path).read() == "104"
+
+
+def test_parse_block_tx_count_light():
+    def tx(keys: list[str], err=None, version=0) -> dict:
+        account_keys = [{"pubkey": k, "signer": i == 0, "source": "transaction", "writable": i < 2} for i, k in enumerate(keys)]
+        return {"meta": {"err": err}, "transaction": {"accountKeys": account_keys, "signatures": ["sig"]}, "version": version}
+
+    txs = [
+        tx(["validator", "vote_account", block.VOTE_PROGRAM_ID], version="legacy"),  # TowerSync, no sysvars
+        tx(["validator", "vote_account", block.VOTE_PROGRAM_ID], err={"InstructionError": [0, "Custom"]}),
+        tx(["user", "recipient", "11111111111111111111111111111111"]),
+    ]
+    res = block.parse_block_tx_count(1, Result(ok={"blockTime": 10, "transactions": txs}))
+    assert (res.ok.vote_tx_ok, res.ok.vote_tx_error, res.ok.non_vote_tx_ok, res.ok.non_vote_tx_error) == (1, 1, 1, 0)
@@ -0,0 +1,66 @@
+from array import array
+
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.block_production import BlockProductionTracker
+from mb_solana.solana_rpc import CompactBlockProduction, EpochInfo
+
+
+def test_block_production_params():
+    assert solana_rpc.block_production_params() == []
+    assert solana_rpc.block_production_params(10, identity="a") == [{"range": {"firstSlot": 10}, "identity": "a"}]
+    assert solana_rpc.block_production_params(10, 20) == [{"range": {"firstSlot": 10, "lastSlot": 20}}]
+
+
+def test_block_production_tracker(monkeypatch):
+    absolute_slot = 105
+    calls = []
+
+    def get_epoch_info(node, **kwargs):
+        info = {"epoch": absolute_slot // 100, "absoluteSlot": absolute_slot, "blockHeight": absolute_slot}
+        return Result(ok=EpochInfo(**info, slotIndex=absolute_slot % 100, slotsInEpoch=100, transactionCount=1))
+
+    def get_block_production(node, first_slot=None, last_slot=None, **kwargs):
+        calls.append((first_slot, last_slot))
+        slots = last_slot - first_slot + 1
+        res = CompactBlockProduction(
+            slot=absolute_slot,
+            first_slot=first_slot,
+            last_slot=last_slot,
+            addresses=["a", "b"],
+            produced=array("Q", [slots, 0]),
+            skipped=array("Q", [0, 1]),
+        )
+        return Result(ok=res)
+
+    monkeypatch.setattr(solana_rpc, "get_epoch_info", get_epoch_info)
+    monkeypatch.setattr(solana_rpc, "get_block_production", get_block_production)
+
+    tracker = BlockProductionTracker("node")
+    assert tracker.poll().ok.produced.tolist() == [6, 0]
+    absolute_slot = 109
+    tracker.poll()
+    assert tracker.poll().ok.addresses == []  # no new slots
+    assert calls == [(100, 105), (106, 109)]
+    assert tracker.produced == {"a": 10, "b": 0}
+    assert tracker.skip_rate("b") == 1.0
+    assert tracker.skip_rate("c") is None
+    snapshot = tracker.snapshot()
+    assert (snapshot.first_slot, snapshot.last_slot) == (100, 109)
+
+    # the next epoch: the rest of the previous one is polled first, its totals are kept until the new epoch is polled
+    absolute_slot = 203
+    tracker.poll()
+    assert calls[-1] == (110, 199)
+    assert tracker.produced == {"a": 100, "b": 0}
+    snapshot = tracker.snapshot()
+    assert (snapshot.first_slot, snapshot.last_slot) == (100, 199)
+    assert tracker.previous_epoch is None
+    tracker.poll()
+    assert calls[-1] == (200, 203)
+    assert tracker.produced == {"a": 4, "b": 0}
+    assert tracker.snapshot().first_slot == 200
+    previous_epoch = tracker.previous_epoch
+    assert (previous_epoch.first_slot, previous_epoch.last_slot) == (100, 199)
+    assert {leader.address: leader.produced for leader in previous_epoch.leaders} == {"a": 100, "b": 0}
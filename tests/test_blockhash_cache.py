@@ -0,0 +1,57 @@
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.blockhash_cache import (
+    BlockhashProvider,
+    close_shared_blockhash_providers,
+    is_stale_blockhash_error,
+    shared_blockhash_provider,
+)
+from mb_solana.solana_rpc import LatestBlockhash
+from mb_solana.transport import HttpTransport
+
+
+def test_blockhash_provider(monkeypatch):
+    calls = []
+
+    def get_latest_blockhash(node, **kwargs):
+        calls.append(node)
+        return Result(ok=LatestBlockhash(blockhash=f"hash{len(calls)}", lastValidBlockHeight=100))
+
+    monkeypatch.setattr(solana_rpc, "get_latest_blockhash", get_latest_blockhash)
+    provider = BlockhashProvider("node", background=False, refresh_interval=0)
+    assert provider.get().ok.blockhash == "hash1"
+    assert provider.get().ok.blockhash == "hash1"
+    assert provider.stats.misses == 1
+    assert provider.stats.hits == 1
+
+    provider.report_stale()
+    assert provider.get().ok.blockhash == "hash2"
+    assert provider.stats.stale_retries == 1
+    assert len(calls) == 2
+
+    # an expired blockhash is fetched again, even if it's younger than refresh_interval / 2
+    provider = BlockhashProvider("node", background=False, ttl=0, refresh_interval=60)
+    provider.get()
+    provider.get()
+    assert len(calls) == 4
+
+
+def test_shared_blockhash_provider(monkeypatch):
+    monkeypatch.setattr(solana_rpc, "get_latest_blockhash", lambda node, **kwargs: Result(ok=None))
+    transport = HttpTransport()
+    provider = shared_blockhash_provider("node", transport=transport)
+    assert shared_blockhash_provider("node", transport=transport) is provider
+    assert shared_blockhash_provider("node") is not provider
+    provider.get()
+    assert provider._thread is not None
+    close_shared_blockhash_providers()
+    assert provider._thread is None
+    assert shared_blockhash_provider("node", transport=transport) is not provider
+    close_shared_blockhash_providers()
+
+
+def test_is_stale_blockhash_error():
+    assert is_stale_blockhash_error("service_error: Transaction simulation failed: Blockhash not found")
+    assert not is_stale_blockhash_error("service_error: insufficient funds")
+    assert not is_stale_blockhash_error(None)
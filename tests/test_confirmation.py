@@ -0,0 +1,52 @@
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.confirmation import ConfirmationTracker, is_commitment_reached
+
+
+def test_confirmation_tracker(monkeypatch):
+    status_calls = []
+    statuses = {
+        "confirmed": {"slot": 1, "err": None, "confirmationStatus": "confirmed"},
+        "failed": {"slot": 1, "err": {"InstructionError": [0, "Custom"]}, "confirmationStatus": "finalized"},
+        "processed": {"slot": 1, "err": None, "confirmationStatus": "processed"},
+    }
+
+    # "evicted" landed, but it's out of the status cache of the node: only a history search finds it
+    history = {"evicted": {"slot": 1, "err": None, "confirmationStatus": "finalized"}}
+
+    def get_signature_statuses(node, signatures, search_transaction_history=False, **kwargs):
+        status_calls.append((len(signatures), search_transaction_history))
+        found = statuses | history if search_transaction_history else statuses
+        return Result(ok=[found.get(s) for s in signatures])
+
+    monkeypatch.setattr(solana_rpc, "get_block_height", lambda node, **kwargs: Result(ok=1000))
+    monkeypatch.setattr(solana_rpc, "get_signature_statuses", get_signature_statuses)
+
+    tracker = ConfirmationTracker("node", commitment="confirmed")
+    callbacks = {}
+    futures = {s: tracker.track(s, callback=callbacks.__setitem__) for s in ["confirmed", "failed", "processed", "unknown"]}
+    futures["expired"] = tracker.track("expired", last_valid_block_height=999)
+    futures["evicted"] = tracker.track("evicted", last_valid_block_height=999)
+    for i in range(600):
+        tracker.track(f"sig{i}", last_valid_block_height=2000)
+
+    resolved = tracker.poll()
+    assert status_calls == [(256, False), (256, False), (94, False), (2, True)]  # expired ones are searched in the history
+    assert set(resolved) == {"confirmed", "failed", "expired", "evicted"}
+    assert futures["evicted"].result().is_ok()
+    assert futures["confirmed"].result().ok["slot"] == 1
+    assert futures["failed"].result().error.startswith("failed")
+    assert futures["expired"].result().error == "expired"
+    assert set(callbacks) == {"confirmed", "failed"}
+    assert tracker.pending_count() == 602
+
+    tracker.stop()
+    assert futures["processed"].result().error == "stopped"
+
+
+def test_is_commitment_reached():
+    assert is_commitment_reached("finalized", "confirmed")
+    assert is_commitment_reached("confirmed", "confirmed")
+    assert not is_commitment_reached("processed", "confirmed")
+    assert not is_commitment_reached(None, "processed")
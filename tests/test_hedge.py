@@ -0,0 +1,27 @@
+import time
+
+from mb_std import Result
+
+from mb_solana.hedge import Hedger
+
+
+def test_hedge_wins_over_slow_node():
+    def call(node: str) -> Result[str]:
+        if node == "slow":
+            time.sleep(1)
+        return Result(ok=node)
+
+    with Hedger(initial_delay=0.05) as hedger:
+        # pick_node on a list is random, so call until the slow node is picked first
+        for _ in range(20):
+            assert hedger.call(["slow", "fast"], call).ok == "fast"
+        assert hedger.stats.hedged > 0
+        assert hedger.stats.hedged == hedger.stats.hedge_won
+
+
+def test_no_hedge_for_fast_nodes():
+    with Hedger(initial_delay=1) as hedger:
+        res = hedger.call(["a", "b"], lambda node: Result(ok=node))
+        assert res.ok in ("a", "b")
+        assert hedger.stats.calls == 1
+        assert hedger.stats.hedged == 0
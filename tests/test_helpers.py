@@ -1,8 +1,130 @@
 from decimal import Decimal
 
-from mb_solana.helpers import lamports_to_sol
+import base58
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.helpers import (
+    MAX_TX_SIZE,
+    SYSTEM_PROGRAM_ID,
+    find_transfers_many,
+    lamports_to_sol,
+    legacy_tx_size,
+    pack_transfers,
+    parse_transfers,
+    transfer_sol_many,
+)
+from mb_solana.response_cache import ResponseCache
+from mb_solana.solana_account import generate_account
+
+
+def _transfer_ix(source: str, destination: str, lamports: int) -> dict:
+    info = {"source": source, "destination": destination, "lamports": lamports}
+    return {"programId": SYSTEM_PROGRAM_ID, "parsed": {"type": "transfer", "info": info}}
+
+
+def _tx(lamports: int) -> dict:
+    instructions = [_transfer_ix("a", "b", lamports), {"programId": "other", "data": "x"}]
+    inner = [{"index": 1, "instructions": [_transfer_ix("c", "d", lamports + 1)]}]
+    return {"transaction": {"message": {"instructions": instructions}}, "meta": {"innerInstructions": inner}}
 
 
 def test_lamports_to_sol():
     res = lamports_to_sol(272356343007, ndigits=4)
     assert res == Decimal("272.3563")
+
+
+def test_pack_transfers():
+    transfers = [(f"recipient_{i}", i) for i in range(50)]
+    packs = pack_transfers(transfers, "payer")
+    assert [len(p) for p in packs] == [21, 21, 8]
+    assert [t for p in packs for t in p] == transfers
+    assert legacy_tx_size(1, 23, [(2, 12)] * 21) <= MAX_TX_SIZE < legacy_tx_size(1, 24, [(2, 12)] * 22)
+
+
+def test_parse_transfers():
+    res = parse_transfers(Result(ok=_tx(10)), inner=True)
+    assert [(t.source, t.destination, t.lamports) for t in res.ok] == [("a", "b", 10), ("c", "d", 11)]
+    res = parse_transfers(Result(ok=_tx(10)))
+    assert [(t.source, t.destination, t.lamports) for t in res.ok] == [("a", "b", 10)]
+    assert res.data["ok"] == _tx(10)  # data is the getTransaction result, res.dict()
+    res = parse_transfers(Result(ok=None))
+    assert (res.error, res.data["error"]) == ("exception", "not_found")
+    res = parse_transfers(Result(ok={"transaction": {}}))
+    assert res.error == "exception" and res.data["response"]["ok"] == {"transaction": {}}
+
+
+def test_find_transfers_many(monkeypatch):
+    batches = []
+
+    def get_transaction_batch(node, signatures, **kwargs):
+        batches.append(signatures)
+        return {s: Result(ok=_tx(int(s)) if s != "404" else None) for s in signatures}
+
+    monkeypatch.setattr(solana_rpc, "get_transaction_batch", get_transaction_batch)
+    cache = ResponseCache()
+    signatures = [str(i) for i in range(1, 6)] + ["404"]
+    res = dict(find_transfers_many("node", signatures, batch_size=2, cache=cache))
+    assert batches == [["1", "2"], ["3", "4"], ["5", "404"]]
+    assert res["3"].ok[0].lamports == 3
+    assert res["404"].is_error()
+
+    res = list(find_transfers_many("node", signatures, batch_size=2, cache=cache))
+    assert [s for s, _ in res] == signatures  # only the not found one is fetched again, after the cached ones
+    assert batches[-1] == ["404"]
+
+
+class _BlockhashProvider:
+    def __init__(self):
+        self.count = 0
+
+    def get(self) -> Result[solana_rpc.LatestBlockhash]:
+        self.count += 1
+        blockhash = base58.b58encode(bytes([self.count] * 32)).decode()
+        return Result(ok=solana_rpc.LatestBlockhash(blockhash=blockhash, lastValidBlockHeight=1150))
+
+    def report_stale(self):
+        pass
+
+
+def test_transfer_sol_many_unknown_outcome(monkeypatch):
+    """A send timed out, then the blockhash is rejected: the transaction is signed again only if it can't land"""
+    private_key = "2eP4yM63zQxBkoF2Rzzmank9AQ2qiPJExxb7AZ95UPxUpHf8XWgYpy7C5ZNy6zU3jj4nYPD1ijK4EzLLZDwkxZXM"
+    from_address = "9wkxjGXrRhHB9pFZrEpQKBKAJ52jMjVUahnVNezJFvL7"
+    recipients = {generate_account().public_key: Decimal("0.1")}
+
+    def run(status: dict | None, block_height: int, errors: list[str] | None = None) -> tuple[Result, list[str]]:
+        errors = errors or ["exception: timed out", "service_error: Blockhash not found"]
+        sent: list[str] = []
+
+        def send_transaction(node, raw_tx, **kwargs):
+            sent.append(base58.b58encode(raw_tx[1:65]).decode())
+            return Result(error=errors.pop(0)) if errors else Result(ok=sent[-1])
+
+        monkeypatch.setattr(solana_rpc, "send_transaction", send_transaction)
+        monkeypatch.setattr(solana_rpc, "get_signature_statuses", lambda node, signatures, **kwargs: Result(ok=[status]))
+        monkeypatch.setattr(solana_rpc, "get_block_height", lambda node, **kwargs: Result(ok=block_height))
+        res = transfer_sol_many(
+            from_address=from_address,
+            private_key_base58=private_key,
+            recipients=recipients,
+            node="node",
+            blockhash_provider=_BlockhashProvider(),  # type:ignore
+        )
+        return list(res.values())[0], sent
+
+    # the timed out send landed
+    res, sent = run({"slot": 1, "err": None, "confirmationStatus": "finalized"}, 1000)
+    assert res.ok == sent[0] and len(sent) == 2
+
+    # it's not found and its blockhash expired: signed again
+    res, sent = run(None, 1200)
+    assert res.ok == sent[2] != sent[0]
+
+    # it's not found, but it can still land: sent again as is
+    res, sent = run(None, 1000)
+    assert res.ok == sent[2] == sent[0]
+
+    # every send timed out: the error has the signature, it may still land
+    res, sent = run(None, 1000, ["exception: timed out"] * 3)
+    assert res.error == "exception: timed out" and res.data["signature"] == sent[0]
@@ -0,0 +1,15 @@
+import pytest
+
+from mb_solana.json_decoder import DECODERS, available_decoders, get_decoder
+
+
+def test_get_decoder():
+    body = b'{"jsonrpc": "2.0", "result": {"value": [1, "a", null]}, "id": 1}'
+    for name in available_decoders():
+        assert get_decoder(name)(body)["result"] == {"value": [1, "a", None]}
+    assert get_decoder()(body)["id"] == 1
+    assert "stdlib" in available_decoders()
+
+    with pytest.raises(ValueError):
+        get_decoder("ujson")
+    assert set(available_decoders()) <= set(DECODERS)
@@ -0,0 +1,48 @@
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.leader_schedule import LeaderSchedule, LeaderScheduleCache
+from mb_solana.solana_rpc import EpochInfo
+
+
+def test_leader_schedule():
+    schedule = LeaderSchedule.from_rpc(10, 1000, {"a": [0, 1, 2, 3, 8, 9, 10, 11], "b": [4, 5, 6, 7]})
+    assert schedule.last_slot == 1011
+    assert schedule.leader(1000) == "a"
+    assert schedule.leader(1005) == "b"
+    assert schedule.leader(1012) is None
+    assert schedule.slots("b") == [1004, 1005, 1006, 1007]
+    assert schedule.next_slots("a", 1002) == [1003, 1008, 1009, 1010, 1011]
+    assert schedule.next_slots("a", 1002, limit=2) == [1003, 1008]
+    assert schedule.next_slots("c", 1002) == []
+    assert schedule.upcoming(1006, 3) == [(1006, "b"), (1007, "b"), (1008, "a")]
+    assert LeaderSchedule.from_dict(schedule.to_dict()).slots("a") == schedule.slots("a")
+
+
+def test_leader_schedule_cache(monkeypatch, tmp_path):
+    calls = []
+
+    def get_leader_scheduler(node, slot, **kwargs):
+        calls.append(slot)
+        return Result(ok={"a": [0, 1], "b": [2, 3]})
+
+    epoch_info = {
+        "epoch": 10,
+        "absoluteSlot": 41,
+        "blockHeight": 40,
+        "slotIndex": 1,
+        "slotsInEpoch": 4,
+        "transactionCount": 1,
+    }
+    monkeypatch.setattr(solana_rpc, "get_epoch_info", lambda node, **kwargs: Result(ok=EpochInfo(**epoch_info)))
+    monkeypatch.setattr(solana_rpc, "get_leader_scheduler", get_leader_scheduler)
+
+    cache = LeaderScheduleCache("node", cache_dir=str(tmp_path))
+    assert cache.get().ok.first_slot == 40
+    assert cache.leader(42).ok == "b"
+    assert cache.leader(44).ok == "a"  # the next epoch
+    assert calls == [40, 44]
+
+    # a new cache reads the schedules from the disk
+    assert LeaderScheduleCache("node", cache_dir=str(tmp_path)).leader(45).ok == "a"
+    assert calls == [40, 44]
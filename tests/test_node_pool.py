@@ -0,0 +1,28 @@
+from mb_solana.node_pool import NodePool
+
+
+def test_pick_fastest_node():
+    pool = NodePool(["fast", "slow"], spread=1)
+    pool.report("fast", 0.1, True)
+    pool.report("slow", 2.0, True)
+    assert {pool.pick() for _ in range(10)} == {"fast"}
+
+
+def test_eject_and_probe():
+    pool = NodePool(["a", "b"], spread=1, max_consecutive_errors=2, eject_seconds=0)
+    pool.report("b", 1.0, True)
+    pool.report("a", 0.1, False)
+    pool.report("a", 0.1, False)
+    assert pool.stats()[-1].node == "a"
+    assert pool.stats()[-1].is_ejected
+
+    assert pool.pick() == "a"  # the probe request
+    pool.report("a", 0.1, True)
+    assert not pool.stats()[0].is_ejected
+
+
+def test_slot_lag():
+    pool = NodePool(["a", "b"], spread=2, max_slot_lag=10)
+    pool.report_slot("a", 1000)
+    pool.report_slot("b", 900)
+    assert {pool.pick() for _ in range(10)} == {"a"}
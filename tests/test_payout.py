@@ -0,0 +1,81 @@
+import base64
+import json
+
+import base58
+import httpx
+
+from mb_solana.payout import pipelined_transfer_sol
+from mb_solana.solana_account import generate_account
+
+PRIVATE_KEY = "2eP4yM63zQxBkoF2Rzzmank9AQ2qiPJExxb7AZ95UPxUpHf8XWgYpy7C5ZNy6zU3jj4nYPD1ijK4EzLLZDwkxZXM"
+
+
+class FakeCluster:
+    """Transactions sent to it land at once. landed_long_ago are known only to a status lookup with history search."""
+
+    def __init__(self, landed_long_ago: set[str]):
+        self.landed_long_ago = landed_long_ago
+        self.landed: set[str] = set()
+        self.sent: list[str] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        data = json.loads(request.content)
+        method, params = data["method"], data["params"]
+        if method == "getBlockHeight":
+            result = 1000
+        elif method == "getLatestBlockhash":
+            result = {"context": {"slot": 1}, "value": {"blockhash": "1" * 32, "lastValidBlockHeight": 1150}}
+        elif method == "sendTransaction":
+            raw_tx = base64.b64decode(params[0])
+            result = base58.b58encode(raw_tx[1:65]).decode()  # the first signature, after its compact-u16 count
+            if len(raw_tx) > 65:  # the checkpointed transactions of the test are fake ones, they never land
+                self.landed.add(result)
+                self.sent.append(result)
+        elif method == "getSignatureStatuses":
+            known = self.landed | self.landed_long_ago if params[1]["searchTransactionHistory"] else self.landed
+            status = {"slot": 1, "err": None, "confirmationStatus": "finalized"}
+            result = {"context": {"slot": 1}, "value": [status if s in known else None for s in params[0]]}
+        else:
+            raise ValueError(method)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "result": result, "id": data["id"]})
+
+
+def test_pipelined_transfer_sol_resume(tmp_path, mock_transport):
+    landed, lost, done, new = [generate_account().public_key for _ in range(4)]
+    checkpoint_path = tmp_path / "payout.jsonl"
+    fake_tx = base64.b64encode(b"\x01" + b"\x00" * 64).decode()
+    entries = [
+        # sent before the interruption and landed, it's out of the status cache by now
+        {"recipient": landed, "status": "sent", "signature": "landed_sig", "raw_tx": fake_tx, "last_valid_block_height": 900},
+        # sent before the interruption, but it never landed and its blockhash expired
+        {"recipient": lost, "status": "sent", "signature": "lost_sig", "raw_tx": fake_tx, "last_valid_block_height": 900},
+        {"recipient": done, "status": "confirmed", "signature": "done_sig", "error": None, "last_valid_block_height": 900},
+    ]
+    checkpoint_path.write_text("".join(json.dumps(e) + "\n" for e in entries))
+
+    cluster = FakeCluster(landed_long_ago={"landed_sig"})
+    report = pipelined_transfer_sol(
+        private_key=PRIVATE_KEY,
+        recipients={landed: 1, lost: 2, done: 3, new: 4},
+        nodes="http://node",
+        checkpoint_path=str(checkpoint_path),
+        poll_interval=0.01,
+        confirm_timeout=5,
+        transport=mock_transport(cluster.handler),
+    )
+
+    assert report.errors == {}
+    assert report.signatures[landed] == "landed_sig"  # found in the history, it's not paid twice
+    assert report.signatures[done] == "done_sig"
+    assert report.sent == 2  # only the expired one and the new one are signed
+    assert sorted(cluster.sent) == sorted([report.signatures[lost], report.signatures[new]])
+
+    history: dict[str, list[str]] = {}
+    for entry in map(json.loads, checkpoint_path.read_text().splitlines()):
+        history.setdefault(entry["recipient"], []).append(entry["status"])
+    assert history == {
+        landed: ["sent", "confirmed"],
+        lost: ["sent", "expired", "sent", "confirmed"],
+        done: ["confirmed"],
+        new: ["sent", "confirmed"],
+    }
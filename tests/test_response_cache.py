@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+from mb_std import Result
+
+from mb_solana.response_cache import CachePolicy, ResponseCache
+
+
+def test_ttl_and_lru():
+    calls = []
+
+    def fetch(value):
+        calls.append(value)
+        return Result(ok={"value": value})
+
+    cache = ResponseCache({"getSlot": CachePolicy(ttl=0.1, max_size=2)})
+    assert cache.call("getSlot", [1], lambda: fetch(1)).ok == {"value": 1}
+    assert cache.call("getSlot", [1], lambda: fetch(1)).ok == {"value": 1}
+    cache.call("getSlot", [2], lambda: fetch(2))
+    cache.call("getSlot", [3], lambda: fetch(3))  # [1] is dropped
+    cache.call("getSlot", [1], lambda: fetch(1))
+    assert calls == [1, 2, 3, 1]
+    time.sleep(0.15)
+    cache.call("getSlot", [1], lambda: fetch(1))
+    assert calls == [1, 2, 3, 1, 1]
+    stats = cache.stats("getSlot")
+    assert (stats.hits, stats.misses) == (1, 5)
+
+    # errors, None results and methods without a policy aren't cached
+    cache.call("getTransaction", ["a"], lambda: Result(ok=None))
+    cache.call("getTransaction", ["a"], lambda: Result(error="timeout"))
+    cache.call("getBalance", ["a"], lambda: Result(ok=1))
+    cache.call("getBalance", ["a"], lambda: Result(ok=1))
+    assert cache.stats().hits == 1
+
+
+def test_coalescing():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return Result(ok=[1, 2])
+
+    cache = ResponseCache()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.call("getVoteAccounts", [], fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert [r.ok for r in results] == [[1, 2]] * 5
+    assert cache.stats("getVoteAccounts").coalesced == 4
+
+
+def test_async_coalescing():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return Result(ok={"epoch": 1})
+
+    async def main():
+        cache = ResponseCache()
+        return await asyncio.gather(*[cache.acall("getEpochInfo", [], fetch) for _ in range(10)])
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r.ok == {"epoch": 1} for r in results)
+
+
+def test_disk_store(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    with ResponseCache(db_path=db_path) as cache:
+        cache.call("getTransaction", ["sig1", "json"], lambda: Result(ok={"slot": 1}))
+        cache.call("getTransaction", ["sig2", {"commitment": "confirmed"}], lambda: Result(ok={"slot": 2}))
+
+    with ResponseCache(db_path=db_path) as cache:
+        assert cache.call("getTransaction", ["sig1", "json"], lambda: Result(error="not_cached")).ok == {"slot": 1}
+        assert cache.call("getTransaction", ["sig2", {"commitment": "confirmed"}], lambda: Result(error="not_cached")).is_error()
+        assert cache.stats().disk_hits == 1
+
+
+def test_call_ttl(monkeypatch):
+    cache = ResponseCache()
+    calls = []
+
+    def fetch(value):
+        calls.append(value)
+        return Result(ok=value)
+
+    # the current epoch schedule changes at the rollover, a schedule of an explicit slot doesn't
+    cache.call("getLeaderSchedule", [None], lambda: fetch("current"))
+    cache.call("getLeaderSchedule", [None], lambda: fetch("current"))
+    cache.call("getLeaderSchedule", [100], lambda: fetch("slot"))
+    cache.call("getLeaderSchedule", [100], lambda: fetch("slot"))
+    assert calls == ["current", "current", "slot"]
+
+    # a confirmed transaction expires, a finalized one is kept
+    now = time.monotonic()
+    cache.call("getTransaction", ["sig1", "json"], lambda: fetch("finalized"))
+    cache.call("getTransaction", ["sig2", {"commitment": "confirmed"}], lambda: fetch("confirmed"))
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    cache.call("getTransaction", ["sig1", "json"], lambda: fetch("finalized"))
+    cache.call("getTransaction", ["sig2", {"commitment": "confirmed"}], lambda: fetch("confirmed"))
+    assert calls[3:] == ["finalized", "confirmed", "confirmed"]
@@ -1,3 +1,7 @@
+import json
+
+import httpx
+
 from mb_solana import solana_account
 from mb_solana.solana_account import check_private_key, generate_account
 
@@ -104,3 +108,41 @@ def test_get_private_key_arr_str():
     private_key = "2eP4yM63zQxBkoF2Rzzmank9AQ2qiPJExxb7AZ95UPxUpHf8XWgYpy7C5ZNy6zU3jj4nYPD1ijK4EzLLZDwkxZXM"
     res = "[82,64,164,208,0,155,36,201,208,109,43,74,205,156,170,228,146,161,5,178,220,84,195,1,26,161,196,249,242,208,176,186,132,228,144,215,19,161,75,120,161,187,133,19,177,120,198,161,218,5,75,159,126,193,98,18,233,227,129,128,197,153,227,104]"  # noqa
     assert solana_account.get_private_key_arr_str(private_key) == res
+
+
+def test_is_empty_account_batch(mock_transport):
+    def handler(request: httpx.Request) -> httpx.Response:
+        response = []
+        for item in reversed(json.loads(request.content)):
+            address = item["params"][0]
+            if address == "bad":
+                response.append({"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid param"}, "id": item["id"]})
+                continue
+            value = None if address.startswith("empty") else {"lamports": 1, "data": ["", "base64"]}
+            response.append({"jsonrpc": "2.0", "result": {"context": {"slot": 1}, "value": value}, "id": item["id"]})
+        return httpx.Response(200, json=response)
+
+    addresses = ["empty1", "full1", "bad", "empty2", "full2"]
+    res = solana_account.is_empty_account_batch(
+        addresses=addresses, node="http://node", batch_size=2, transport=mock_transport(handler)
+    )
+    assert list(res) == addresses
+    assert [res[a].ok for a in addresses] == [True, False, None, True, False]
+    assert res["bad"].error == "service_error: Invalid param"
+
+
+def test_are_empty_accounts(mock_transport):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        data = json.loads(request.content)
+        requests.append(data["params"])
+        value = [None if int(address[1:]) % 3 == 0 else {"lamports": 1, "data": ["", "base64"]} for address in data["params"][0]]
+        return httpx.Response(200, json={"jsonrpc": "2.0", "result": {"context": {"slot": 1}, "value": value}, "id": data["id"]})
+
+    addresses = [f"a{i}" for i in range(250)]
+    res = solana_account.are_empty_accounts(addresses, nodes="http://node", transport=mock_transport(handler))
+    assert sorted(len(params[0]) for params in requests) == [50, 100, 100]
+    assert all(params[1]["dataSlice"] == {"offset": 0, "length": 0} for params in requests)
+    assert list(res) == addresses
+    assert [res[a].ok for a in addresses] == [i % 3 == 0 for i in range(250)]
@@ -0,0 +1,46 @@
+import subprocess
+from decimal import Decimal
+
+from mb_std import shell
+
+from mb_solana import solana_cli
+
+
+class _CommandResult:
+    def __init__(self, stdout: str, code=0):
+        self.stdout = stdout
+        self.stderr = ""
+        self.code = code
+
+
+def test_cli_batch(monkeypatch, tmp_path):
+    # a fake solana binary, the batch script runs with the local sh
+    solana = tmp_path / "solana"
+    solana.write_text(
+        "#!/bin/sh\n"
+        'case "$1" in\n'
+        '  balance) printf "%s SOL" "$2" ;;\n'
+        '  stake-account) echo \'{"stakeType": "Stake", "accountBalance": 2000000000, "withdrawer": "w", "staker": "s"}\' ;;\n'
+        '  vote-account) echo \'{"epochRewards": [{"epoch": 2, "amount": 3000000000}]}\'; echo noise >&2 ;;\n'
+        "  *) echo unknown >&2; exit 1 ;;\n"
+        "esac\n",
+    )
+    solana.chmod(0o755)
+
+    def run_command(cmd, timeout=60):
+        process = subprocess.run(cmd, shell=True, capture_output=True, timeout=timeout, text=True)
+        return _CommandResult(process.stdout, process.returncode)
+
+    monkeypatch.setattr(shell, "run_command", run_command)
+    batch = solana_cli.CliBatch(solana_dir=str(tmp_path), parallel=2)
+    batch.get_balance("1.25").get_stake_account("stake").get_vote_account_rewards("vote").get_balance("bad")
+    results = batch.run()
+    assert results[0].ok == Decimal("1.25")
+    assert results[1].ok.balance == 2
+    assert results[2].ok == {2: 3}
+    assert results[3].is_error()
+
+
+def test_parse_framed_output():
+    output = "b 0 out\n1 SOL\nb 0 err\n\nb 1 out\nline1\nline2\n\nb 1 err\noops\n"
+    assert solana_cli.parse_framed_output(output, "b") == {0: ("1 SOL", ""), 1: ("line1\nline2\n", "oops")}
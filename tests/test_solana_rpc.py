@@ -0,0 +1,102 @@
+import json
+from typing import Any
+
+import httpx
+from mb_std import Result
+
+from mb_solana import solana_rpc
+
+
+def test_parse_vote_accounts_compact():
+    def account(vote: str) -> dict:
+        return {
+            "votePubkey": vote,
+            "nodePubkey": f"{vote}_node",
+            "activatedStake": 10**15,
+            "epochVoteAccount": True,
+            "commission": 10,
+            "lastVote": 1000,
+            "epochCredits": [[1, 300, 100], [2, 500, 300]],
+            "rootSlot": 970,
+        }
+
+    res = Result(ok={"current": [account("v1")], "delinquent": [account("v2")]})
+    models = solana_rpc.parse_vote_accounts(Result(ok=res.ok)).ok
+    compact = solana_rpc.parse_vote_accounts(Result(ok=res.ok), compact=True).ok
+    assert [a.delinquent for a in compact] == [False, True]
+    assert compact[0].epoch_credits() == [(1, 300, 100), (2, 500, 300)]
+    assert [a.to_model() for a in compact] == models
+
+
+def test_parse_block_production_compact():
+    value = {"byIdentity": {"a": [8, 6], "b": [4, 4]}, "range": {"firstSlot": 100, "lastSlot": 200}}
+    res = Result(ok={"context": {"slot": 201}, "value": value})
+    compact = solana_rpc.parse_block_production(res, compact=True).ok
+    assert list(compact.skipped) == [2, 0]
+    assert compact.to_model() == solana_rpc.parse_block_production(res).ok
+
+
+def batch_handler(results: dict[str, Any]):
+    """Answers a JSON RPC batch in reverse order, results maps params[0] to a result, an Exception value is an error"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "down":
+            return httpx.Response(503, text="unavailable")
+        response = []
+        for item in reversed(json.loads(request.content)):
+            value = results[item["params"][0]]
+            if isinstance(value, Exception):
+                response.append({"jsonrpc": "2.0", "error": {"code": -32602, "message": str(value)}, "id": item["id"]})
+            else:
+                response.append({"jsonrpc": "2.0", "result": value, "id": item["id"]})
+        return httpx.Response(200, json=response)
+
+    return handler
+
+
+def test_rpc_batch_call(mock_transport):
+    transport = mock_transport(batch_handler({"a": 1, "b": ValueError("invalid param"), "c": 3}))
+    calls = [("getBalance", ["a"]), ("getBalance", ["b"]), ("getBalance", ["c"])]
+    results = solana_rpc.rpc_batch_call(node="http://node", calls=calls, batch_size=2, transport=transport)
+    assert [r.ok for r in results] == [1, None, 3]
+    assert results[1].error == "service_error: invalid param"
+
+    results = solana_rpc.rpc_batch_call(node="http://down", calls=calls, batch_size=2, transport=transport)
+    assert [r.error for r in results] == ["http_error: 503"] * 3
+
+    results = solana_rpc.rpc_batch_call(node="ws://node", calls=calls, transport=transport)
+    assert [r.error for r in results] == ["batch calls are not supported over ws"] * 3
+
+
+def test_parse_rpc_batch_response():
+    data = [{"jsonrpc": "2.0", "method": "getSlot", "params": [], "id": i} for i in range(3)]
+    results = solana_rpc.parse_rpc_batch_response(data, [{"result": 2, "id": 2}, {"result": 0, "id": 0}])
+    assert [r.ok for r in results] == [0, None, 2]
+    assert results[1].error == "no_response"
+
+    results = solana_rpc.parse_rpc_batch_response(data, {"error": {"code": -32600, "message": "batch too large"}})
+    assert [r.error for r in results] == ["service_error: batch too large"] * 3
+
+
+def test_get_balance_batch(mock_transport):
+    balance = {"context": {"slot": 1}, "value": 5}
+    transport = mock_transport(batch_handler({"a": balance, "b": ValueError("invalid param"), "c": balance | {"value": 7}}))
+    res = solana_rpc.get_balance_batch("http://node", ["a", "b", "c"], batch_size=2, transport=transport)
+    assert list(res) == ["a", "b", "c"]
+    assert (res["a"].ok, res["b"].ok, res["c"].ok) == (5, None, 7)
+    assert res["b"].is_error()
+
+    res = solana_rpc.get_balance_batch("http://down", ["a", "b"], transport=transport)
+    assert all(r.error == "http_error: 503" for r in res.values())
+
+
+def test_get_transaction_batch(mock_transport):
+    tx = {"slot": 10, "meta": {"err": None}}
+    transport = mock_transport(batch_handler({"s1": tx, "s2": None, "s3": ValueError("invalid signature")}))
+    res = solana_rpc.get_transaction_batch("http://node", ["s1", "s2", "s3"], transport=transport)
+    assert res["s1"].ok == tx
+    assert res["s2"].is_ok() and res["s2"].ok is None
+    assert res["s3"].error == "service_error: invalid signature"
+
+    res = solana_rpc.get_transaction_batch("http://down", ["s1"], transport=transport)
+    assert res["s1"].error == "http_error: 503"
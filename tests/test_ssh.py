@@ -0,0 +1,59 @@
+import os
+import shlex
+import stat
+
+import pytest
+from mb_std import shell
+
+from mb_solana import solana_cli
+from mb_solana.ssh import SshSession, shared_ssh_session
+
+
+class _CommandResult:
+    def __init__(self, stdout: str, code=0):
+        self.stdout = stdout
+        self.stderr = ""
+        self.code = code
+
+
+def test_ssh_session(monkeypatch, tmp_path):
+    cmds = []
+
+    def run_command(cmd, timeout=60):
+        cmds.append(cmd)
+        return _CommandResult("1.5 SOL")
+
+    monkeypatch.setattr(shell, "run_command", run_command)
+    session = SshSession("user@host", "/keys/id", control_dir=str(tmp_path))
+    res = solana_cli.get_balance(address="addr", ssh_session=session)
+    assert res.ok == 1.5
+
+    args = shlex.split(cmds[0])
+    assert args[:1] == ["ssh"] and args[-2:] == ["user@host", "solana balance addr -u localhost"]
+    assert f"ControlPath={session.control_path}" in args and "ControlMaster=auto" in args
+    key_option = args.index("-i")
+    assert args[key_option + 1] == "/keys/id"
+
+    assert "StrictHostKeyChecking=no" not in args  # it's opt-in
+    assert (
+        "StrictHostKeyChecking=no" in SshSession("user@host", control_dir=str(tmp_path), strict_host_key_checking=False).ssh_cmd()
+    )
+
+    assert [r.stdout for r in session.run_many(["a", "b", "c"])] == ["1.5 SOL"] * 3
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    assert shared_ssh_session("user@host") is shared_ssh_session("user@host")
+    assert shared_ssh_session("user@host") is not shared_ssh_session("user@host", "/keys/id")
+
+
+def test_control_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    session = SshSession("user@host")
+    control_dir = os.path.dirname(session.control_path)
+    assert control_dir == str(tmp_path / ".ssh" / "mb-solana")
+    assert stat.S_IMODE(os.stat(control_dir).st_mode) == 0o700
+
+    shared_dir = tmp_path / "shared"
+    shared_dir.mkdir(mode=0o777)
+    shared_dir.chmod(0o777)
+    with pytest.raises(PermissionError):
+        SshSession("user@host", control_dir=str(shared_dir))
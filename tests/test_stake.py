@@ -0,0 +1,64 @@
+import base64
+import struct
+from decimal import Decimal
+
+import base58
+from mb_std import Result
+
+from mb_solana import solana_rpc, stake
+from mb_solana.solana_rpc import EpochInfo
+from mb_solana.stake import MAX_EPOCH, STAKE_PROGRAM_ID, decode_stake_state
+
+
+def _pubkey(n: int) -> bytes:
+    return bytes([n]) * 32
+
+
+def _stake_data(activation_epoch=10, deactivation_epoch=MAX_EPOCH, lockup_epoch=0) -> bytes:
+    meta = struct.pack("<Q32s32sqQ32s", 2282880, _pubkey(1), _pubkey(2), 0, lockup_epoch, _pubkey(3))
+    delegation = struct.pack("<32sQQQdQ", _pubkey(4), 5 * 10**9, activation_epoch, deactivation_epoch, 0.25, 77)
+    data = struct.pack("<I", 2) + meta + delegation
+    return data + b"\0" * (200 - len(data))
+
+
+def _account(data: bytes, lamports: int) -> dict:
+    return {"owner": STAKE_PROGRAM_ID, "lamports": lamports, "data": [base64.b64encode(data).decode(), "base64"]}
+
+
+def test_decode_stake_state():
+    state = decode_stake_state(_stake_data())
+    assert state.type == "Stake"
+    assert (state.staker, state.withdrawer, state.vote) == tuple(base58.b58encode(_pubkey(n)).decode() for n in (1, 2, 4))
+    assert (state.stake, state.activation_epoch, state.credits_observed) == (5 * 10**9, 10, 77)
+    assert [state.active_stake(epoch) for epoch in (10, 11)] == [0, 5 * 10**9]
+    assert decode_stake_state(_stake_data(deactivation_epoch=12)).active_stake(13) == 0
+    assert decode_stake_state(struct.pack("<I", 0) + b"\0" * 196).type == "Uninitialized"
+
+
+def test_get_stake_account_and_stakes(monkeypatch):
+    vote = base58.b58encode(_pubkey(4)).decode()
+    calls = []
+
+    def get_program_accounts(node, program_id, filters, **kwargs):
+        calls.append(filters)
+        accounts = [_stake_data(), _stake_data(activation_epoch=20, lockup_epoch=30)]
+        return Result(ok=[{"pubkey": f"stake{i}", "account": _account(d, 6 * 10**9)} for i, d in enumerate(accounts)])
+
+    epoch_info = {"epoch": 20, "absoluteSlot": 1, "blockHeight": 1, "slotIndex": 1, "slotsInEpoch": 10, "transactionCount": 1}
+    monkeypatch.setattr(solana_rpc, "get_epoch_info", lambda node, **kwargs: Result(ok=EpochInfo(**epoch_info)))
+    monkeypatch.setattr(solana_rpc, "get_program_accounts", get_program_accounts)
+    stake_account = _account(_stake_data(), 10**9)
+    monkeypatch.setattr(solana_rpc, "get_multiple_accounts", lambda node, addresses, **kwargs: Result(ok=[stake_account]))
+    monkeypatch.setattr(solana_rpc, "get_balance", lambda node, address, **kwargs: Result(ok=1_500_000_001))
+
+    assert stake.get_balance("node", "addr").ok == Decimal("1.500000001")
+
+    account = stake.get_stake_account("node", "addr").ok
+    assert (account.type, account.balance, account.vote) == ("Stake", 1, vote)
+
+    stakes = stake.get_stakes("node", vote).ok
+    assert calls == [[{"dataSize": 200}, {"memcmp": {"offset": 124, "bytes": vote}}]]
+    assert [(s.stake_address, s.balance, s.delegated, s.active, s.lock_time) for s in stakes] == [
+        ("stake0", 6, 5, 5, None),
+        ("stake1", 6, 5, None, 0),  # activating in the epoch, locked until epoch 30
+    ]
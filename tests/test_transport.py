@@ -0,0 +1,55 @@
+import json
+
+import httpx
+import pytest
+from solana.exceptions import SolanaRpcException
+
+
+def test_post(mock_transport):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "down":
+            return httpx.Response(502, text="bad gateway")
+        if request.url.host == "broken":
+            return httpx.Response(200, text="not json")
+        return httpx.Response(200, json={"jsonrpc": "2.0", "result": json.loads(request.content)["method"], "id": 1})
+
+    transport = mock_transport(handler)
+    data = {"jsonrpc": "2.0", "method": "getSlot", "params": [], "id": 1}
+
+    res = transport.post("http://node", data, timeout=10)
+    assert res.ok["result"] == "getSlot"
+    assert res.data == {"node": "http://node", "http_code": 200}  # the body isn't kept for ok responses
+
+    res = transport.post("http://node", data, timeout=10, raw=True)
+    assert json.loads(res.ok)["result"] == "getSlot"
+
+    res = transport.post("http://down", data, timeout=10)
+    assert res.error == "http_error: 502"
+    assert res.data["body"] == "bad gateway"
+
+    res = transport.post("http://broken", data, timeout=10)
+    assert res.error.startswith("exception:")
+    assert res.data["body"] == "not json"
+
+
+def test_solana_client(mock_transport):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"jsonrpc": "2.0", "result": {"context": {"slot": 1}, "value": 5}, "id": 1})
+
+    transport = mock_transport(handler)
+    client = transport.solana_client("http://node")
+    assert client is transport.solana_client("http://node")
+    assert client.get_balance("11111111111111111111111111111111")["result"]["value"] == 5
+    assert requests[0]["method"] == "getBalance"
+
+
+def test_solana_client_exception(mock_transport):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = mock_transport(handler).solana_client("http://node")
+    with pytest.raises(SolanaRpcException):
+        client.get_balance("11111111111111111111111111111111")
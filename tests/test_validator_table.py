@@ -0,0 +1,50 @@
+import pytest
+from mb_std import Result
+
+from mb_solana import solana_rpc
+from mb_solana.solana_cli import ValidatorInfo
+
+np = pytest.importorskip("numpy")
+validator_table = pytest.importorskip("mb_solana.validator_table")
+
+
+def _vote_accounts(compact: bool) -> list:
+    def account(i: int, commission: int, stake: int, epoch_credits: list) -> dict:
+        return {
+            "votePubkey": f"vote{i}",
+            "nodePubkey": f"node{i}",
+            "activatedStake": stake,
+            "epochVoteAccount": True,
+            "commission": commission,
+            "lastVote": 1000,
+            "epochCredits": epoch_credits,
+            "rootSlot": 970,
+        }
+
+    current = [account(1, 0, 300, [[10, 100, 0], [11, 250, 100]]), account(2, 10, 100, [[11, 50, 0]])]
+    delinquent = [account(3, 100, 100, [[10, 20, 0]])]
+    return solana_rpc.parse_vote_accounts(Result(ok={"current": current, "delinquent": delinquent}), compact).ok
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_validator_table(compact):
+    table = validator_table.ValidatorTable(_vote_accounts(compact))
+    assert list(table.epochs) == [10, 11]
+    assert table.credits.tolist() == [[100, 150], [0, 50], [20, 0]]
+    assert list(table.epoch_credits(10)) == [100, 0, 20]
+    assert list(table.epoch_credits(12)) == [0, 0, 0]
+    assert table.delinquent_stake_share() == 0.2
+    assert table.stake_weighted_mean(table.commission.astype(float), mask=~table.delinquent) == 2.5
+
+    count, stake = table.commission_buckets([0, 5, 50, 101])
+    assert list(count) == [1, 1, 1]
+    assert list(stake) == [300, 100, 100]
+
+    value = {"byIdentity": {"node1": [8, 6], "unknown": [4, 4]}, "range": {"firstSlot": 100, "lastSlot": 200}}
+    table.join_block_production(solana_rpc.parse_block_production(Result(ok={"context": {"slot": 1}, "value": value}), True).ok)
+    assert table.skipped_rate[0] == 0.25
+    assert np.isnan(table.skipped_rate[1])
+
+    info = ValidatorInfo(identity_address="node2", info_address="i", name="two", keybase=None, website=None, details=None)
+    table.join_validators_info([info])
+    assert list(table.name) == [None, "two", None]
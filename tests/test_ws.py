@@ -0,0 +1,153 @@
+import asyncio
+import json
+
+import websockets
+
+from mb_solana import aio, solana_rpc
+from mb_solana.ws import WsClient, http_to_ws_url
+
+
+class StandInServer:
+    """Answers subscribe requests with a new subscription id. notify() sends a notification to all subscriptions of a method."""
+
+    def __init__(self):
+        self.requests: list[dict] = []
+        self.connections: list = []
+        self._subscriptions: dict[int, tuple] = {}  # subscription id -> (connection, method)
+        self._next_id = 0
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def notify(self, method: str, result):
+        for subscription_id, (connection, method_) in list(self._subscriptions.items()):
+            if method_ == method:
+                notification_method = method.replace("Subscribe", "Notification")
+                params = {"result": result, "subscription": subscription_id}
+                await connection.send(json.dumps({"jsonrpc": "2.0", "method": notification_method, "params": params}))
+
+    async def drop_connections(self):
+        for connection in self.connections:
+            await connection.close()
+        self._subscriptions.clear()
+
+    async def _handle(self, connection, path=None):
+        self.connections.append(connection)
+        async for message in connection:
+            request = json.loads(message)
+            self.requests.append(request)
+            if request["method"].endswith("Subscribe"):
+                self._next_id += 1
+                self._subscriptions[self._next_id] = (connection, request["method"])
+                response = {"jsonrpc": "2.0", "result": self._next_id, "id": request["id"]}
+            elif request["method"].endswith("Unsubscribe"):
+                response = {"jsonrpc": "2.0", "result": self._subscriptions.pop(request["params"][0], None) is not None}
+                response["id"] = request["id"]
+            else:
+                response = {"jsonrpc": "2.0", "error": {"code": -32601, "message": "Method not found"}, "id": request["id"]}
+            await connection.send(json.dumps(response))
+
+
+async def _wait_for(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError
+
+
+def test_subscriptions_and_reconnect():
+    async def run():
+        server = StandInServer()
+        url = await server.start()
+        slots = []
+        async with WsClient(url, reconnect_delay=0.05) as client:
+            assert (await client.slot_subscribe(callback=slots.append)).is_ok()
+            account_sub = (await client.account_subscribe("addr1")).ok
+
+            await server.notify("slotSubscribe", {"slot": 1})
+            await server.notify("accountSubscribe", {"value": {"lamports": 10}})
+            await _wait_for(lambda: slots)
+            assert slots == [{"slot": 1}]
+            assert (await account_sub.__anext__())["value"]["lamports"] == 10
+
+            # the subscriptions are restored after a reconnect
+            await server.drop_connections()
+            await _wait_for(lambda: len([r for r in server.requests if r["method"] == "accountSubscribe"]) == 2)
+            await server.notify("slotSubscribe", {"slot": 2})
+            await _wait_for(lambda: len(slots) == 2)
+            assert client.stats.reconnects == 1
+
+            assert (await client.unsubscribe(account_sub)).ok is True
+            assert [item async for item in account_sub] == []
+            assert (await client.call("getSlot", [])).error == "service_error: Method not found"
+        await server.stop()
+
+    asyncio.run(run())
+
+
+def test_signature_subscription_is_one_shot():
+    async def run():
+        server = StandInServer()
+        url = await server.start()
+        async with WsClient(url) as client:
+            sub = (await client.signature_subscribe("sig1")).ok
+            await server.notify("signatureSubscribe", {"value": {"err": None}})
+            assert [item async for item in sub] == [{"value": {"err": None}}]
+        await server.stop()
+
+    asyncio.run(run())
+
+
+def test_callback_errors():
+    async def run():
+        server = StandInServer()
+        url = await server.start()
+        slots = []
+
+        def on_slot(result):
+            slots.append(result)
+            if result["slot"] == 1:
+                raise ValueError("bad callback")
+
+        async def on_account(result):
+            raise ValueError("bad async callback")
+
+        def on_signature(result):
+            raise ValueError("bad one-shot callback")
+
+        async with WsClient(url) as client:
+            await client.slot_subscribe(callback=on_slot)
+            await client.account_subscribe("addr1", callback=on_account)
+            signature_sub = (await client.signature_subscribe("sig1", callback=on_signature)).ok
+            await server.notify("slotSubscribe", {"slot": 1})
+            await server.notify("accountSubscribe", {"value": {}})
+            await server.notify("signatureSubscribe", {"value": {"err": None}})
+            await server.notify("slotSubscribe", {"slot": 2})
+            await _wait_for(lambda: len(slots) == 2 and client.stats.callback_errors == 3)
+            assert client.stats.reconnects == 0  # the connection is kept
+            assert not signature_sub.active  # the one-shot cleanup isn't skipped
+        await server.stop()
+
+    asyncio.run(run())
+
+
+def test_rpc_call_over_ws():
+    """A node answers only subscriptions over ws, they go through WsClient"""
+    res = solana_rpc.rpc_call(node="ws://127.0.0.1:8900", method="getSlot", params=[])
+    assert res.error == solana_rpc.WS_CALL_ERROR
+    res = asyncio.run(aio.rpc_call(node="ws://127.0.0.1:8900", method="getSlot", params=[], transport=aio.AsyncTransport()))
+    assert res.error == solana_rpc.WS_CALL_ERROR
+
+
+def test_http_to_ws_url():
+    assert http_to_ws_url("https://api.mainnet-beta.solana.com") == "wss://api.mainnet-beta.solana.com"
+    assert http_to_ws_url("http://localhost:8900") == "ws://localhost:8900"
+    assert http_to_ws_url("ws://localhost:8900") == "ws://localhost:8900"